@@ -1,12 +1,23 @@
 # Copyright (c) 2023 Apple Inc. Licensed under MIT License.
 
+import asyncio
 import calendar
+import concurrent.futures
+import copy
 import datetime
+import email.utils
+import inspect
+import random
+import re
+import threading
+import time
 import warnings
 from enum import IntEnum, Enum
-from typing import Any, Dict, List, MutableMapping, Optional, Type, TypeVar, Union
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, Iterable, Iterator, List, MutableMapping, Optional, Tuple, Type, TypeVar, Union
 from attr import define
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import jwt
 from cryptography.hazmat.backends import default_backend
@@ -30,6 +41,7 @@ from .models.MassExtendRenewalDateResponse import MassExtendRenewalDateResponse
 from .models.MassExtendRenewalDateStatusResponse import MassExtendRenewalDateStatusResponse
 from .models.NotificationHistoryRequest import NotificationHistoryRequest
 from .models.NotificationHistoryResponse import NotificationHistoryResponse
+from .models.NotificationHistoryResponseItem import NotificationHistoryResponseItem
 from .models.OrderLookupResponse import OrderLookupResponse
 from .models.PerformanceTestRequest import PerformanceTestRequest
 from .models.PerformanceTestResponse import PerformanceTestResponse
@@ -45,9 +57,71 @@ from .models.TransactionInfoResponse import TransactionInfoResponse
 from .models.AppTransactionInfoResponse import AppTransactionInfoResponse
 from .models.UpdateAppAccountTokenRequest import UpdateAppAccountTokenRequest
 from .models.UploadMessageRequestBody import UploadMessageRequestBody
+from .models.JWSTransactionDecodedPayload import JWSTransactionDecodedPayload
+from .models.ResponseBodyV2DecodedPayload import ResponseBodyV2DecodedPayload
+from .signed_data_verifier import AsyncSignedDataVerifier, BaseSignedDataVerifier, SignedDataVerifier, VerificationException
 from uuid import UUID
 
 T = TypeVar('T')
+P = TypeVar('P')
+
+def _iter_pages(fetch_page: Callable[[Optional[str]], P], get_next_token: Callable[[P], Optional[str]], token: Optional[str], prefetch: bool) -> Iterator[P]:
+    """
+    Fetches pages until one has no next token, requesting the next page on a background thread while the current one is consumed when prefetch is set
+    """
+    if not prefetch:
+        while True:
+            page = fetch_page(token)
+            token = get_next_token(page)
+            yield page
+            if token is None:
+                return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-prefetch") as executor:
+        future = executor.submit(fetch_page, token)
+        try:
+            while future is not None:
+                page = future.result()
+                token = get_next_token(page)
+                future = executor.submit(fetch_page, token) if token is not None else None
+                yield page
+        finally:
+            if future is not None:
+                future.cancel()
+
+async def _aiter_pages(fetch_page: Callable[[Optional[str]], Awaitable[P]], get_next_token: Callable[[P], Optional[str]], token: Optional[str], prefetch: bool) -> AsyncIterator[P]:
+    """
+    Fetches pages until one has no next token, requesting the next page in a task while the current one is consumed when prefetch is set
+    """
+    next_page = asyncio.ensure_future(fetch_page(token))
+    try:
+        while next_page is not None:
+            page = await next_page
+            token = get_next_token(page)
+            next_page = None
+            if token is not None and prefetch:
+                next_page = asyncio.ensure_future(fetch_page(token))
+            yield page
+            if token is not None and not prefetch:
+                next_page = asyncio.ensure_future(fetch_page(token))
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+def _raise_verification_failures(decoded_items: List[Union[T, VerificationException]]) -> Iterator[T]:
+    for decoded_item in decoded_items:
+        if isinstance(decoded_item, VerificationException):
+            raise decoded_item
+        yield decoded_item
+
+def _check_blocking_verifier(signed_data_verifier: Optional[SignedDataVerifier]):
+    if isinstance(signed_data_verifier, AsyncSignedDataVerifier):
+        raise TypeError("An AsyncSignedDataVerifier can only be used with AsyncAppStoreServerAPIClient, use a SignedDataVerifier instead")
+
+def _get_next_transaction_history_revision(history_response: HistoryResponse) -> Optional[str]:
+    return history_response.revision if history_response.hasMore else None
+
+def _get_next_notification_history_pagination_token(notification_history_response: NotificationHistoryResponse) -> Optional[str]:
+    return notification_history_response.paginationToken if notification_history_response.hasMore else None
 
 class APIError(IntEnum):
     GENERAL_BAD_REQUEST = 4000000
@@ -691,8 +765,186 @@ class GetTransactionHistoryVersion(str, Enum):
 
     V2 = "v2"
 
+@define
+class RetryPolicy:
+    """
+    When, and after how long, a call rejected with a retryable APIError or HTTP status code is sent again
+    """
+
+    max_retries: int = 3
+    """
+    The maximum number of times a call is retried after its first attempt
+    """
+
+    initial_backoff: float = 1.0
+    """
+    The number of seconds before the first retry, doubled by multiplier for each following retry
+    """
+
+    max_backoff: float = 30.0
+    """
+    The maximum number of seconds waited before a retry. A call whose Retry-After asks for a longer wait is not retried.
+    """
+
+    multiplier: float = 2.0
+    """
+    The factor applied to the backoff after each retry
+    """
+
+    jitter: bool = True
+    """
+    Whether a random delay between zero and the backoff is waited instead of the backoff itself, spreading the retries of concurrent callers
+    """
+
+    retryable_errors: FrozenSet[APIError] = frozenset({APIError.RATE_LIMIT_EXCEEDED, APIError.GENERAL_INTERNAL_RETRYABLE})
+    """
+    The API errors after which a call is retried
+    """
+
+    retryable_status_codes: FrozenSet[int] = frozenset({429, 503})
+    """
+    The HTTP status codes after which a call is retried, including when the response has no parseable errorCode, such as a reply from a proxy
+    """
+
+    def get_delay(self, attempt: int, api_exception: APIException, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        :param attempt: The number of retries already made for the call
+        :param api_exception: The exception raised by the latest attempt
+        :param retry_after: The Retry-After header of the response to the latest attempt, as a number of seconds or an HTTP date
+        :return: The number of seconds to wait before retrying, or None if the call is not retried
+        """
+        if attempt >= self.max_retries:
+            return None
+        if api_exception.api_error not in self.retryable_errors and api_exception.http_status_code not in self.retryable_status_codes:
+            return None
+        retry_after_delay = RetryPolicy._parse_retry_after(retry_after)
+        if retry_after_delay is not None:
+            return retry_after_delay if retry_after_delay <= self.max_backoff else None
+        backoff = min(self.initial_backoff * (self.multiplier ** attempt), self.max_backoff)
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+    @staticmethod
+    def _parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+        if retry_after is None:
+            return None
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+        try:
+            retry_date = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if retry_date.tzinfo is None:
+            retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+        return max(retry_date.timestamp() - time.time(), 0)
+
+class EndpointFamily(str, Enum):
+    """
+    A group of App Store Server API endpoints sharing a rate limit
+    """
+    TRANSACTION_HISTORY = "transactionHistory"
+    TRANSACTION_INFO = "transactionInfo"
+    SUBSCRIPTION_STATUS = "subscriptionStatus"
+    NOTIFICATION_HISTORY = "notificationHistory"
+    MASS_EXTEND = "massExtend"
+    OTHER = "other"
+
+    @staticmethod
+    def from_path(path: str) -> 'EndpointFamily':
+        """
+        :param path: The path of an App Store Server API endpoint, such as /inApps/v1/subscriptions/1234
+        :return: The family of the endpoint
+        """
+        for pattern, endpoint_family in _ENDPOINT_FAMILY_PATTERNS:
+            if pattern.match(path):
+                return endpoint_family
+        return EndpointFamily.OTHER
+
+_ENDPOINT_FAMILY_PATTERNS = [
+    (re.compile(r"^/inApps/v\d+/history/"), EndpointFamily.TRANSACTION_HISTORY),
+    (re.compile(r"^/inApps/v1/transactions/[^/]+$"), EndpointFamily.TRANSACTION_INFO),
+    (re.compile(r"^/inApps/v1/subscriptions/extend/mass(/|$)"), EndpointFamily.MASS_EXTEND),
+    (re.compile(r"^/inApps/v1/subscriptions/extend/"), EndpointFamily.OTHER),
+    (re.compile(r"^/inApps/v1/subscriptions/[^/]+$"), EndpointFamily.SUBSCRIPTION_STATUS),
+    (re.compile(r"^/inApps/v1/notifications/history$"), EndpointFamily.NOTIFICATION_HISTORY),
+]
+
+class _TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes a token, possibly ahead of its refill, so concurrent callers queue in order without holding the lock while waiting
+
+        :return: The number of seconds to wait before the token is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0 if self._tokens >= 0 else -self._tokens / self._rate
+
+class RateLimiter:
+    """
+    Paces the calls of each EndpointFamily with a token bucket, so callers wait briefly instead of being rejected with RATE_LIMIT_EXCEEDED.
+    A single RateLimiter is safe to share between threads, asyncio tasks, and the clients it is passed to.
+    """
+    def __init__(self, rates: Dict[EndpointFamily, float], burst: Optional[Dict[EndpointFamily, int]] = None):
+        """
+        :param rates: The sustained number of calls per second allowed for each endpoint family. Calls to families without a rate are not paced.
+        :param burst: The number of calls of each endpoint family that can be made at once after a quiet period, defaulting to 1
+        :raises ValueError: if a rate is not positive or a burst is less than 1
+        """
+        burst = burst if burst is not None else {}
+        for endpoint_family, rate in rates.items():
+            if rate <= 0:
+                raise ValueError(f"The rate of {endpoint_family.value} must be positive")
+        for endpoint_family, endpoint_family_burst in burst.items():
+            if endpoint_family_burst < 1:
+                raise ValueError(f"The burst of {endpoint_family.value} must be at least 1")
+        self._buckets = {endpoint_family: _TokenBucket(rate, burst.get(endpoint_family, 1)) for endpoint_family, rate in rates.items()}
+
+    def acquire(self, endpoint_family: EndpointFamily):
+        """
+        Blocks the calling thread until a call to the endpoint family is allowed
+        """
+        delay = self._reserve(endpoint_family)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, endpoint_family: EndpointFamily):
+        """
+        Suspends the calling task until a call to the endpoint family is allowed
+        """
+        delay = self._reserve(endpoint_family)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _reserve(self, endpoint_family: EndpointFamily) -> float:
+        bucket = self._buckets.get(endpoint_family)
+        return bucket.reserve() if bucket is not None else 0
+
+class _BearerTokenCache:
+    """
+    The most recently generated bearer token, shared by the threads and tasks using a client
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.token: Optional[str] = None
+        self.expiration: int = 0
+
 class BaseAppStoreServerAPIClient:
-    def __init__(self, signing_key: bytes, key_id: str, issuer_id: str, bundle_id: str, environment: Environment):
+    TOKEN_LIFETIME = 5 * 60 # 5 minutes
+    TOKEN_REFRESH_MARGIN = 60 # 1 minute
+
+    def __init__(self, signing_key: bytes, key_id: str, issuer_id: str, bundle_id: str, environment: Environment, token_refresh_margin: int = TOKEN_REFRESH_MARGIN, retry_policy: Optional[RetryPolicy] = None, rate_limiter: Optional[RateLimiter] = None):
         if environment == Environment.XCODE:
             raise ValueError("Xcode is not a supported environment for an AppStoreServerAPIClient")
         if environment == Environment.PRODUCTION:
@@ -707,15 +959,48 @@ class BaseAppStoreServerAPIClient:
         self._key_id = key_id
         self._issuer_id = issuer_id
         self._bundle_id = bundle_id
+        self._token_refresh_margin = token_refresh_margin
+        self._token_cache = _BearerTokenCache()
+        self._retry_policy = retry_policy
+        self._rate_limiter = rate_limiter
+
+    def with_retry_policy(self, retry_policy: Optional[RetryPolicy]):
+        """
+        Returns a copy of this client retrying calls with another policy, sharing its connections and bearer token.
+        The copy does not close the connections, which remain owned by this client.
+
+        :param retry_policy: The policy of the copy, or None to raise API errors without retrying
+        :return: The copy of this client
+        """
+        client = copy.copy(self)
+        client._owns_connections = False
+        client._retry_policy = retry_policy
+        return client
+
+    def _get_retry_delay(self, attempt: int, api_exception: APIException, headers: MutableMapping) -> Optional[float]:
+        if self._retry_policy is None:
+            return None
+        return self._retry_policy.get_delay(attempt, api_exception, headers.get('retry-after'))
+
+    def _get_token(self) -> str:
+        """
+        :return: The cached bearer token, or a new one when the cached token expires within the refresh margin
+        """
+        token_cache = self._token_cache
+        with token_cache.lock:
+            if token_cache.token is None or time.time() >= token_cache.expiration - self._token_refresh_margin:
+                future_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=BaseAppStoreServerAPIClient.TOKEN_LIFETIME)
+                token_cache.expiration = calendar.timegm(future_time.timetuple())
+                token_cache.token = self._generate_token(token_cache.expiration)
+            return token_cache.token
 
-    def _generate_token(self) -> str:
-        future_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5)
+    def _generate_token(self, expiration: int) -> str:
         return jwt.encode(
             {
                 "bid": self._bundle_id,
                 "iss": self._issuer_id,
                 "aud": "appstoreconnect-v1",
-                "exp": calendar.timegm(future_time.timetuple()),
+                "exp": expiration,
             },
             self._signing_key,
             algorithm="ES256",
@@ -728,7 +1013,7 @@ class BaseAppStoreServerAPIClient:
     def _get_headers(self) -> Dict[str, str]:
         return {
             'User-Agent': "app-store-server-library/python/3.1.1",
-            'Authorization': f'Bearer {self._generate_token()}',
+            'Authorization': f'Bearer {self._get_token()}',
             'Accept': 'application/json'
         }
     
@@ -757,25 +1042,66 @@ class BaseAppStoreServerAPIClient:
 
 
 class AppStoreServerAPIClient(BaseAppStoreServerAPIClient):
-    def __init__(self, signing_key: bytes, key_id: str, issuer_id: str, bundle_id: str, environment: Environment):
-        super().__init__(signing_key=signing_key, key_id=key_id, issuer_id=issuer_id, bundle_id=bundle_id, environment=environment)
-    
+    def __init__(self, signing_key: bytes, key_id: str, issuer_id: str, bundle_id: str, environment: Environment, session: Optional[requests.Session] = None, pool_maxsize: int = 10, max_retries: Union[int, Retry] = 0, http_adapter: Optional[HTTPAdapter] = None, token_refresh_margin: int = BaseAppStoreServerAPIClient.TOKEN_REFRESH_MARGIN, retry_policy: Optional[RetryPolicy] = None, rate_limiter: Optional[RateLimiter] = None):
+        """
+        :param session: The requests.Session used for API calls, which is left open by close. When not provided, the client creates a session keeping connections alive between calls.
+        :param pool_maxsize: The maximum number of connections kept alive by a session created by the client, which should be at least the number of threads sharing the client
+        :param max_retries: The retries of failed connections by a session created by the client, as a count or a urllib3 Retry
+        :param http_adapter: The adapter mounted for https:// URLs on a session created by the client, replacing the one configured by pool_maxsize and max_retries
+        :param token_refresh_margin: The number of seconds before its expiration that the bearer token, reused between calls, is generated again
+        :param retry_policy: How calls rejected with a retryable APIError are retried, defaulting to no retries
+        :param rate_limiter: Paces calls, including retries, by endpoint family. Defaults to no pacing.
+        """
+        super().__init__(signing_key=signing_key, key_id=key_id, issuer_id=issuer_id, bundle_id=bundle_id, environment=environment, token_refresh_margin=token_refresh_margin, retry_policy=retry_policy, rate_limiter=rate_limiter)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", http_adapter if http_adapter is not None else HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=max_retries))
+            self._owns_connections = True
+        else:
+            self._owns_connections = False
+        self.session = session
+
+    def close(self):
+        """
+        Closes the session created by the client, releasing its pooled connections. A session passed to the client is left open.
+        """
+        if self._owns_connections:
+            self.session.close()
+
+    def __enter__(self) -> 'AppStoreServerAPIClient':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _make_request(self, path: str, method: str, queryParameters: Dict[str, Union[str, List[str]]], body, destination_class: Type[T], content_type: Optional[str] = None) -> T:
         url = self._get_full_url(path)
-        headers = self._get_headers()
-
-        if isinstance(body, bytes):
-            if content_type:
-                headers['Content-Type'] = content_type
-            response = self._execute_request(method, url, queryParameters, headers, None, body)
-        else:
-            json = self._get_request_json(body)
-            response = self._execute_request(method, url, queryParameters, headers, json, None)
+        json = self._get_request_json(body) if not isinstance(body, bytes) else None
+        endpoint_family = EndpointFamily.from_path(path)
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(endpoint_family)
+            headers = self._get_headers()
+
+            if isinstance(body, bytes):
+                if content_type:
+                    headers['Content-Type'] = content_type
+                response = self._execute_request(method, url, queryParameters, headers, None, body)
+            else:
+                response = self._execute_request(method, url, queryParameters, headers, json, None)
 
-        return self._parse_response(response.status_code, response.headers, lambda: response.json(), destination_class)
+            try:
+                return self._parse_response(response.status_code, response.headers, lambda: response.json(), destination_class)
+            except APIException as e:
+                delay = self._get_retry_delay(attempt, e, response.headers)
+                if delay is None:
+                    raise
+            attempt += 1
+            time.sleep(delay)
 
     def _execute_request(self, method: str, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Optional[Dict[str, Any]], data: Optional[bytes]) -> requests.Response:
-        return requests.request(method, url, params=params, headers=headers, json=json, data=data, timeout=30)
+        return self.session.request(method, url, params=params, headers=headers, json=json, data=data, timeout=30)
 
     def extend_renewal_date_for_all_active_subscribers(self, mass_extend_renewal_date_request: MassExtendRenewalDateRequest) -> MassExtendRenewalDateResponse: 
         """
@@ -815,6 +1141,52 @@ class AppStoreServerAPIClient(BaseAppStoreServerAPIClient):
             queryParameters["status"] = [s.value for s in status]
 
         return self._make_request(f"/inApps/v1/subscriptions/{any_transaction_id}", "GET", queryParameters, None, StatusResponse, None)
+
+    def iter_all_subscription_statuses(self, any_transaction_ids: Iterable[str], status: Optional[List[Status]] = None, concurrency: int = 10) -> Iterator[Tuple[str, Union[StatusResponse, APIException, requests.exceptions.RequestException]]]:
+        """
+        Get the statuses for all of the auto-renewable subscriptions of many customers, using a pool of threads.
+        Transaction identifiers are read lazily, and no more than concurrency requests are in flight or waiting to be consumed.
+        https://developer.apple.com/documentation/appstoreserverapi/get_all_subscription_statuses
+
+        :param any_transaction_ids: For each customer, any transactionId, originalTransactionId, or appTransactionId that belongs to the customer for your app.
+        :param status: An optional filter that indicates the status of subscriptions to include in the responses.
+        :param concurrency: The maximum number of concurrent requests.
+        :return: An iterator, in order of completion, over each transaction identifier paired with its response, or the APIException or requests.exceptions.RequestException, such as a connection error or timeout, raised for it.
+        :throws ValueError: If concurrency is less than 1
+        """
+        # Checked when called, rather than when the iterator is first advanced
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        return self._iter_all_subscription_statuses(any_transaction_ids, status, concurrency)
+
+    def _iter_all_subscription_statuses(self, any_transaction_ids: Iterable[str], status: Optional[List[Status]], concurrency: int) -> Iterator[Tuple[str, Union[StatusResponse, APIException, requests.exceptions.RequestException]]]:
+        any_transaction_ids = iter(any_transaction_ids)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="subscription-status") as executor:
+            pending: Dict[concurrent.futures.Future, str] = {}
+            def submit_next() -> bool:
+                any_transaction_id = next(any_transaction_ids, None)
+                if any_transaction_id is None:
+                    return False
+                pending[executor.submit(self._get_all_subscription_statuses_or_exception, any_transaction_id, status)] = any_transaction_id
+                return True
+            try:
+                while len(pending) < concurrency and submit_next():
+                    pass
+                while pending:
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        any_transaction_id = pending.pop(future)
+                        submit_next()
+                        yield any_transaction_id, future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _get_all_subscription_statuses_or_exception(self, any_transaction_id: str, status: Optional[List[Status]]) -> Union[StatusResponse, APIException, requests.exceptions.RequestException]:
+        try:
+            return self.get_all_subscription_statuses(any_transaction_id, status)
+        except (APIException, requests.exceptions.RequestException) as e:
+            return e
     
     def get_refund_history(self, any_transaction_id: str, revision: Optional[str]) -> RefundHistoryResponse:
         """
@@ -872,6 +1244,44 @@ class AppStoreServerAPIClient(BaseAppStoreServerAPIClient):
         
         return self._make_request("/inApps/v1/notifications/history", "POST", queryParameters, notification_history_request, NotificationHistoryResponse, None)
 
+    def iter_notification_history_pages(self, notification_history_request: NotificationHistoryRequest, pagination_token: Optional[str] = None, prefetch: bool = True) -> Iterator[NotificationHistoryResponse]:
+        """
+        Lazily gets every page of the notifications that the App Store server attempted to send to your server, following the paginationToken of each page.
+        https://developer.apple.com/documentation/appstoreserverapi/get_notification_history
+
+        :param notification_history_request: The request body that includes the start and end dates, and optional query constraints.
+        :param pagination_token: The paginationToken to resume from, or None to start with the first page.
+        :param prefetch: Whether the next page is requested on a background thread while the current page is consumed.
+        :return: An iterator over the pages of the App Store Server Notifications history for your app.
+        :throws APIException: If a response was returned indicating the request could not be processed
+        """
+        return _iter_pages(lambda page_token: self.get_notification_history(page_token, notification_history_request), _get_next_notification_history_pagination_token, pagination_token, prefetch)
+
+    def iter_notification_history(self, notification_history_request: NotificationHistoryRequest, signed_data_verifier: Optional[SignedDataVerifier] = None, prefetch: bool = True) -> Iterator[Union[NotificationHistoryResponseItem, Tuple[NotificationHistoryResponseItem, ResponseBodyV2DecodedPayload]]]:
+        """
+        Lazily gets every notification that the App Store server attempted to send to your server.
+        https://developer.apple.com/documentation/appstoreserverapi/get_notification_history
+
+        :param notification_history_request: The request body that includes the start and end dates, and optional query constraints.
+        :param signed_data_verifier: When provided, the SignedDataVerifier verifying and decoding the signedPayload of each notification.
+        :param prefetch: Whether the next page is requested on a background thread while the current page is consumed.
+        :return: An iterator over the notification history records, or over each record paired with its decoded signedPayload when a signed_data_verifier is provided.
+        :throws APIException: If a response was returned indicating the request could not be processed
+        :throws VerificationException: If a signedPayload could not be verified
+        :throws TypeError: If signed_data_verifier is an AsyncSignedDataVerifier
+        """
+        # Checked before the first page is requested, rather than when the iterator is first advanced
+        _check_blocking_verifier(signed_data_verifier)
+        return self._iter_notification_history(notification_history_request, signed_data_verifier, prefetch)
+
+    def _iter_notification_history(self, notification_history_request: NotificationHistoryRequest, signed_data_verifier: Optional[SignedDataVerifier], prefetch: bool) -> Iterator[Union[NotificationHistoryResponseItem, Tuple[NotificationHistoryResponseItem, ResponseBodyV2DecodedPayload]]]:
+        for notification_history_response in self.iter_notification_history_pages(notification_history_request, prefetch=prefetch):
+            for notification_history_item in notification_history_response.notificationHistory or []:
+                if signed_data_verifier is None:
+                    yield notification_history_item
+                else:
+                    yield notification_history_item, signed_data_verifier.verify_and_decode_notification(notification_history_item.signedPayload)
+
     def get_transaction_history(self, any_transaction_id: str, revision: Optional[str], transaction_history_request: TransactionHistoryRequest, version: GetTransactionHistoryVersion = GetTransactionHistoryVersion.V1) -> HistoryResponse:
         """
         Get a customer's in-app purchase transaction history for your app.
@@ -914,6 +1324,48 @@ class AppStoreServerAPIClient(BaseAppStoreServerAPIClient):
         
         return self._make_request("/inApps/{}/history/{}".format(version.value, any_transaction_id), "GET", queryParameters, None, HistoryResponse, None)
 
+    def iter_transaction_history_pages(self, any_transaction_id: str, transaction_history_request: TransactionHistoryRequest, version: GetTransactionHistoryVersion = GetTransactionHistoryVersion.V2, revision: Optional[str] = None, prefetch: bool = True) -> Iterator[HistoryResponse]:
+        """
+        Lazily gets every page of a customer's in-app purchase transaction history for your app, following the revision of each page with the same query parameters.
+        https://developer.apple.com/documentation/appstoreserverapi/get_transaction_history
+
+        :param any_transaction_id: Any transactionId, originalTransactionId, or appTransactionId that belongs to the customer for your app.
+        :param transaction_history_request: The request parameters that includes the startDate,endDate,productIds,productTypes and optional query constraints.
+        :param version: The version of the Get Transaction History endpoint to use.
+        :param revision: The revision to resume from, or None to start with the first page.
+        :param prefetch: Whether the next page is requested on a background thread while the current page is consumed.
+        :return: An iterator over the pages of the customer's transaction history.
+        :throws APIException: If a response was returned indicating the request could not be processed
+        """
+        return _iter_pages(lambda page_revision: self.get_transaction_history(any_transaction_id, page_revision, transaction_history_request, version), _get_next_transaction_history_revision, revision, prefetch)
+
+    def iter_transaction_history(self, any_transaction_id: str, transaction_history_request: TransactionHistoryRequest, version: GetTransactionHistoryVersion = GetTransactionHistoryVersion.V2, signed_data_verifier: Optional[SignedDataVerifier] = None, prefetch: bool = True) -> Iterator[Union[str, JWSTransactionDecodedPayload]]:
+        """
+        Lazily gets every transaction of a customer's in-app purchase transaction history for your app.
+        https://developer.apple.com/documentation/appstoreserverapi/get_transaction_history
+
+        :param any_transaction_id: Any transactionId, originalTransactionId, or appTransactionId that belongs to the customer for your app.
+        :param transaction_history_request: The request parameters that includes the startDate,endDate,productIds,productTypes and optional query constraints.
+        :param version: The version of the Get Transaction History endpoint to use.
+        :param signed_data_verifier: When provided, the SignedDataVerifier verifying and decoding the transactions of each page.
+        :param prefetch: Whether the next page is requested on a background thread while the current page is consumed.
+        :return: An iterator over the signed transactions, or over the decoded transactions when a signed_data_verifier is provided.
+        :throws APIException: If a response was returned indicating the request could not be processed
+        :throws VerificationException: If a transaction could not be verified
+        :throws TypeError: If signed_data_verifier is an AsyncSignedDataVerifier
+        """
+        # Checked before the first page is requested, rather than when the iterator is first advanced
+        _check_blocking_verifier(signed_data_verifier)
+        return self._iter_transaction_history(any_transaction_id, transaction_history_request, version, signed_data_verifier, prefetch)
+
+    def _iter_transaction_history(self, any_transaction_id: str, transaction_history_request: TransactionHistoryRequest, version: GetTransactionHistoryVersion, signed_data_verifier: Optional[SignedDataVerifier], prefetch: bool) -> Iterator[Union[str, JWSTransactionDecodedPayload]]:
+        for history_response in self.iter_transaction_history_pages(any_transaction_id, transaction_history_request, version, prefetch=prefetch):
+            signed_transactions = history_response.signedTransactions or []
+            if signed_data_verifier is None:
+                yield from signed_transactions
+            else:
+                yield from _raise_verification_failures(signed_data_verifier.verify_and_decode_signed_transactions(signed_transactions))
+
     def get_transaction_info(self, transaction_id: str) -> TransactionInfoResponse:
         """
         Get information about a single transaction for your app.
@@ -1157,35 +1609,74 @@ class AppStoreServerAPIClient(BaseAppStoreServerAPIClient):
         self._make_request(f"/inApps/v1/transactions/{transaction_id}/finish", "POST", {}, None, None, None)
 
 class AsyncAppStoreServerAPIClient(BaseAppStoreServerAPIClient):
-    def __init__(self, signing_key: bytes, key_id: str, issuer_id: str, bundle_id: str, environment: Environment):
-        super().__init__(signing_key=signing_key, key_id=key_id, issuer_id=issuer_id, bundle_id=bundle_id, environment=environment)
+    def __init__(self, signing_key: bytes, key_id: str, issuer_id: str, bundle_id: str, environment: Environment, token_refresh_margin: int = BaseAppStoreServerAPIClient.TOKEN_REFRESH_MARGIN, http_client: Optional['httpx.AsyncClient'] = None, http2: bool = False, max_connections: Optional[int] = 100, max_keepalive_connections: Optional[int] = 20, timeout: Optional[Union[float, 'httpx.Timeout']] = None, retry_policy: Optional[RetryPolicy] = None, rate_limiter: Optional[RateLimiter] = None):
+        """
+        :param token_refresh_margin: The number of seconds before its expiration that the bearer token, reused between calls, is generated again
+        :param http_client: The httpx.AsyncClient used for API calls, which is left open by async_close. When provided, http2, max_connections and max_keepalive_connections are ignored.
+        :param http2: Whether a client created by this client negotiates HTTP/2, multiplexing concurrent calls over one connection. Requires the httpx[http2] extra.
+        :param max_connections: The maximum number of concurrent connections of a client created by this client, or None for no limit
+        :param max_keepalive_connections: The maximum number of idle connections kept alive by a client created by this client, or None for no limit
+        :param timeout: The timeout of API calls in seconds, or an httpx.Timeout with separate connect, read, write and pool timeouts. Defaults to the timeout of the provided http_client, or 30 seconds.
+        :param retry_policy: How calls rejected with a retryable APIError are retried, defaulting to no retries
+        :param rate_limiter: Paces calls, including retries, by endpoint family. Defaults to no pacing.
+        """
+        super().__init__(signing_key=signing_key, key_id=key_id, issuer_id=issuer_id, bundle_id=bundle_id, environment=environment, token_refresh_margin=token_refresh_margin, retry_policy=retry_policy, rate_limiter=rate_limiter)
         try:
             import httpx
-            self.http_client = httpx.AsyncClient()
         except:
             raise ModuleNotFoundError("httpx not found but attempting to instantiate an async client")
+        if http_client is None:
+            http_client = httpx.AsyncClient(http2=http2, limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections))
+            self._owns_connections = True
+            self._timeout = timeout if timeout is not None else 30
+        else:
+            self._owns_connections = False
+            self._timeout = timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+        self.http_client = http_client
 
     async def async_close(self):
-        await self.http_client.aclose()
+        """
+        Closes the httpx.AsyncClient created by this client. A client passed as http_client is left open.
+        """
+        if self._owns_connections:
+            await self.http_client.aclose()
+
+    async def __aenter__(self) -> 'AsyncAppStoreServerAPIClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.async_close()
     
     async def _make_request(self, path: str, method: str, queryParameters: Dict[str, Union[str, List[str]]], body, destination_class: Type[T], content_type: Optional[str] = None) -> T:
         url = self._get_full_url(path)
-        headers = self._get_headers()
+        json = self._get_request_json(body) if not isinstance(body, bytes) else None
+        endpoint_family = EndpointFamily.from_path(path)
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire_async(endpoint_family)
+            headers = self._get_headers()
+
+            if isinstance(body, bytes):
+                # For binary data like images
+                if content_type:
+                    headers['Content-Type'] = content_type
+                response = await self._execute_request(method, url, queryParameters, headers, None, body)
+            else:
+                # For JSON data
+                response = await self._execute_request(method, url, queryParameters, headers, json, None)
 
-        if isinstance(body, bytes):
-            # For binary data like images
-            if content_type:
-                headers['Content-Type'] = content_type
-            response = await self._execute_request(method, url, queryParameters, headers, None, body)
-        else:
-            # For JSON data
-            json = self._get_request_json(body)
-            response = await self._execute_request(method, url, queryParameters, headers, json, None)
-
-        return self._parse_response(response.status_code, response.headers, lambda: response.json(), destination_class)
+            try:
+                return self._parse_response(response.status_code, response.headers, lambda: response.json(), destination_class)
+            except APIException as e:
+                delay = self._get_retry_delay(attempt, e, response.headers)
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
 
     async def _execute_request(self, method: str, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Optional[Dict[str, Any]], data: Optional[bytes]):
-        return await self.http_client.request(method, url, params=params, headers=headers, json=json, data=data, timeout=30)
+        return await self.http_client.request(method, url, params=params, headers=headers, json=json, data=data, timeout=self._timeout)
 
     async def extend_renewal_date_for_all_active_subscribers(self, mass_extend_renewal_date_request: MassExtendRenewalDateRequest) -> MassExtendRenewalDateResponse: 
         """
@@ -1225,6 +1716,52 @@ class AsyncAppStoreServerAPIClient(BaseAppStoreServerAPIClient):
             queryParameters["status"] = [s.value for s in status]
 
         return await self._make_request(f"/inApps/v1/subscriptions/{any_transaction_id}", "GET", queryParameters, None, StatusResponse, None)
+
+    def iter_all_subscription_statuses(self, any_transaction_ids: Iterable[str], status: Optional[List[Status]] = None, concurrency: int = 10) -> AsyncIterator[Tuple[str, Union[StatusResponse, APIException, 'httpx.TransportError']]]:
+        """
+        Get the statuses for all of the auto-renewable subscriptions of many customers, using concurrent tasks.
+        Transaction identifiers are read lazily, and no more than concurrency requests are in flight or waiting to be consumed.
+        https://developer.apple.com/documentation/appstoreserverapi/get_all_subscription_statuses
+
+        :param any_transaction_ids: For each customer, any transactionId, originalTransactionId, or appTransactionId that belongs to the customer for your app.
+        :param status: An optional filter that indicates the status of subscriptions to include in the responses.
+        :param concurrency: The maximum number of concurrent requests.
+        :return: An async iterator, in order of completion, over each transaction identifier paired with its response, or the APIException or httpx.TransportError, such as a connection error or timeout, raised for it.
+        :throws ValueError: If concurrency is less than 1
+        """
+        # Checked when called, rather than when the iterator is first advanced
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        return self._iter_all_subscription_statuses(any_transaction_ids, status, concurrency)
+
+    async def _iter_all_subscription_statuses(self, any_transaction_ids: Iterable[str], status: Optional[List[Status]], concurrency: int) -> AsyncIterator[Tuple[str, Union[StatusResponse, APIException, 'httpx.TransportError']]]:
+        any_transaction_ids = iter(any_transaction_ids)
+        pending: Dict[asyncio.Future, str] = {}
+        def submit_next() -> bool:
+            any_transaction_id = next(any_transaction_ids, None)
+            if any_transaction_id is None:
+                return False
+            pending[asyncio.ensure_future(self._get_all_subscription_statuses_or_exception(any_transaction_id, status))] = any_transaction_id
+            return True
+        try:
+            while len(pending) < concurrency and submit_next():
+                pass
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    any_transaction_id = pending.pop(task)
+                    submit_next()
+                    yield any_transaction_id, task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _get_all_subscription_statuses_or_exception(self, any_transaction_id: str, status: Optional[List[Status]]) -> Union[StatusResponse, APIException, 'httpx.TransportError']:
+        import httpx
+        try:
+            return await self.get_all_subscription_statuses(any_transaction_id, status)
+        except (APIException, httpx.TransportError) as e:
+            return e
     
     async def get_refund_history(self, any_transaction_id: str, revision: Optional[str]) -> RefundHistoryResponse:
         """
@@ -1282,6 +1819,41 @@ class AsyncAppStoreServerAPIClient(BaseAppStoreServerAPIClient):
         
         return await self._make_request("/inApps/v1/notifications/history", "POST", queryParameters, notification_history_request, NotificationHistoryResponse, None)
 
+    def iter_notification_history_pages(self, notification_history_request: NotificationHistoryRequest, pagination_token: Optional[str] = None, prefetch: bool = True) -> AsyncIterator[NotificationHistoryResponse]:
+        """
+        Lazily gets every page of the notifications that the App Store server attempted to send to your server, following the paginationToken of each page.
+        https://developer.apple.com/documentation/appstoreserverapi/get_notification_history
+
+        :param notification_history_request: The request body that includes the start and end dates, and optional query constraints.
+        :param pagination_token: The paginationToken to resume from, or None to start with the first page.
+        :param prefetch: Whether the next page is requested in a task while the current page is consumed.
+        :return: An async iterator over the pages of the App Store Server Notifications history for your app.
+        :throws APIException: If a response was returned indicating the request could not be processed
+        """
+        return _aiter_pages(lambda page_token: self.get_notification_history(page_token, notification_history_request), _get_next_notification_history_pagination_token, pagination_token, prefetch)
+
+    async def iter_notification_history(self, notification_history_request: NotificationHistoryRequest, signed_data_verifier: Optional[BaseSignedDataVerifier] = None, prefetch: bool = True) -> AsyncIterator[Union[NotificationHistoryResponseItem, Tuple[NotificationHistoryResponseItem, ResponseBodyV2DecodedPayload]]]:
+        """
+        Lazily gets every notification that the App Store server attempted to send to your server.
+        https://developer.apple.com/documentation/appstoreserverapi/get_notification_history
+
+        :param notification_history_request: The request body that includes the start and end dates, and optional query constraints.
+        :param signed_data_verifier: When provided, the SignedDataVerifier or AsyncSignedDataVerifier verifying and decoding the signedPayload of each notification.
+        :param prefetch: Whether the next page is requested in a task while the current page is consumed.
+        :return: An async iterator over the notification history records, or over each record paired with its decoded signedPayload when a signed_data_verifier is provided.
+        :throws APIException: If a response was returned indicating the request could not be processed
+        :throws VerificationException: If a signedPayload could not be verified
+        """
+        async for notification_history_response in self.iter_notification_history_pages(notification_history_request, prefetch=prefetch):
+            for notification_history_item in notification_history_response.notificationHistory or []:
+                if signed_data_verifier is None:
+                    yield notification_history_item
+                    continue
+                decoded_payload = signed_data_verifier.verify_and_decode_notification(notification_history_item.signedPayload)
+                if inspect.isawaitable(decoded_payload):
+                    decoded_payload = await decoded_payload
+                yield notification_history_item, decoded_payload
+
     async def get_transaction_history(self, any_transaction_id: str, revision: Optional[str], transaction_history_request: TransactionHistoryRequest, version: GetTransactionHistoryVersion = GetTransactionHistoryVersion.V1) -> HistoryResponse:
         """
         Get a customer's in-app purchase transaction history for your app.
@@ -1324,6 +1896,47 @@ class AsyncAppStoreServerAPIClient(BaseAppStoreServerAPIClient):
         
         return await self._make_request("/inApps/" + version + "/history/" + any_transaction_id, "GET", queryParameters, None, HistoryResponse, None)
 
+    def iter_transaction_history_pages(self, any_transaction_id: str, transaction_history_request: TransactionHistoryRequest, version: GetTransactionHistoryVersion = GetTransactionHistoryVersion.V2, revision: Optional[str] = None, prefetch: bool = True) -> AsyncIterator[HistoryResponse]:
+        """
+        Lazily gets every page of a customer's in-app purchase transaction history for your app, following the revision of each page with the same query parameters.
+        https://developer.apple.com/documentation/appstoreserverapi/get_transaction_history
+
+        :param any_transaction_id: Any transactionId, originalTransactionId, or appTransactionId that belongs to the customer for your app.
+        :param transaction_history_request: The request parameters that includes the startDate,endDate,productIds,productTypes and optional query constraints.
+        :param version: The version of the Get Transaction History endpoint to use.
+        :param revision: The revision to resume from, or None to start with the first page.
+        :param prefetch: Whether the next page is requested in a task while the current page is consumed.
+        :return: An async iterator over the pages of the customer's transaction history.
+        :throws APIException: If a response was returned indicating the request could not be processed
+        """
+        return _aiter_pages(lambda page_revision: self.get_transaction_history(any_transaction_id, page_revision, transaction_history_request, version), _get_next_transaction_history_revision, revision, prefetch)
+
+    async def iter_transaction_history(self, any_transaction_id: str, transaction_history_request: TransactionHistoryRequest, version: GetTransactionHistoryVersion = GetTransactionHistoryVersion.V2, signed_data_verifier: Optional[BaseSignedDataVerifier] = None, prefetch: bool = True) -> AsyncIterator[Union[str, JWSTransactionDecodedPayload]]:
+        """
+        Lazily gets every transaction of a customer's in-app purchase transaction history for your app.
+        https://developer.apple.com/documentation/appstoreserverapi/get_transaction_history
+
+        :param any_transaction_id: Any transactionId, originalTransactionId, or appTransactionId that belongs to the customer for your app.
+        :param transaction_history_request: The request parameters that includes the startDate,endDate,productIds,productTypes and optional query constraints.
+        :param version: The version of the Get Transaction History endpoint to use.
+        :param signed_data_verifier: When provided, the SignedDataVerifier or AsyncSignedDataVerifier verifying and decoding the transactions of each page.
+        :param prefetch: Whether the next page is requested in a task while the current page is consumed.
+        :return: An async iterator over the signed transactions, or over the decoded transactions when a signed_data_verifier is provided.
+        :throws APIException: If a response was returned indicating the request could not be processed
+        :throws VerificationException: If a transaction could not be verified
+        """
+        async for history_response in self.iter_transaction_history_pages(any_transaction_id, transaction_history_request, version, prefetch=prefetch):
+            signed_transactions = history_response.signedTransactions or []
+            if signed_data_verifier is None:
+                for signed_transaction in signed_transactions:
+                    yield signed_transaction
+            else:
+                decoded_transactions = signed_data_verifier.verify_and_decode_signed_transactions(signed_transactions)
+                if inspect.isawaitable(decoded_transactions):
+                    decoded_transactions = await decoded_transactions
+                for decoded_transaction in _raise_verification_failures(decoded_transactions):
+                    yield decoded_transaction
+
     async def get_transaction_info(self, transaction_id: str) -> TransactionInfoResponse:
         """
         Get information about a single transaction for your app.
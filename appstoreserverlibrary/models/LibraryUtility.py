@@ -2,7 +2,9 @@
 
 from enum import EnumMeta
 from functools import lru_cache
-from typing import Any, List, Type, TypeVar
+import importlib
+import pkgutil
+from typing import Any, Callable, List, Type, TypeVar
 from uuid import UUID
 
 from attr import Attribute, has, ib, fields
@@ -74,8 +76,12 @@ class AttrsRawValueAware:
                 setattr(self, field, value)
 
 
-@lru_cache(maxsize=None)
 def _get_cattrs_converter(destination_class: Type[T]) -> cattrs.Converter:
+    # All models share one converter, so nested classes only have their hooks generated once
+    return _get_shared_cattrs_converter()
+
+@lru_cache(maxsize=None)
+def _get_shared_cattrs_converter() -> cattrs.Converter:
     c = cattrs.Converter()
 
     # Register UUID hooks to ensure lowercase serialization
@@ -106,3 +112,27 @@ def _get_cattrs_converter(destination_class: Type[T]) -> cattrs.Converter:
     c.register_structure_hook_factory(has, lambda cl: make_dict_structure_fn(cl, c, **make_overrides(cl)))
     c.register_unstructure_hook_factory(has, lambda cl: make_dict_unstructure_fn(cl, c, **make_overrides(cl)))
     return c
+
+def warmup() -> None:
+    """
+    Eagerly generates the structure and unstructure functions for every model in appstoreserverlibrary.models,
+    moving the code generation cost out of the first request. Calling this more than once has no further effect.
+    """
+    import appstoreserverlibrary.models as models_package
+    c = _get_shared_cattrs_converter()
+    for module_info in pkgutil.iter_modules(models_package.__path__):
+        module = importlib.import_module(f"{models_package.__name__}.{module_info.name}")
+        for value in vars(module).values():
+            if isinstance(value, type) and value.__module__ == module.__name__ and has(value):
+                _get_structure_hook(c, value)
+                _get_unstructure_hook(c, value)
+
+def _get_structure_hook(c: cattrs.Converter, cl: type) -> Callable:
+    if hasattr(c, 'get_structure_hook'):
+        return c.get_structure_hook(cl)
+    return c._structure_func.dispatch(cl)
+
+def _get_unstructure_hook(c: cattrs.Converter, cl: type) -> Callable:
+    if hasattr(c, 'get_unstructure_hook'):
+        return c.get_unstructure_hook(cl)
+    return c._unstructure_func.dispatch(cl)
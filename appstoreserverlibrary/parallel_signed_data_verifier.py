@@ -0,0 +1,120 @@
+# Copyright (c) 2025 Apple Inc. Licensed under MIT License.
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Union
+import os
+
+from .models.Environment import Environment
+from .models.JWSRenewalInfoDecodedPayload import JWSRenewalInfoDecodedPayload
+from .models.JWSTransactionDecodedPayload import JWSTransactionDecodedPayload
+from .signed_data_verifier import SignedDataVerifier, VerificationException
+
+_worker_signed_data_verifier: Optional[SignedDataVerifier] = None
+
+def _initialize_worker(root_certificates: List[bytes], enable_online_checks: bool, environment: Environment, bundle_id: str, app_apple_id: Optional[int], verifier_options: Dict[str, Any]):
+    global _worker_signed_data_verifier
+    _worker_signed_data_verifier = SignedDataVerifier(root_certificates, enable_online_checks, environment, bundle_id, app_apple_id, **verifier_options)
+
+def _verify_and_decode_signed_transactions(signed_transactions: List[str]) -> List[Union[JWSTransactionDecodedPayload, VerificationException]]:
+    return _worker_signed_data_verifier.verify_and_decode_signed_transactions(signed_transactions)
+
+def _verify_and_decode_renewal_infos(signed_renewal_infos: List[str]) -> List[Union[JWSRenewalInfoDecodedPayload, VerificationException]]:
+    return _worker_signed_data_verifier.verify_and_decode_renewal_infos(signed_renewal_infos)
+
+class ParallelSignedDataVerifier:
+    """
+    A class verifying and decoding large volumes of App Store signed data across a pool of worker processes.
+
+    Each worker process creates its own SignedDataVerifier, and keeps its certificate chain cache, for the lifetime of the pool.
+    Input is sent to the workers in chunks, and results are streamed back in input order, with a bounded number of chunks in flight.
+    """
+    def __init__(
+        self,
+        root_certificates: List[bytes],
+        enable_online_checks: bool,
+        environment: Environment,
+        bundle_id: str,
+        app_apple_id: Optional[int] = None,
+        workers: Optional[int] = None,
+        chunk_size: int = 1000,
+        max_pending_chunks: Optional[int] = None,
+        verifier_options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        :param root_certificates: The DER encoded Apple root certificates that signed data must chain to
+        :param enable_online_checks: Whether to check the revocation status of certificates using OCSP
+        :param environment: The environment of the signed data
+        :param bundle_id: The bundle identifier of the app
+        :param app_apple_id: The unique identifier of the app in the App Store, required in the Production environment
+        :param workers: The number of worker processes, defaulting to the number of CPUs
+        :param chunk_size: The number of signed values sent to a worker at once
+        :param max_pending_chunks: The maximum number of chunks submitted but not yet consumed, bounding memory use, defaulting to twice the number of workers
+        :param verifier_options: Additional picklable keyword arguments passed to the SignedDataVerifier of each worker
+        """
+        if environment == Environment.PRODUCTION and app_apple_id is None:
+            raise ValueError("appAppleId is required when the environment is Production")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        if max_pending_chunks is not None and max_pending_chunks < 1:
+            raise ValueError("max_pending_chunks must be at least 1")
+        self._workers = workers if workers is not None else os.cpu_count() or 1
+        self._chunk_size = chunk_size
+        self._max_pending_chunks = max_pending_chunks if max_pending_chunks is not None else 2 * self._workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._workers,
+            initializer=_initialize_worker,
+            initargs=(root_certificates, enable_online_checks, environment, bundle_id, app_apple_id, verifier_options or {}),
+        )
+
+    def verify_and_decode_signed_transactions(self, signed_transactions: Iterable[str]) -> Iterator[Union[JWSTransactionDecodedPayload, VerificationException]]:
+        """
+        Verifies and decodes signedTransaction values using the worker processes
+        See SignedDataVerifier.verify_and_decode_signed_transactions
+
+        :param signed_transactions: The signedTransaction fields, which are consumed lazily
+        :return: An iterator over, for each signedTransaction in order, the decoded transaction info or the VerificationException describing why it could not be verified
+        """
+        return self._verify_and_decode_many(signed_transactions, _verify_and_decode_signed_transactions)
+
+    def verify_and_decode_renewal_infos(self, signed_renewal_infos: Iterable[str]) -> Iterator[Union[JWSRenewalInfoDecodedPayload, VerificationException]]:
+        """
+        Verifies and decodes signedRenewalInfo values using the worker processes
+        See SignedDataVerifier.verify_and_decode_renewal_infos
+
+        :param signed_renewal_infos: The signedRenewalInfo fields, which are consumed lazily
+        :return: An iterator over, for each signedRenewalInfo in order, the decoded renewal info or the VerificationException describing why it could not be verified
+        """
+        return self._verify_and_decode_many(signed_renewal_infos, _verify_and_decode_renewal_infos)
+
+    def _verify_and_decode_many(self, signed_objs: Iterable[str], verify_chunk) -> Iterator[Any]:
+        signed_objs = iter(signed_objs)
+        pending_chunks: Deque[Future] = deque()
+        try:
+            while True:
+                while len(pending_chunks) < self._max_pending_chunks:
+                    chunk = list(islice(signed_objs, self._chunk_size))
+                    if not chunk:
+                        break
+                    pending_chunks.append(self._executor.submit(verify_chunk, chunk))
+                if not pending_chunks:
+                    return
+                yield from pending_chunks.popleft().result()
+        finally:
+            for pending_chunk in pending_chunks:
+                pending_chunk.cancel()
+
+    def close(self):
+        """
+        Shuts down the worker processes
+        """
+        self._executor.shutdown()
+
+    def __enter__(self) -> 'ParallelSignedDataVerifier':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,19 +1,31 @@
 # Copyright (c) 2023 Apple Inc. Licensed under MIT License.
 
-from typing import List, Optional, Dict
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterable, Sequence, List, Optional, Dict, Tuple, TypeVar, Union
 from base64 import b64decode
 from enum import IntEnum
+import asyncio
+import calendar
+import concurrent.futures
+import functools
 import time
 import datetime
+import json
+import threading
 
 import asn1
-import jwt
+from attr import define
 import requests
 from cryptography import x509
+from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric.ec import ECDSA
+from cryptography.hazmat.primitives.asymmetric.ec import ECDSA, EllipticCurvePublicKey
 from cryptography.hazmat.primitives.hashes import SHA1, SHA256
 from cryptography.x509 import ocsp, oid
+from jwt.algorithms import get_default_algorithms
+from jwt.exceptions import DecodeError, ExpiredSignatureError, ImmatureSignatureError, InvalidAudienceError, InvalidIssuedAtError
+from jwt.utils import base64url_decode
 from OpenSSL import crypto
 
 from appstoreserverlibrary.models.AppTransaction import AppTransaction
@@ -24,10 +36,223 @@ from .models.Environment import Environment
 from .models.ResponseBodyV2DecodedPayload import ResponseBodyV2DecodedPayload
 from .models.JWSTransactionDecodedPayload import JWSTransactionDecodedPayload
 from .models.JWSRenewalInfoDecodedPayload import JWSRenewalInfoDecodedPayload
+from .models.LastTransactionsItem import LastTransactionsItem
+from .models.Status import Status
+from .models.StatusResponse import StatusResponse
 
-class SignedDataVerifier:
+T = TypeVar('T')
+
+class VerificationStatus(IntEnum):
+    OK = 0
+    VERIFICATION_FAILURE = 1
+    INVALID_APP_IDENTIFIER = 2
+    INVALID_CERTIFICATE = 3
+    INVALID_CHAIN_LENGTH = 4
+    INVALID_CHAIN = 5
+    INVALID_ENVIRONMENT = 6
+    RETRYABLE_VERIFICATION_FAILURE = 7
+
+
+class VerificationException(Exception):
+    def __init__(self, status: VerificationStatus):
+        super().__init__("Verification failed with status " + status.name)
+        self.status = status
+
+    def __reduce__(self):
+        return (VerificationException, (self.status,))
+
+@define(frozen=True)
+class CacheStatistics:
     """
-    A class providing utility methods for verifying and decoding App Store signed data.
+    A point-in-time snapshot of the counters of a cache used by the SignedDataVerifier.
+    """
+
+    hits: int
+    """
+    The number of lookups that returned a cached value.
+    """
+
+    misses: int
+    """
+    The number of lookups that found no usable value, including expired entries.
+    """
+
+    evictions: int
+    """
+    The number of entries removed to keep the cache within its maximum size.
+    """
+
+    size: int
+    """
+    The number of entries currently held by the cache.
+    """
+
+    maximum_size: int
+    """
+    The maximum number of entries the cache holds.
+    """
+
+@define(frozen=True)
+class SubscriptionEntitlement:
+    """
+    The verified and decoded latest transaction and renewal info of one subscription in a StatusResponse.
+    """
+
+    subscription_group_identifier: Optional[str]
+    """
+    The identifier of the subscription group of the subscription.
+    """
+
+    original_transaction_id: Optional[str]
+    """
+    The original transaction identifier of the subscription.
+    """
+
+    status: Optional[Status]
+    """
+    The status of the subscription.
+    """
+
+    transaction: Optional[JWSTransactionDecodedPayload]
+    """
+    The decoded latest transaction of the subscription, or None if the response did not include it.
+    """
+
+    renewal_info: Optional[JWSRenewalInfoDecodedPayload]
+    """
+    The decoded renewal info of the subscription, or None if the response did not include it.
+    """
+
+    @property
+    def product_id(self) -> Optional[str]:
+        """
+        The product identifier of the latest transaction.
+        """
+        return self.transaction.productId if self.transaction is not None else None
+
+    @property
+    def expires_date(self) -> Optional[int]:
+        """
+        The UNIX time, in milliseconds, the latest transaction expires.
+        """
+        return self.transaction.expiresDate if self.transaction is not None else None
+
+_UNSET: Any = object()
+
+class LazySignedData(Generic[T]):
+    """
+    A signed value that is verified and decoded on first access, after which the decoded value is reused.
+    Safe to share between threads, which wait for a single verification on concurrent first accesses.
+    """
+    def __init__(self, signed_data: Optional[str], verify_and_decode: Callable[[str], T]):
+        self._signed_data = signed_data
+        self._verify_and_decode = verify_and_decode
+        self._decoded_value: T = _UNSET
+        self._lock = threading.Lock()
+
+    @property
+    def signed_data(self) -> Optional[str]:
+        """
+        The signed value, as received
+        """
+        return self._signed_data
+
+    def get(self) -> Optional[T]:
+        """
+        :return: The decoded value after verification, or None if there is no signed value
+        :throws VerificationException: Thrown if the data could not be verified, in which case the next access verifies it again
+        """
+        if self._signed_data is None:
+            return None
+        if self._decoded_value is _UNSET:
+            with self._lock:
+                if self._decoded_value is _UNSET:
+                    self._decoded_value = self._verify_and_decode(self._signed_data)
+        return self._decoded_value
+
+class LazySignedDataList(Sequence[T]):
+    """
+    A list of signed values, each verified and decoded when it is first accessed, after which the decoded value is reused.
+    """
+    def __init__(self, signed_data: Optional[List[str]], verify_and_decode: Callable[[str], T]):
+        self._items = [LazySignedData(signed_obj, verify_and_decode) for signed_obj in signed_data or []]
+
+    @property
+    def signed_data(self) -> List[str]:
+        """
+        The signed values, as received
+        """
+        return [item.signed_data for item in self._items]
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, List[T]]:
+        """
+        :throws VerificationException: Thrown if an accessed value could not be verified
+        """
+        if isinstance(index, slice):
+            return [item.get() for item in self._items[index]]
+        return self._items[index].get()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class AsyncLazySignedData(Generic[T]):
+    """
+    A signed value that is verified and decoded by an AsyncSignedDataVerifier on first access, after which the decoded value is reused.
+    Tasks of one event loop making concurrent first accesses wait for a single verification.
+    """
+    def __init__(self, signed_data: Optional[str], verify_and_decode: Callable[[str], Awaitable[T]]):
+        self._signed_data = signed_data
+        self._verify_and_decode = verify_and_decode
+        self._decoded_value: T = _UNSET
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def signed_data(self) -> Optional[str]:
+        """
+        The signed value, as received
+        """
+        return self._signed_data
+
+    async def get(self) -> Optional[T]:
+        """
+        :return: The decoded value after verification, or None if there is no signed value
+        :throws VerificationException: Thrown if the data could not be verified, in which case the next access verifies it again
+        """
+        if self._signed_data is None:
+            return None
+        if self._decoded_value is _UNSET:
+            if self._lock is None:
+                # Created on first use so that it belongs to the running event loop
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._decoded_value is _UNSET:
+                    self._decoded_value = await self._verify_and_decode(self._signed_data)
+        return self._decoded_value
+
+class AsyncLazySignedDataList(Sequence[AsyncLazySignedData[T]]):
+    """
+    A list of signed values, each verified and decoded by an AsyncSignedDataVerifier when it is first accessed.
+    As indexing cannot be awaited, items are AsyncLazySignedData values whose get method is awaited.
+    """
+    def __init__(self, signed_data: Optional[List[str]], verify_and_decode: Callable[[str], Awaitable[T]]):
+        self._items = [AsyncLazySignedData(signed_obj, verify_and_decode) for signed_obj in signed_data or []]
+
+    @property
+    def signed_data(self) -> List[str]:
+        """
+        The signed values, as received
+        """
+        return [item.signed_data for item in self._items]
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[AsyncLazySignedData[T], List[AsyncLazySignedData[T]]]:
+        return self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class BaseSignedDataVerifier:
+    """
+    The configuration and payload checks shared by SignedDataVerifier and AsyncSignedDataVerifier.
     """
     def __init__(
         self,
@@ -36,8 +261,41 @@ class SignedDataVerifier:
         environment: Environment,
         bundle_id: str,
         app_apple_id: Optional[int] = None,
+        chain_cache_size: Optional[int] = None,
+        chain_cache_time_limit: Optional[int] = None,
+        ocsp_response_cache: Optional['OCSPResponseCache'] = None,
+        ocsp_cache_time_limit: Optional[int] = None,
+        parallel_ocsp_checks: bool = False,
+        ocsp_session: Optional[Union[requests.Session, Callable[..., requests.Response]]] = None,
+        ocsp_timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        chain_cache_refresh_ahead: Optional[int] = None,
     ):
-        self._chain_verifier = _ChainVerifier(root_certificates)
+        """
+        :param root_certificates: The DER encoded Apple root certificates that signed data must chain to
+        :param enable_online_checks: Whether to check the revocation status of certificates using OCSP
+        :param environment: The environment of the signed data
+        :param bundle_id: The bundle identifier of the app
+        :param app_apple_id: The unique identifier of the app in the App Store, required in the Production environment
+        :param chain_cache_size: The maximum number of verified certificate chains kept in memory, defaulting to 32
+        :param chain_cache_time_limit: The number of seconds a chain verified with online checks is trusted before being verified again, defaulting to 15 minutes
+        :param ocsp_response_cache: Where validated OCSP responses are kept until their nextUpdate, defaulting to an InMemoryOCSPResponseCache
+        :param ocsp_cache_time_limit: The maximum number of seconds after its thisUpdate an OCSP response is cached, defaulting to 1 hour
+        :param parallel_ocsp_checks: Whether the intermediate and leaf certificates are checked with concurrent OCSP requests, failing on the first revoked or failed result
+        :param ocsp_session: The requests.Session used for OCSP requests, or a callable accepting the arguments of requests.post and returning a response with status_code and content, defaulting to a new pooled requests.Session
+        :param ocsp_timeout: The timeout of OCSP requests in seconds, or a (connect timeout, read timeout) tuple, defaulting to 30 seconds
+        :param chain_cache_refresh_ahead: When set, a chain used within this many seconds of its cache expiration is verified again, including online checks, on a background thread while the cached key keeps being served
+        """
+        self._chain_verifier = self._create_chain_verifier(
+            root_certificates,
+            cache_size=chain_cache_size if chain_cache_size is not None else _ChainVerifier.MAXIMUM_CACHE_SIZE,
+            cache_time_limit=chain_cache_time_limit if chain_cache_time_limit is not None else _ChainVerifier.CACHE_TIME_LIMIT,
+            ocsp_response_cache=ocsp_response_cache if ocsp_response_cache is not None else InMemoryOCSPResponseCache(),
+            ocsp_cache_time_limit=ocsp_cache_time_limit if ocsp_cache_time_limit is not None else _ChainVerifier.OCSP_CACHE_TIME_LIMIT,
+            parallel_ocsp_checks=parallel_ocsp_checks,
+            ocsp_session=ocsp_session,
+            ocsp_timeout=ocsp_timeout if ocsp_timeout is not None else _ChainVerifier.OCSP_TIMEOUT,
+            cache_refresh_ahead=chain_cache_refresh_ahead,
+        )
         self._environment = environment
         self._bundle_id = bundle_id
         self._app_apple_id = app_apple_id
@@ -45,38 +303,532 @@ class SignedDataVerifier:
         if environment == Environment.PRODUCTION and app_apple_id is None:
             raise ValueError("appAppleId is required when the environment is Production")
 
-    def verify_and_decode_renewal_info(self, signed_renewal_info: str) -> JWSRenewalInfoDecodedPayload:
+    def _create_chain_verifier(self, root_certificates: List[bytes], **kwargs) -> '_ChainVerifier':
+        return _ChainVerifier(root_certificates, **kwargs)
+
+    def get_chain_cache_statistics(self) -> CacheStatistics:
+        """
+        Returns the hit, miss and eviction counters of the verified certificate chain cache
+
+        :return: A snapshot of the statistics of the cache used for the configured online check mode
+        """
+        if self._enable_online_checks:
+            return self._chain_verifier.verified_certificates_cache.get_statistics()
+        return self._chain_verifier.offline_verified_certificates_cache.get_statistics()
+
+    def _structure_renewal_info(self, decoded_dict: dict) -> JWSRenewalInfoDecodedPayload:
+        decoded_renewal_info = _get_cattrs_converter(JWSRenewalInfoDecodedPayload).structure(decoded_dict, JWSRenewalInfoDecodedPayload)
+        if decoded_renewal_info.environment != self._environment:
+            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
+        return decoded_renewal_info
+
+    def _structure_signed_transaction(self, decoded_dict: dict) -> JWSTransactionDecodedPayload:
+        decoded_transaction_info = _get_cattrs_converter(JWSTransactionDecodedPayload).structure(decoded_dict, JWSTransactionDecodedPayload)
+        if decoded_transaction_info.bundleId != self._bundle_id:
+            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
+        if decoded_transaction_info.environment != self._environment:
+            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
+        return decoded_transaction_info
+
+    def _project_signed_transaction_claims(self, decoded_dict: dict, fields: Iterable[str]) -> Dict[str, Any]:
+        # The same checks as _structure_signed_transaction, made on the raw claims
+        if decoded_dict.get("bundleId") != self._bundle_id:
+            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
+        if decoded_dict.get("environment") != self._environment.value:
+            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
+        return {field: decoded_dict.get(field) for field in fields}
+
+    def _project_renewal_info_claims(self, decoded_dict: dict, fields: Iterable[str]) -> Dict[str, Any]:
+        if decoded_dict.get("environment") != self._environment.value:
+            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
+        return {field: decoded_dict.get(field) for field in fields}
+
+    def _structure_notification(self, decoded_dict: dict) -> ResponseBodyV2DecodedPayload:
+        decoded_signed_notification = _get_cattrs_converter(ResponseBodyV2DecodedPayload).structure(decoded_dict, ResponseBodyV2DecodedPayload)
+        bundle_id = None
+        app_apple_id = None
+        environment = None
+        if decoded_signed_notification.data:
+            bundle_id = decoded_signed_notification.data.bundleId
+            app_apple_id = decoded_signed_notification.data.appAppleId
+            environment = decoded_signed_notification.data.environment
+        elif decoded_signed_notification.summary:
+            bundle_id = decoded_signed_notification.summary.bundleId
+            app_apple_id = decoded_signed_notification.summary.appAppleId
+            environment = decoded_signed_notification.summary.environment
+        elif decoded_signed_notification.externalPurchaseToken:
+            bundle_id = decoded_signed_notification.externalPurchaseToken.bundleId
+            app_apple_id = decoded_signed_notification.externalPurchaseToken.appAppleId
+            if decoded_signed_notification.externalPurchaseToken.externalPurchaseId and decoded_signed_notification.externalPurchaseToken.externalPurchaseId.startswith("SANDBOX"):
+                environment = Environment.SANDBOX
+            else:
+                environment = Environment.PRODUCTION
+        elif decoded_signed_notification.appData:
+            bundle_id = decoded_signed_notification.appData.bundleId
+            app_apple_id = decoded_signed_notification.appData.appAppleId
+            environment = decoded_signed_notification.appData.environment
+        self._verify_notification(bundle_id, app_apple_id, environment)
+        return decoded_signed_notification
+
+    def _verify_notification(self, bundle_id: Optional[str], app_apple_id: Optional[int], environment: Optional[Environment]):
+        if bundle_id != self._bundle_id or (self._environment == Environment.PRODUCTION and app_apple_id != self._app_apple_id):
+            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
+        if environment != self._environment:
+            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
+
+    def _structure_app_transaction(self, decoded_dict: dict) -> AppTransaction:
+        decoded_app_transaction = _get_cattrs_converter(AppTransaction).structure(decoded_dict, AppTransaction)
+        environment = decoded_app_transaction.receiptType
+        if decoded_app_transaction.bundleId != self._bundle_id or (self._environment == Environment.PRODUCTION and decoded_app_transaction.appAppleId != self._app_apple_id):
+            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
+        if environment != self._environment:
+            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
+        return decoded_app_transaction
+
+    def _structure_realtime_request(self, decoded_dict: dict) -> DecodedRealtimeRequestBody:
+        decoded_realtime_request = _get_cattrs_converter(DecodedRealtimeRequestBody).structure(decoded_dict, DecodedRealtimeRequestBody)
+        if self._environment == Environment.PRODUCTION and decoded_realtime_request.appAppleId != self._app_apple_id:
+            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
+        if decoded_realtime_request.environment != self._environment:
+            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
+        return decoded_realtime_request
+
+    def _skips_verification(self) -> bool:
+        # Data is not signed by the App Store, and verification should be skipped
+        # The environment MUST be checked in the public method calling this
+        return self._environment == Environment.XCODE or self._environment == Environment.LOCAL_TESTING
+
+    def _get_chain_and_effective_date(self, header: dict, payload: dict) -> Tuple[List[str], float]:
+        x5c_header: List[str] = header.get("x5c")
+        if x5c_header is None or len(x5c_header) == 0:
+            raise Exception("x5c claim was empty")
+        algorithm_header: str = header.get("alg")
+        if algorithm_header is None or "ES256" != algorithm_header:
+            raise Exception("Algorithm was not ES256")
+        signed_date = payload.get('signedDate') if payload.get('signedDate') is not None else payload.get('receiptCreationDate')
+        effective_date = time.time() if self._enable_online_checks or signed_date is None else int(signed_date) // 1000
+        return x5c_header, effective_date
+
+    def _get_signing_key_date(self, effective_date: float) -> Optional[float]:
+        # With online checks the effective date is the current time, so one verification covers a whole group
+        return None if self._enable_online_checks else effective_date
+
+    def _group_signed_objects_by_chain(self, signed_objs: List[str], results: List[Union[dict, VerificationException, None]]) -> Dict[Tuple[str, ...], List[Tuple[int, Tuple[bytes, dict, dict, bytes], float]]]:
+        """
+        Parses signed data and groups it by certificate chain, so each distinct chain is verified once
+
+        :param results: Receives, at the index of each item, the payload of data that skips verification or the exception raised while parsing it
+        :return: The index, parsed object and effective date of the items to verify, by certificate chain
+        """
+        items_by_chain: Dict[Tuple[str, ...], List[Tuple[int, Tuple[bytes, dict, dict, bytes], float]]] = {}
+        for index, signed_obj in enumerate(signed_objs):
+            try:
+                parsed_obj = _parse_signed_object(signed_obj)
+                if self._skips_verification():
+                    results[index] = parsed_obj[2]
+                    continue
+                x5c_header, effective_date = self._get_chain_and_effective_date(parsed_obj[1], parsed_obj[2])
+                items_by_chain.setdefault(tuple(x5c_header), []).append((index, parsed_obj, effective_date))
+            except Exception as e:
+                results[index] = _as_verification_exception(e)
+        return items_by_chain
+
+    @staticmethod
+    def _get_status_response_signed_data(status_response: StatusResponse) -> Tuple[List[Tuple[Optional[str], LastTransactionsItem]], List[str]]:
+        """
+        :return: Each last transaction item with its subscription group identifier, and the signed transactions and renewal infos they include
+        """
+        last_transactions = [(subscription_group.subscriptionGroupIdentifier, last_transaction) for subscription_group in status_response.data or [] for last_transaction in subscription_group.lastTransactions or []]
+        signed_data = [signed_obj for _, last_transaction in last_transactions for signed_obj in (last_transaction.signedTransactionInfo, last_transaction.signedRenewalInfo) if signed_obj is not None]
+        return last_transactions, signed_data
+
+    def _build_subscription_entitlements(self, last_transactions: List[Tuple[Optional[str], LastTransactionsItem]], decoded_signed_data: List[Union[dict, VerificationException]]) -> List[SubscriptionEntitlement]:
+        decoded_dicts = iter(decoded_signed_data)
+        def structure(signed_obj: Optional[str], structure_decoded: Callable[[dict], T]) -> Optional[T]:
+            if signed_obj is None:
+                return None
+            decoded_dict = next(decoded_dicts)
+            if isinstance(decoded_dict, VerificationException):
+                raise decoded_dict
+            try:
+                return structure_decoded(decoded_dict)
+            except Exception as e:
+                raise _as_verification_exception(e)
+        return [
+            SubscriptionEntitlement(
+                subscription_group_identifier=subscription_group_identifier,
+                original_transaction_id=last_transaction.originalTransactionId,
+                status=last_transaction.status,
+                transaction=structure(last_transaction.signedTransactionInfo, self._structure_signed_transaction),
+                renewal_info=structure(last_transaction.signedRenewalInfo, self._structure_renewal_info),
+            )
+            for subscription_group_identifier, last_transaction in last_transactions
+        ]
+
+class SignedDataVerifier(BaseSignedDataVerifier):
+    """
+    A class providing utility methods for verifying and decoding App Store signed data.
+    """
+    def verify_and_decode_renewal_info(self, signed_renewal_info: str) -> JWSRenewalInfoDecodedPayload:
+        """
+        Verifies and decodes a signedRenewalInfo obtained from the App Store Server API, an App Store Server Notification, or from a device
+        See https://developer.apple.com/documentation/appstoreserverapi/jwsrenewalinfo
+
+        :param signed_renewal_info: The signedRenewalInfo field
+        :return: The decoded renewal info after verification
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._structure_renewal_info(self._decode_signed_object(signed_renewal_info))
+
+    def verify_and_decode_renewal_infos(self, signed_renewal_infos: List[str]) -> List[Union[JWSRenewalInfoDecodedPayload, VerificationException]]:
+        """
+        Verifies and decodes many signedRenewalInfo values, verifying each distinct certificate chain once
+
+        :param signed_renewal_infos: The signedRenewalInfo fields
+        :return: For each signedRenewalInfo, in order, the decoded renewal info after verification, or the VerificationException describing why it could not be verified
+        """
+        return self._verify_and_decode_many(signed_renewal_infos, self._structure_renewal_info)
+
+    def verify_and_decode_signed_transaction(self, signed_transaction: str) -> JWSTransactionDecodedPayload:
+        """
+        Verifies and decodes a signedTransaction obtained from the App Store Server API, an App Store Server Notification, or from a device
+        See https://developer.apple.com/documentation/appstoreserverapi/jwstransaction
+
+        :param signed_transaction: The signedTransaction field
+        :return: The decoded transaction info after verification
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._structure_signed_transaction(self._decode_signed_object(signed_transaction))
+
+    def verify_and_decode_signed_transaction_claims(self, signed_transaction: str, fields: Iterable[str]) -> Dict[str, Any]:
+        """
+        Verifies a signedTransaction like verify_and_decode_signed_transaction, returning only the requested claims without building a JWSTransactionDecodedPayload
+        See https://developer.apple.com/documentation/appstoreserverapi/jwstransactiondecodedpayload
+
+        :param signed_transaction: The signedTransaction field
+        :param fields: The names of the claims to return, such as transactionId, productId, expiresDate and revocationDate
+        :return: Each requested claim, as its raw JSON value, or None when the claim is absent
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._project_signed_transaction_claims(self._decode_signed_object(signed_transaction), fields)
+
+    def verify_and_decode_renewal_info_claims(self, signed_renewal_info: str, fields: Iterable[str]) -> Dict[str, Any]:
+        """
+        Verifies a signedRenewalInfo like verify_and_decode_renewal_info, returning only the requested claims without building a JWSRenewalInfoDecodedPayload
+        See https://developer.apple.com/documentation/appstoreserverapi/jwsrenewalinfodecodedpayload
+
+        :param signed_renewal_info: The signedRenewalInfo field
+        :param fields: The names of the claims to return, such as autoRenewStatus and renewalDate
+        :return: Each requested claim, as its raw JSON value, or None when the claim is absent
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._project_renewal_info_claims(self._decode_signed_object(signed_renewal_info), fields)
+
+    def verify_and_decode_signed_transactions(self, signed_transactions: List[str]) -> List[Union[JWSTransactionDecodedPayload, VerificationException]]:
+        """
+        Verifies and decodes many signedTransaction values, such as a page of HistoryResponse.signedTransactions, verifying each distinct certificate chain once
+
+        :param signed_transactions: The signedTransaction fields
+        :return: For each signedTransaction, in order, the decoded transaction info after verification, or the VerificationException describing why it could not be verified
+        """
+        return self._verify_and_decode_many(signed_transactions, self._structure_signed_transaction)
+
+    def verify_and_decode_status_response(self, status_response: StatusResponse) -> List[SubscriptionEntitlement]:
+        """
+        Verifies and decodes every signedTransactionInfo and signedRenewalInfo of a response from Get All Subscription Statuses, verifying each distinct certificate chain once
+        See https://developer.apple.com/documentation/appstoreserverapi/statusresponse
+
+        :param status_response: The response of get_all_subscription_statuses
+        :return: The decoded latest transaction and renewal info of each subscription, in the order of the response
+        :throws VerificationException: Thrown if any of the signed data could not be verified
+        """
+        last_transactions, signed_data = self._get_status_response_signed_data(status_response)
+        return self._build_subscription_entitlements(last_transactions, self._decode_signed_objects(signed_data))
+
+    def lazy_verify_and_decode_signed_transaction(self, signed_transaction: Optional[str]) -> LazySignedData[JWSTransactionDecodedPayload]:
+        """
+        Defers verify_and_decode_signed_transaction until the value is first read, such as for Data.signedTransactionInfo or LastTransactionsItem.signedTransactionInfo
+
+        :param signed_transaction: The signedTransaction field
+        :return: A LazySignedData whose get method returns the decoded transaction info after verification
+        """
+        return LazySignedData(signed_transaction, self.verify_and_decode_signed_transaction)
+
+    def lazy_verify_and_decode_signed_transactions(self, signed_transactions: Optional[List[str]]) -> LazySignedDataList[JWSTransactionDecodedPayload]:
+        """
+        Defers verify_and_decode_signed_transaction for each item until it is first read, such as for HistoryResponse.signedTransactions or RefundHistoryResponse.signedTransactions
+
+        :param signed_transactions: The signedTransaction fields
+        :return: A LazySignedDataList of the decoded transaction infos after verification
+        """
+        return LazySignedDataList(signed_transactions, self.verify_and_decode_signed_transaction)
+
+    def lazy_verify_and_decode_renewal_info(self, signed_renewal_info: Optional[str]) -> LazySignedData[JWSRenewalInfoDecodedPayload]:
+        """
+        Defers verify_and_decode_renewal_info until the value is first read, such as for Data.signedRenewalInfo or LastTransactionsItem.signedRenewalInfo
+
+        :param signed_renewal_info: The signedRenewalInfo field
+        :return: A LazySignedData whose get method returns the decoded renewal info after verification
+        """
+        return LazySignedData(signed_renewal_info, self.verify_and_decode_renewal_info)
+
+    def lazy_verify_and_decode_renewal_infos(self, signed_renewal_infos: Optional[List[str]]) -> LazySignedDataList[JWSRenewalInfoDecodedPayload]:
+        """
+        Defers verify_and_decode_renewal_info for each item until it is first read
+
+        :param signed_renewal_infos: The signedRenewalInfo fields
+        :return: A LazySignedDataList of the decoded renewal infos after verification
+        """
+        return LazySignedDataList(signed_renewal_infos, self.verify_and_decode_renewal_info)
+
+    def verify_and_decode_notification(self, signed_payload: str) -> ResponseBodyV2DecodedPayload:
+        """
+        Verifies and decodes an App Store Server Notification signedPayload
+        See https://developer.apple.com/documentation/appstoreservernotifications/signedpayload
+
+        :param signedPayload: The payload received by your server
+        :return: The decoded payload after verification
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._structure_notification(self._decode_signed_object(signed_payload))
+
+    def verify_and_decode_app_transaction(self, signed_app_transaction: str) -> AppTransaction:
+        """
+        Verifies and decodes a signed AppTransaction
+        See https://developer.apple.com/documentation/storekit/apptransaction
+
+        :param signed_app_transaction: The signed AppTransaction
+        :return: The decoded AppTransaction after validation
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._structure_app_transaction(self._decode_signed_object(signed_app_transaction))
+
+    def verify_and_decode_realtime_request(self, signed_payload: str) -> DecodedRealtimeRequestBody:
+        """
+        Verifies and decodes a Retention Messaging API signedPayload
+        See https://developer.apple.com/documentation/retentionmessaging/signedpayload
+
+        :param signedPayload: The payload received by your server
+        :return: The decoded payload after verification
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._structure_realtime_request(self._decode_signed_object(signed_payload))
+
+    def _verify_and_decode_many(self, signed_objs: List[str], structure: Callable[[dict], T]) -> List[Union[T, VerificationException]]:
+        results = []
+        for decoded_dict in self._decode_signed_objects(signed_objs):
+            if isinstance(decoded_dict, VerificationException):
+                results.append(decoded_dict)
+                continue
+            try:
+                results.append(structure(decoded_dict))
+            except Exception as e:
+                results.append(_as_verification_exception(e))
+        return results
+
+    def _decode_signed_object(self, signed_obj: str) -> dict:
+        try:
+            signing_input, header, payload, signature = _parse_signed_object(signed_obj)
+            if self._skips_verification():
+                return payload
+            x5c_header, effective_date = self._get_chain_and_effective_date(header, payload)
+            signing_key = self._chain_verifier.verify_chain(x5c_header, self._enable_online_checks, effective_date)
+            _verify_signature(signing_input, signature, signing_key)
+            _validate_registered_claims(payload)
+            return payload
+        except Exception as e:
+            raise _as_verification_exception(e)
+
+    def _decode_signed_objects(self, signed_objs: List[str]) -> List[Union[dict, VerificationException]]:
+        results: List[Union[dict, VerificationException, None]] = [None] * len(signed_objs)
+        for certificates, items in self._group_signed_objects_by_chain(signed_objs, results).items():
+            signing_keys: Dict[Optional[float], Union[EllipticCurvePublicKey, VerificationException]] = {}
+            for index, parsed_obj, effective_date in items:
+                signing_key_date = self._get_signing_key_date(effective_date)
+                if signing_key_date not in signing_keys:
+                    try:
+                        signing_keys[signing_key_date] = self._chain_verifier.verify_chain(list(certificates), self._enable_online_checks, effective_date)
+                    except Exception as e:
+                        signing_keys[signing_key_date] = _as_verification_exception(e)
+                results[index] = _verify_parsed_signature(parsed_obj, signing_keys[signing_key_date])
+        return results
+
+class AsyncSignedDataVerifier(BaseSignedDataVerifier):
+    """
+    A class providing utility methods for verifying and decoding App Store signed data without blocking the event loop.
+    """
+    def __init__(
+        self,
+        root_certificates: List[bytes],
+        enable_online_checks: bool,
+        environment: Environment,
+        bundle_id: str,
+        app_apple_id: Optional[int] = None,
+        chain_cache_size: Optional[int] = None,
+        chain_cache_time_limit: Optional[int] = None,
+        ocsp_response_cache: Optional['OCSPResponseCache'] = None,
+        ocsp_cache_time_limit: Optional[int] = None,
+        parallel_ocsp_checks: bool = False,
+        ocsp_timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        chain_cache_refresh_ahead: Optional[int] = None,
+        http_client: Optional['httpx.AsyncClient'] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ):
+        """
+        Accepts the parameters of SignedDataVerifier, except ocsp_session, and:
+
+        :param http_client: The httpx.AsyncClient used for OCSP requests, such as the http_client of an AsyncAppStoreServerAPIClient to share its connection pool, defaulting to a new client closed by async_close
+        :param executor: When set, certificate chain and signature verification run in this executor instead of on the event loop
+        """
+        if http_client is None:
+            try:
+                import httpx
+                http_client = httpx.AsyncClient()
+            except:
+                raise ModuleNotFoundError("httpx not found but attempting to instantiate an async verifier")
+            self._owns_http_client = True
+        else:
+            self._owns_http_client = False
+        self._http_client = http_client
+        self._executor = executor
+        super().__init__(
+            root_certificates=root_certificates,
+            enable_online_checks=enable_online_checks,
+            environment=environment,
+            bundle_id=bundle_id,
+            app_apple_id=app_apple_id,
+            chain_cache_size=chain_cache_size,
+            chain_cache_time_limit=chain_cache_time_limit,
+            ocsp_response_cache=ocsp_response_cache,
+            ocsp_cache_time_limit=ocsp_cache_time_limit,
+            parallel_ocsp_checks=parallel_ocsp_checks,
+            ocsp_timeout=ocsp_timeout,
+            chain_cache_refresh_ahead=chain_cache_refresh_ahead,
+        )
+
+    def _create_chain_verifier(self, root_certificates: List[bytes], **kwargs) -> '_AsyncChainVerifier':
+        return _AsyncChainVerifier(root_certificates, http_client=self._http_client, executor=self._executor, **kwargs)
+
+    async def async_close(self):
+        """
+        Closes the httpx.AsyncClient created by this verifier. A client passed as http_client is left open.
+        """
+        if self._owns_http_client:
+            await self._http_client.aclose()
+
+    async def verify_and_decode_renewal_info(self, signed_renewal_info: str) -> JWSRenewalInfoDecodedPayload:
+        """
+        Verifies and decodes a signedRenewalInfo obtained from the App Store Server API, an App Store Server Notification, or from a device
+        See https://developer.apple.com/documentation/appstoreserverapi/jwsrenewalinfo
+
+        :param signed_renewal_info: The signedRenewalInfo field
+        :return: The decoded renewal info after verification
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._structure_renewal_info(await self._decode_signed_object(signed_renewal_info))
+
+    async def verify_and_decode_renewal_infos(self, signed_renewal_infos: List[str]) -> List[Union[JWSRenewalInfoDecodedPayload, VerificationException]]:
+        """
+        Verifies and decodes many signedRenewalInfo values, verifying each distinct certificate chain once
+
+        :param signed_renewal_infos: The signedRenewalInfo fields
+        :return: For each signedRenewalInfo, in order, the decoded renewal info after verification, or the VerificationException describing why it could not be verified
+        """
+        return await self._verify_and_decode_many(signed_renewal_infos, self._structure_renewal_info)
+
+    async def verify_and_decode_signed_transaction(self, signed_transaction: str) -> JWSTransactionDecodedPayload:
+        """
+        Verifies and decodes a signedTransaction obtained from the App Store Server API, an App Store Server Notification, or from a device
+        See https://developer.apple.com/documentation/appstoreserverapi/jwstransaction
+
+        :param signed_transaction: The signedTransaction field
+        :return: The decoded transaction info after verification
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._structure_signed_transaction(await self._decode_signed_object(signed_transaction))
+
+    async def verify_and_decode_signed_transaction_claims(self, signed_transaction: str, fields: Iterable[str]) -> Dict[str, Any]:
         """
-        Verifies and decodes a signedRenewalInfo obtained from the App Store Server API, an App Store Server Notification, or from a device
-        See https://developer.apple.com/documentation/appstoreserverapi/jwsrenewalinfo
+        Verifies a signedTransaction like verify_and_decode_signed_transaction, returning only the requested claims without building a JWSTransactionDecodedPayload
+        See https://developer.apple.com/documentation/appstoreserverapi/jwstransactiondecodedpayload
+
+        :param signed_transaction: The signedTransaction field
+        :param fields: The names of the claims to return, such as transactionId, productId, expiresDate and revocationDate
+        :return: Each requested claim, as its raw JSON value, or None when the claim is absent
+        :throws VerificationException: Thrown if the data could not be verified
+        """
+        return self._project_signed_transaction_claims(await self._decode_signed_object(signed_transaction), fields)
+
+    async def verify_and_decode_renewal_info_claims(self, signed_renewal_info: str, fields: Iterable[str]) -> Dict[str, Any]:
+        """
+        Verifies a signedRenewalInfo like verify_and_decode_renewal_info, returning only the requested claims without building a JWSRenewalInfoDecodedPayload
+        See https://developer.apple.com/documentation/appstoreserverapi/jwsrenewalinfodecodedpayload
 
         :param signed_renewal_info: The signedRenewalInfo field
-        :return: The decoded renewal info after verification
+        :param fields: The names of the claims to return, such as autoRenewStatus and renewalDate
+        :return: Each requested claim, as its raw JSON value, or None when the claim is absent
         :throws VerificationException: Thrown if the data could not be verified
         """
-        
-        decoded_renewal_info = _get_cattrs_converter(JWSRenewalInfoDecodedPayload).structure(self._decode_signed_object(signed_renewal_info), JWSRenewalInfoDecodedPayload)
-        if decoded_renewal_info.environment != self._environment:
-            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
-        return decoded_renewal_info
+        return self._project_renewal_info_claims(await self._decode_signed_object(signed_renewal_info), fields)
 
-    def verify_and_decode_signed_transaction(self, signed_transaction: str) -> JWSTransactionDecodedPayload:
+    async def verify_and_decode_signed_transactions(self, signed_transactions: List[str]) -> List[Union[JWSTransactionDecodedPayload, VerificationException]]:
         """
-        Verifies and decodes a signedTransaction obtained from the App Store Server API, an App Store Server Notification, or from a device
-        See https://developer.apple.com/documentation/appstoreserverapi/jwstransaction
+        Verifies and decodes many signedTransaction values, such as a page of HistoryResponse.signedTransactions, verifying each distinct certificate chain once
+
+        :param signed_transactions: The signedTransaction fields
+        :return: For each signedTransaction, in order, the decoded transaction info after verification, or the VerificationException describing why it could not be verified
+        """
+        return await self._verify_and_decode_many(signed_transactions, self._structure_signed_transaction)
+
+    async def verify_and_decode_status_response(self, status_response: StatusResponse) -> List[SubscriptionEntitlement]:
+        """
+        Verifies and decodes every signedTransactionInfo and signedRenewalInfo of a response from Get All Subscription Statuses, verifying each distinct certificate chain once
+        See https://developer.apple.com/documentation/appstoreserverapi/statusresponse
+
+        :param status_response: The response of get_all_subscription_statuses
+        :return: The decoded latest transaction and renewal info of each subscription, in the order of the response
+        :throws VerificationException: Thrown if any of the signed data could not be verified
+        """
+        last_transactions, signed_data = self._get_status_response_signed_data(status_response)
+        return self._build_subscription_entitlements(last_transactions, await self._decode_signed_objects(signed_data))
+
+    def lazy_verify_and_decode_signed_transaction(self, signed_transaction: Optional[str]) -> AsyncLazySignedData[JWSTransactionDecodedPayload]:
+        """
+        Defers verify_and_decode_signed_transaction until the value is first read, such as for Data.signedTransactionInfo or LastTransactionsItem.signedTransactionInfo
 
         :param signed_transaction: The signedTransaction field
-        :return: The decoded transaction info after verification
-        :throws VerificationException: Thrown if the data could not be verified
+        :return: An AsyncLazySignedData whose get method returns the decoded transaction info after verification
         """
-        decoded_transaction_info = _get_cattrs_converter(JWSTransactionDecodedPayload).structure(self._decode_signed_object(signed_transaction), JWSTransactionDecodedPayload)
-        if decoded_transaction_info.bundleId != self._bundle_id:
-            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
-        if decoded_transaction_info.environment != self._environment:
-            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
-        return decoded_transaction_info
+        return AsyncLazySignedData(signed_transaction, self.verify_and_decode_signed_transaction)
 
-    def verify_and_decode_notification(self, signed_payload: str) -> ResponseBodyV2DecodedPayload:
+    def lazy_verify_and_decode_signed_transactions(self, signed_transactions: Optional[List[str]]) -> AsyncLazySignedDataList[JWSTransactionDecodedPayload]:
+        """
+        Defers verify_and_decode_signed_transaction for each item until it is first read, such as for HistoryResponse.signedTransactions or RefundHistoryResponse.signedTransactions
+
+        :param signed_transactions: The signedTransaction fields
+        :return: An AsyncLazySignedDataList of the transaction infos, each decoded after verification by its get method
+        """
+        return AsyncLazySignedDataList(signed_transactions, self.verify_and_decode_signed_transaction)
+
+    def lazy_verify_and_decode_renewal_info(self, signed_renewal_info: Optional[str]) -> AsyncLazySignedData[JWSRenewalInfoDecodedPayload]:
+        """
+        Defers verify_and_decode_renewal_info until the value is first read, such as for Data.signedRenewalInfo or LastTransactionsItem.signedRenewalInfo
+
+        :param signed_renewal_info: The signedRenewalInfo field
+        :return: An AsyncLazySignedData whose get method returns the decoded renewal info after verification
+        """
+        return AsyncLazySignedData(signed_renewal_info, self.verify_and_decode_renewal_info)
+
+    def lazy_verify_and_decode_renewal_infos(self, signed_renewal_infos: Optional[List[str]]) -> AsyncLazySignedDataList[JWSRenewalInfoDecodedPayload]:
+        """
+        Defers verify_and_decode_renewal_info for each item until it is first read
+
+        :param signed_renewal_infos: The signedRenewalInfo fields
+        :return: An AsyncLazySignedDataList of the renewal infos, each decoded after verification by its get method
+        """
+        return AsyncLazySignedDataList(signed_renewal_infos, self.verify_and_decode_renewal_info)
+
+    async def verify_and_decode_notification(self, signed_payload: str) -> ResponseBodyV2DecodedPayload:
         """
         Verifies and decodes an App Store Server Notification signedPayload
         See https://developer.apple.com/documentation/appstoreservernotifications/signedpayload
@@ -85,40 +837,9 @@ class SignedDataVerifier:
         :return: The decoded payload after verification
         :throws VerificationException: Thrown if the data could not be verified
         """
-        decoded_dict = self._decode_signed_object(signed_payload)
-        decoded_signed_notification = _get_cattrs_converter(ResponseBodyV2DecodedPayload).structure(decoded_dict, ResponseBodyV2DecodedPayload)
-        bundle_id = None
-        app_apple_id = None
-        environment = None
-        if decoded_signed_notification.data:
-            bundle_id = decoded_signed_notification.data.bundleId
-            app_apple_id = decoded_signed_notification.data.appAppleId
-            environment = decoded_signed_notification.data.environment
-        elif decoded_signed_notification.summary:
-            bundle_id = decoded_signed_notification.summary.bundleId
-            app_apple_id = decoded_signed_notification.summary.appAppleId
-            environment = decoded_signed_notification.summary.environment
-        elif decoded_signed_notification.externalPurchaseToken:
-            bundle_id = decoded_signed_notification.externalPurchaseToken.bundleId
-            app_apple_id = decoded_signed_notification.externalPurchaseToken.appAppleId
-            if decoded_signed_notification.externalPurchaseToken.externalPurchaseId and decoded_signed_notification.externalPurchaseToken.externalPurchaseId.startswith("SANDBOX"):
-                environment = Environment.SANDBOX
-            else:
-                environment = Environment.PRODUCTION
-        elif decoded_signed_notification.appData:
-            bundle_id = decoded_signed_notification.appData.bundleId
-            app_apple_id = decoded_signed_notification.appData.appAppleId
-            environment = decoded_signed_notification.appData.environment
-        self._verify_notification(bundle_id, app_apple_id, environment)
-        return decoded_signed_notification
-
-    def _verify_notification(self, bundle_id: Optional[str], app_apple_id: Optional[int], environment: Optional[Environment]):
-        if bundle_id != self._bundle_id or (self._environment == Environment.PRODUCTION and app_apple_id != self._app_apple_id):
-            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
-        if environment != self._environment:
-            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
+        return self._structure_notification(await self._decode_signed_object(signed_payload))
 
-    def verify_and_decode_app_transaction(self, signed_app_transaction: str) -> AppTransaction:
+    async def verify_and_decode_app_transaction(self, signed_app_transaction: str) -> AppTransaction:
         """
         Verifies and decodes a signed AppTransaction
         See https://developer.apple.com/documentation/storekit/apptransaction
@@ -127,16 +848,9 @@ class SignedDataVerifier:
         :return: The decoded AppTransaction after validation
         :throws VerificationException: Thrown if the data could not be verified
         """
-        decoded_dict = self._decode_signed_object(signed_app_transaction)
-        decoded_app_transaction = _get_cattrs_converter(AppTransaction).structure(decoded_dict, AppTransaction)
-        environment = decoded_app_transaction.receiptType
-        if decoded_app_transaction.bundleId != self._bundle_id or (self._environment == Environment.PRODUCTION and decoded_app_transaction.appAppleId != self._app_apple_id):
-            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
-        if environment != self._environment:
-            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
-        return decoded_app_transaction
+        return self._structure_app_transaction(await self._decode_signed_object(signed_app_transaction))
 
-    def verify_and_decode_realtime_request(self, signed_payload: str) -> DecodedRealtimeRequestBody:
+    async def verify_and_decode_realtime_request(self, signed_payload: str) -> DecodedRealtimeRequestBody:
         """
         Verifies and decodes a Retention Messaging API signedPayload
         See https://developer.apple.com/documentation/retentionmessaging/signedpayload
@@ -145,65 +859,216 @@ class SignedDataVerifier:
         :return: The decoded payload after verification
         :throws VerificationException: Thrown if the data could not be verified
         """
-        decoded_dict = self._decode_signed_object(signed_payload)
-        decoded_realtime_request = _get_cattrs_converter(DecodedRealtimeRequestBody).structure(decoded_dict, DecodedRealtimeRequestBody)
-        if self._environment == Environment.PRODUCTION and decoded_realtime_request.appAppleId != self._app_apple_id:
-            raise VerificationException(VerificationStatus.INVALID_APP_IDENTIFIER)
-        if decoded_realtime_request.environment != self._environment:
-            raise VerificationException(VerificationStatus.INVALID_ENVIRONMENT)
-        return decoded_realtime_request
+        return self._structure_realtime_request(await self._decode_signed_object(signed_payload))
 
-    def _decode_signed_object(self, signed_obj: str) -> dict:
+    async def _verify_and_decode_many(self, signed_objs: List[str], structure: Callable[[dict], T]) -> List[Union[T, VerificationException]]:
+        results = []
+        for decoded_dict in await self._decode_signed_objects(signed_objs):
+            if isinstance(decoded_dict, VerificationException):
+                results.append(decoded_dict)
+                continue
+            try:
+                results.append(structure(decoded_dict))
+            except Exception as e:
+                results.append(_as_verification_exception(e))
+        return results
+
+    async def _decode_signed_object(self, signed_obj: str) -> dict:
         try:
-            decoded_jwt = jwt.decode(signed_obj, options={"verify_signature": False})
-            if self._environment == Environment.XCODE or self._environment == Environment.LOCAL_TESTING:
-                # Data is not signed by the App Store, and verification should be skipped
-                # The environment MUST be checked in the public method calling this
-                return decoded_jwt
-            unverified_headers: dict = jwt.get_unverified_header(signed_obj)
-            x5c_header: List[str] = unverified_headers.get("x5c")
-            if x5c_header is None or len(x5c_header) == 0:
-                raise Exception("x5c claim was empty")
-            algorithm_header: str = unverified_headers.get("alg")
-            if algorithm_header is None or "ES256" != algorithm_header:
-                raise Exception("Algorithm was not ES256")
-            signed_date = decoded_jwt.get('signedDate') if decoded_jwt.get('signedDate') is not None else decoded_jwt.get('receiptCreationDate')
-            effective_date = time.time() if self._enable_online_checks or signed_date is None else int(signed_date) // 1000
-            signing_key = self._chain_verifier.verify_chain(x5c_header, self._enable_online_checks, effective_date)
-            return jwt.decode(signed_obj, signing_key, algorithms=["ES256"])
-        except VerificationException as e:
-            raise e
+            signing_input, header, payload, signature = _parse_signed_object(signed_obj)
+            if self._skips_verification():
+                return payload
+            x5c_header, effective_date = self._get_chain_and_effective_date(header, payload)
+            signing_key = await self._chain_verifier.verify_chain_async(x5c_header, self._enable_online_checks, effective_date)
+            await self._chain_verifier.run(_verify_signature, signing_input, signature, signing_key)
+            _validate_registered_claims(payload)
+            return payload
         except Exception as e:
-            raise VerificationException(VerificationStatus.VERIFICATION_FAILURE) from e
+            raise _as_verification_exception(e)
+
+    async def _decode_signed_objects(self, signed_objs: List[str]) -> List[Union[dict, VerificationException]]:
+        results: List[Union[dict, VerificationException, None]] = [None] * len(signed_objs)
+        for certificates, items in self._group_signed_objects_by_chain(signed_objs, results).items():
+            signing_keys: Dict[Optional[float], Union[EllipticCurvePublicKey, VerificationException]] = {}
+            for index, parsed_obj, effective_date in items:
+                signing_key_date = self._get_signing_key_date(effective_date)
+                if signing_key_date not in signing_keys:
+                    try:
+                        signing_keys[signing_key_date] = await self._chain_verifier.verify_chain_async(list(certificates), self._enable_online_checks, effective_date)
+                    except Exception as e:
+                        signing_keys[signing_key_date] = _as_verification_exception(e)
+            # Signatures are checked in a single executor call rather than one per item
+            verified_items = await self._chain_verifier.run(
+                lambda: [(index, _verify_parsed_signature(parsed_obj, signing_keys[self._get_signing_key_date(effective_date)])) for index, parsed_obj, effective_date in items]
+            )
+            for index, result in verified_items:
+                results[index] = result
+        return results
+
+_ES256 = get_default_algorithms()["ES256"]
+
+def _verify_signature(signing_input: bytes, signature: bytes, signing_key: EllipticCurvePublicKey):
+    if not _ES256.verify(signing_input, signing_key, signature):
+        raise Exception("Signature verification failed")
+
+def _verify_parsed_signature(parsed_obj: Tuple[bytes, dict, dict, bytes], signing_key: Union[EllipticCurvePublicKey, VerificationException]) -> Union[dict, VerificationException]:
+    if isinstance(signing_key, VerificationException):
+        return signing_key
+    signing_input, _, payload, signature = parsed_obj
+    try:
+        _verify_signature(signing_input, signature, signing_key)
+        _validate_registered_claims(payload)
+        return payload
+    except Exception as e:
+        return _as_verification_exception(e)
+
+def _validate_registered_claims(payload: dict):
+    """
+    Applies the registered claim checks jwt.decode performs on a verified token with its default options:
+    exp, nbf and iat must be integers, exp must be in the future, nbf and iat must not be in the future,
+    and an aud claim is rejected because no audience is expected
+    """
+    now = time.time()
+    try:
+        iat = int(payload["iat"]) if "iat" in payload else None
+    except (ValueError, TypeError, OverflowError):
+        raise InvalidIssuedAtError("Issued At claim (iat) must be an integer.") from None
+    if iat is not None and iat > now:
+        raise ImmatureSignatureError("The token is not yet valid (iat)")
+    try:
+        nbf = int(payload["nbf"]) if "nbf" in payload else None
+        exp = int(payload["exp"]) if "exp" in payload else None
+    except (ValueError, TypeError, OverflowError):
+        raise DecodeError("Expiration Time (exp) and Not Before (nbf) claims must be integers.") from None
+    if nbf is not None and nbf > now:
+        raise ImmatureSignatureError("The token is not yet valid (nbf)")
+    if exp is not None and exp <= now:
+        raise ExpiredSignatureError("Signature has expired")
+    if payload.get("aud"):
+        raise InvalidAudienceError("Invalid audience")
+
+def _as_verification_exception(e: Exception) -> VerificationException:
+    if isinstance(e, VerificationException):
+        return e
+    verification_exception = VerificationException(VerificationStatus.VERIFICATION_FAILURE)
+    verification_exception.__cause__ = e
+    return verification_exception
+
+def _parse_signed_object(signed_obj: str) -> Tuple[bytes, dict, dict, bytes]:
+    """
+    Splits a compact JWS once, decoding the header, payload and signature a single time.
+    Registered claims are not checked here, see _validate_registered_claims
+
+    :return: The signing input, the header, the payload and the raw signature
+    """
+    signing_input, _, encoded_signature = signed_obj.encode("utf-8").rpartition(b".")
+    encoded_header, _, encoded_payload = signing_input.partition(b".")
+    if not encoded_payload or b"." in encoded_payload:
+        raise Exception("Not enough or too many segments")
+    header = json.loads(base64url_decode(encoded_header))
+    payload = json.loads(base64url_decode(encoded_payload))
+    if not isinstance(header, dict) or not isinstance(payload, dict):
+        raise Exception("Header and payload must be JSON objects")
+    return signing_input, header, payload, base64url_decode(encoded_signature)
+
+_ocsp_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_ocsp_executor_lock = threading.Lock()
+
+def _get_ocsp_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Returns the thread pool for concurrent OCSP checks, created on first use and shared by all chain verifiers
+    so that short-lived verifiers do not each leave idle worker threads behind
+    """
+    global _ocsp_executor
+    with _ocsp_executor_lock:
+        if _ocsp_executor is None:
+            _ocsp_executor = concurrent.futures.ThreadPoolExecutor(max_workers=_ChainVerifier.OCSP_WORKERS, thread_name_prefix="ocsp")
+        return _ocsp_executor
 
 class _ChainVerifier:
     MAXIMUM_CACHE_SIZE = 32 # There are unlikely to be more than a couple keys at once
     CACHE_TIME_LIMIT = 15 * 60 # 15 minutes
+    OCSP_CACHE_TIME_LIMIT = 60 * 60 # 1 hour, unless the response's nextUpdate is sooner
+    OCSP_TIMEOUT = 30 # seconds
+    OCSP_WORKERS = 8 # Shared by all verifiers running OCSP checks concurrently
 
-    def __init__(self, root_certificates: List[bytes], enable_strict_checks=True):
+    def __init__(self, root_certificates: List[bytes], enable_strict_checks=True, cache_size: int = MAXIMUM_CACHE_SIZE, cache_time_limit: int = CACHE_TIME_LIMIT, ocsp_response_cache: Optional['OCSPResponseCache'] = None, ocsp_cache_time_limit: int = OCSP_CACHE_TIME_LIMIT, parallel_ocsp_checks: bool = False, ocsp_session: Optional[Union[requests.Session, Callable[..., requests.Response]]] = None, ocsp_timeout: Union[float, Tuple[float, float]] = OCSP_TIMEOUT, cache_refresh_ahead: Optional[int] = None):
         self.enable_strict_checks = enable_strict_checks
         self.root_certificates = root_certificates
-        self.verified_certificates_cache: Dict[tuple[str, ...], (str, int)] = {}
+        self.cache_time_limit = cache_time_limit
+        self.ocsp_response_cache = ocsp_response_cache
+        self.ocsp_cache_time_limit = ocsp_cache_time_limit
+        self.ocsp_session = ocsp_session
+        self._ocsp_session_lock = threading.Lock()
+        self.ocsp_timeout = ocsp_timeout
+        self.parallel_ocsp_checks = parallel_ocsp_checks
+        self._trusted_root_certificates = _ChainVerifier._load_trusted_root_certificates(root_certificates)
+        self.verified_certificates_cache = _LRUCache(cache_size)
+        self._in_flight_verifications = _SingleFlight()
+        self.cache_refresh_ahead = cache_refresh_ahead
+        self._refresh_lock = threading.Lock()
+        self._refreshing = set()
+        self.offline_verified_certificates_cache = _LRUCache(cache_size)
+
+    @staticmethod
+    def _load_trusted_root_certificates(root_certificates: List[bytes]) -> Optional[Tuple[crypto.X509, ...]]:
+        # Parsed once so that each verification only needs to load the leaf and intermediate.
+        # A malformed root is reported as INVALID_CERTIFICATE when a chain is verified.
+        try:
+            return tuple(crypto.load_certificate(crypto.FILETYPE_ASN1, trusted_cert_bytes) for trusted_cert_bytes in root_certificates)
+        except Exception:
+            return None
 
-    def verify_chain(self, certificates: List[str], perform_online_checks: bool, effective_date: int) -> str:
-        if perform_online_checks and len(certificates) > 0:
+    def verify_chain(self, certificates: List[str], perform_online_checks: bool, effective_date: int) -> EllipticCurvePublicKey:
+        if not perform_online_checks:
+            return self._verify_chain_offline(certificates, effective_date)
+        if len(certificates) > 0:
             cached_public_key = self.get_cached_public_key(certificates)
             if cached_public_key is not None:
                 return cached_public_key
-        verified_public_key = self._verify_chain_without_caching(certificates=certificates, perform_online_checks=perform_online_checks, effective_date=effective_date)
-        if perform_online_checks:
-            self.put_verified_public_key(certificates, verified_public_key)
+        # Concurrent callers missing the cache for the same chain wait for a single verification
+        return self._in_flight_verifications.do(tuple(certificates), lambda: self._verify_chain_online(certificates, effective_date))
+
+    def _verify_chain_online(self, certificates: List[str], effective_date: int) -> EllipticCurvePublicKey:
+        verified_public_key = self._verify_chain_without_caching(certificates=certificates, perform_online_checks=True, effective_date=effective_date)
+        self.put_verified_public_key(certificates, verified_public_key)
         return verified_public_key
-    
-    def _verify_chain_without_caching(self, certificates: List[str], perform_online_checks: bool, effective_date: int) -> str:
+
+    def _verify_chain_offline(self, certificates: List[str], effective_date: int) -> EllipticCurvePublicKey:
+        cached_public_key = self.get_offline_cached_public_key(certificates, effective_date)
+        if cached_public_key is not None:
+            return cached_public_key
+        verified_public_key, not_before, not_after = self._verify_chain_and_validity_window(certificates=certificates, perform_online_checks=False, effective_date=effective_date)
+        self.put_offline_verified_public_key(certificates, verified_public_key, not_before, not_after)
+        return verified_public_key
+
+    def _verify_chain_without_caching(self, certificates: List[str], perform_online_checks: bool, effective_date: int) -> EllipticCurvePublicKey:
+        return self._verify_chain_and_validity_window(certificates=certificates, perform_online_checks=perform_online_checks, effective_date=effective_date)[0]
+
+    def _verify_chain_and_validity_window(self, certificates: List[str], perform_online_checks: bool, effective_date: int) -> Tuple[EllipticCurvePublicKey, int, int]:
+        """
+        :return: The leaf public key, and the notBefore and notAfter of the verified chain, as seconds since the epoch, between which the chain verifies successfully
+        """
+        trusted_chain = self._verify_certificate_path(certificates, effective_date)
+        if perform_online_checks:
+            self._check_ocsp_statuses(trusted_chain)
+        return _ChainVerifier._get_public_key_and_validity_window(trusted_chain)
+
+    def _verify_certificate_path(self, certificates: List[str], effective_date: int) -> List[crypto.X509]:
+        """
+        Verifies the chain up to a trusted root at the effective date, without revocation checks
+
+        :return: The verified chain, from the leaf to the root
+        """
         if len(self.root_certificates) == 0:
             raise VerificationException(VerificationStatus.INVALID_CERTIFICATE)
         if len(certificates) != 3:
             raise VerificationException(VerificationStatus.INVALID_CHAIN_LENGTH)
+        if self._trusted_root_certificates is None:
+            raise VerificationException(VerificationStatus.INVALID_CERTIFICATE)
         trusted_store = crypto.X509Store()
         try:
-            for trusted_cert_bytes in self.root_certificates:
-                trusted_cert = crypto.load_certificate(crypto.FILETYPE_ASN1, trusted_cert_bytes)
+            for trusted_cert in self._trusted_root_certificates:
                 trusted_store.add_cert(trusted_cert)
             if self.enable_strict_checks:
                 trusted_store.set_flags(crypto.X509StoreFlags.X509_STRICT)
@@ -221,151 +1086,504 @@ class _ChainVerifier:
             raise VerificationException(VerificationStatus.VERIFICATION_FAILURE) from e
         self.check_oid(trusted_chain[0].to_cryptography(), "1.2.840.113635.100.6.11.1")
         self.check_oid(trusted_chain[1].to_cryptography(), "1.2.840.113635.100.6.2.1")
-        if perform_online_checks:
-            self.check_ocsp_status(trusted_chain[1], trusted_chain[2], trusted_chain[2])
-            self.check_ocsp_status(trusted_chain[0], trusted_chain[1], trusted_chain[2])
+        return trusted_chain
+
+    @staticmethod
+    def _get_public_key_and_validity_window(trusted_chain: List[crypto.X509]) -> Tuple[EllipticCurvePublicKey, int, int]:
         return (
-            leaf_cert.to_cryptography()
-            .public_key()
-            .public_bytes(encoding=serialization.Encoding.PEM, format=serialization.PublicFormat.SubjectPublicKeyInfo)
-            .decode()
+            trusted_chain[0].to_cryptography().public_key(),
+            max(_ChainVerifier._parse_asn1_time(cert.get_notBefore()) for cert in trusted_chain),
+            min(_ChainVerifier._parse_asn1_time(cert.get_notAfter()) for cert in trusted_chain),
         )
 
+    @staticmethod
+    def _parse_asn1_time(asn1_time: bytes) -> int:
+        return calendar.timegm(time.strptime(asn1_time.decode("ascii"), "%Y%m%d%H%M%SZ"))
+
     def check_oid(self, cert: x509.Certificate, oid: str):
         try:
             cert.extensions.get_extension_for_oid(x509.ObjectIdentifier(oid))
         except Exception as e:
             raise VerificationException(VerificationStatus.VERIFICATION_FAILURE) from e
 
+    @staticmethod
+    def _get_ocsp_checks(trusted_chain: List[crypto.X509]) -> List[Tuple[crypto.X509, crypto.X509, crypto.X509]]:
+        """
+        :return: The certificate, issuer and root of each OCSP check of a verified chain
+        """
+        return [
+            (trusted_chain[1], trusted_chain[2], trusted_chain[2]),
+            (trusted_chain[0], trusted_chain[1], trusted_chain[2]),
+        ]
+
+    def _check_ocsp_statuses(self, trusted_chain: List[crypto.X509]):
+        ocsp_checks = _ChainVerifier._get_ocsp_checks(trusted_chain)
+        if not self.parallel_ocsp_checks:
+            for cert, issuer, root in ocsp_checks:
+                self.check_ocsp_status(cert, issuer, root)
+            return
+        ocsp_executor = _get_ocsp_executor()
+        futures = [ocsp_executor.submit(self.check_ocsp_status, cert, issuer, root) for cert, issuer, root in ocsp_checks]
+        done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+        for future in futures:
+            if future in done and future.exception() is not None:
+                # Fail fast, the remaining check is abandoned
+                for other_future in futures:
+                    other_future.cancel()
+                raise future.exception()
+        for future in futures:
+            future.result()
+
     def check_ocsp_status(self, cert: crypto.X509, issuer: crypto.X509, root: crypto.X509):
+        req, cache_key = self._build_ocsp_request(cert, issuer)
+        if self._has_cached_ocsp_response(cert, issuer, root, cache_key):
+            return
+        for url in self._get_ocsp_urls(cert):
+            try:
+                r = self._get_ocsp_post()(
+                    url,
+                    headers={"Content-Type": "application/ocsp-request"},
+                    data=req.public_bytes(serialization.Encoding.DER),
+                    timeout=self.ocsp_timeout,
+                )
+            except (requests.exceptions.RequestException, OSError) as e:
+                raise VerificationException(VerificationStatus.RETRYABLE_VERIFICATION_FAILURE) from e
+            if self._accept_ocsp_response(cert, issuer, root, cache_key, r.status_code, r.content):
+                return
+
+        raise VerificationException(VerificationStatus.VERIFICATION_FAILURE)
+
+    def _get_ocsp_post(self) -> Callable[..., requests.Response]:
+        if self.ocsp_session is None:
+            # Created on first use, as the async chain verifier makes its OCSP requests with httpx instead
+            with self._ocsp_session_lock:
+                if self.ocsp_session is None:
+                    self.ocsp_session = requests.Session()
+        # A session's post method is used, other transports are called like requests.post
+        return self.ocsp_session.post if hasattr(self.ocsp_session, "post") else self.ocsp_session
+
+    def _build_ocsp_request(self, cert: crypto.X509, issuer: crypto.X509) -> Tuple[ocsp.OCSPRequest, str]:
+        """
+        :return: The OCSP request for the certificate, and the key of its response in the OCSP response cache
+        """
         builder = ocsp.OCSPRequestBuilder()
         builder = builder.add_certificate(cert.to_cryptography(), issuer.to_cryptography(), SHA256())
         req = builder.build()
+        return req, req.issuer_key_hash.hex() + ":" + str(req.serial_number)
+
+    def _has_cached_ocsp_response(self, cert: crypto.X509, issuer: crypto.X509, root: crypto.X509, cache_key: str) -> bool:
+        if self.ocsp_response_cache is None:
+            return False
+        cached_response = self.ocsp_response_cache.get(cache_key)
+        if cached_response is None:
+            return False
+        try:
+            # Cached responses are validated again, as the cache may be shared with other processes
+            single_response = self._validate_ocsp_response(cert, issuer, root, cached_response)
+        except (ValueError, VerificationException, InvalidSignature, crypto.X509StoreContextError, x509.ExtensionNotFound, asn1.Error):
+            return False
+        return single_response is not None and self._get_ocsp_cache_expiration(single_response) > time.time()
+
+    def _get_ocsp_urls(self, cert: crypto.X509) -> List[str]:
         authority_values = (
             cert.to_cryptography()
             .extensions.get_extension_for_oid(x509.oid.ExtensionOID.AUTHORITY_INFORMATION_ACCESS)
             .value
         )
-        ocsps = [val for val in authority_values if val.access_method == x509.oid.AuthorityInformationAccessOID.OCSP]
-        for o in ocsps:
+        return [val.access_location.value for val in authority_values if val.access_method == x509.oid.AuthorityInformationAccessOID.OCSP]
+
+    def _accept_ocsp_response(self, cert: crypto.X509, issuer: crypto.X509, root: crypto.X509, cache_key: str, status_code: int, content: bytes) -> bool:
+        """
+        :return: Whether the response reports the certificate as good, in which case it is cached
+        """
+        if status_code != 200:
+            raise VerificationException(VerificationStatus.RETRYABLE_VERIFICATION_FAILURE)
+        single_response = self._validate_ocsp_response(cert, issuer, root, content)
+        if single_response is None:
+            return False
+        self._put_ocsp_response(cache_key, content, single_response)
+        return True
+
+    def _validate_ocsp_response(self, cert: crypto.X509, issuer: crypto.X509, root: crypto.X509, ocsp_response_bytes: bytes) -> Optional[ocsp.OCSPSingleResponse]:
+        """
+        :return: The single response reporting the certificate as good, or None if the response does not contain one
+        """
+        ocsp_resp = ocsp.load_der_ocsp_response(ocsp_response_bytes)
+        if ocsp_resp.response_status != ocsp.OCSPResponseStatus.SUCCESSFUL:
+            return None
+        certs = [issuer]
+        for ocsp_cert in ocsp_resp.certificates:
+            certs.append(crypto.X509.from_cryptography(ocsp_cert))
+        # Find signing cert
+        signing_cert = None
+        for potential_signing_cert in certs:
+            if ocsp_resp.responder_key_hash:
+                subject_public_key_info = (
+                    potential_signing_cert.get_pubkey()
+                    .to_cryptography_key()
+                    .public_bytes(
+                        encoding=serialization.Encoding.DER,
+                        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+                    )
+                )
+                decoder = asn1.Decoder()
+                decoder.start(subject_public_key_info)
+                decoder.enter()
+                decoder.read()
+                _, value = decoder.read()
+                digest = hashes.Hash(SHA1())
+                digest.update(value)
+                if digest.finalize() == ocsp_resp.responder_key_hash:
+                    signing_cert = potential_signing_cert
+                    break
+
+            elif ocsp_resp.responder_name:
+                if ocsp_resp.responder_name == potential_signing_cert.subject.rfc4514_string():
+                    signing_cert = potential_signing_cert
+                    break
+        if signing_cert is None:
+            raise VerificationException(VerificationStatus.VERIFICATION_FAILURE)
+
+        if signing_cert.to_cryptography().public_bytes(
+            encoding=serialization.Encoding.DER
+        ) == issuer.to_cryptography().public_bytes(encoding=serialization.Encoding.DER):
+            # We trust this because it is the issuer
+            pass
+        else:
+            trusted_store = crypto.X509Store()
+            trusted_store.add_cert(issuer)
+            trusted_store.add_cert(root)  # Apparently a full chain is always needed
+            verification_context = crypto.X509StoreContext(trusted_store, signing_cert, [])
+            verification_context.verify_certificate()
+            if (
+                oid.ExtendedKeyUsageOID.OCSP_SIGNING
+                not in signing_cert.to_cryptography()
+                .extensions.get_extension_for_class(x509.ExtendedKeyUsage)
+                .value._usages
+            ):
+                raise VerificationException(VerificationStatus.VERIFICATION_FAILURE)
+
+        # Confirm response is signed by signing_certificate
+        signing_cert.to_cryptography().public_key().verify(
+            ocsp_resp.signature, ocsp_resp.tbs_response_bytes, ECDSA(ocsp_resp.signature_hash_algorithm)
+        )
+
+        # Get the CertId
+        for single_response in ocsp_resp.responses:
+            # Get the cert ID with the provided hashing algorithm (using the request builder wrapper)
+            builder = ocsp.OCSPRequestBuilder()
+            builder = builder.add_certificate(
+                cert.to_cryptography(), issuer.to_cryptography(), single_response.hash_algorithm
+            )
+            req = builder.build()
+            if (
+                single_response.certificate_status == ocsp.OCSPCertStatus.GOOD
+                and single_response.serial_number == req.serial_number
+                and single_response.issuer_key_hash == req.issuer_key_hash
+                and single_response.issuer_name_hash == req.issuer_name_hash
+            ):
+                return single_response
+        return None
+
+    def _get_ocsp_response_expiration(self, single_response: ocsp.OCSPSingleResponse) -> float:
+        next_update = single_response.next_update_utc if hasattr(single_response, "next_update_utc") else single_response.next_update
+        if next_update is None:
+            # The responder may have newer information available at any time
+            return 0
+        if next_update.tzinfo is None:
+            next_update = next_update.replace(tzinfo=datetime.timezone.utc)
+        return next_update.timestamp()
+
+    def _get_ocsp_cache_expiration(self, single_response: ocsp.OCSPSingleResponse) -> float:
+        """
+        The time limit is counted from the response's thisUpdate rather than from when it was cached,
+        so that it also applies to responses read back from a cache shared with other verifiers
+        """
+        this_update = single_response.this_update_utc if hasattr(single_response, "this_update_utc") else single_response.this_update
+        if this_update.tzinfo is None:
+            this_update = this_update.replace(tzinfo=datetime.timezone.utc)
+        return min(self._get_ocsp_response_expiration(single_response), this_update.timestamp() + self.ocsp_cache_time_limit)
+
+    def _put_ocsp_response(self, cache_key: str, ocsp_response_bytes: bytes, single_response: ocsp.OCSPSingleResponse):
+        if self.ocsp_response_cache is None:
+            return
+        expiration = self._get_ocsp_cache_expiration(single_response)
+        if expiration > time.time():
+            self.ocsp_response_cache.put(cache_key, ocsp_response_bytes, expiration)
+
+    def get_cached_public_key(self, certificates: List[str]) -> Optional[EllipticCurvePublicKey]:
+        verified_public_key, cache_expiration = self.verified_certificates_cache.get_with_expiration(tuple(certificates))
+        if verified_public_key is not None and self.cache_refresh_ahead is not None and cache_expiration - time.time() <= self.cache_refresh_ahead:
+            self._refresh_in_background(certificates)
+        return verified_public_key
+
+    def _refresh_in_background(self, certificates: List[str]):
+        key = tuple(certificates)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._in_flight_verifications.do(key, lambda: self._verify_chain_online(certificates, time.time()))
+            except Exception:
+                # The cached key stays in use until it expires, after which a failure is raised to the caller
+                pass
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="chain-cache-refresh", daemon=True).start()
+
+    def put_verified_public_key(self, certificates: List[str], verified_public_key: EllipticCurvePublicKey):
+        cache_expiration = time.time() + self.cache_time_limit
+        self.verified_certificates_cache.put(tuple(certificates), verified_public_key, cache_expiration)
+
+    def get_offline_cached_public_key(self, certificates: List[str], effective_date: int) -> Optional[EllipticCurvePublicKey]:
+        # Without online checks the outcome only depends on the effective date, so any date inside the validity window of the chain is served
+        verified_public_key = self.offline_verified_certificates_cache.get(tuple(certificates), lambda v: v[1] <= effective_date <= v[2])
+        if verified_public_key is None:
+            return None
+        return verified_public_key[0]
+
+    def put_offline_verified_public_key(self, certificates: List[str], verified_public_key: EllipticCurvePublicKey, not_before: int, not_after: int):
+        self.offline_verified_certificates_cache.put(tuple(certificates), (verified_public_key, not_before, not_after))
+
+class _AsyncChainVerifier(_ChainVerifier):
+    """
+    A _ChainVerifier whose online checks use an httpx.AsyncClient, sharing the caches and validation of the blocking implementation
+    """
+    def __init__(self, root_certificates: List[bytes], http_client: 'httpx.AsyncClient', executor: Optional[concurrent.futures.Executor] = None, parallel_ocsp_checks: bool = False, **kwargs):
+        # OCSP checks run concurrently on the event loop rather than in the shared thread pool
+        super().__init__(root_certificates, parallel_ocsp_checks=False, **kwargs)
+        self.http_client = http_client
+        self.executor = executor
+        self.parallel_async_ocsp_checks = parallel_ocsp_checks
+        self._async_in_flight_verifications = _AsyncSingleFlight()
+        self._refresh_tasks = set()
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        """
+        Runs CPU bound work in the configured executor, or inline when there is none
+        """
+        if self.executor is None:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(function, *args))
+
+    async def verify_chain_async(self, certificates: List[str], perform_online_checks: bool, effective_date: int) -> EllipticCurvePublicKey:
+        if not perform_online_checks:
+            return await self.run(self._verify_chain_offline, certificates, effective_date)
+        if len(certificates) > 0:
+            cached_public_key = self.get_cached_public_key(certificates)
+            if cached_public_key is not None:
+                return cached_public_key
+        # Concurrent tasks missing the cache for the same chain wait for a single verification
+        return await self._async_in_flight_verifications.do(tuple(certificates), lambda: self._verify_chain_online_async(certificates, effective_date))
+
+    async def _verify_chain_online_async(self, certificates: List[str], effective_date: int) -> EllipticCurvePublicKey:
+        trusted_chain = await self.run(self._verify_certificate_path, certificates, effective_date)
+        await self._check_ocsp_statuses_async(trusted_chain)
+        verified_public_key = _ChainVerifier._get_public_key_and_validity_window(trusted_chain)[0]
+        self.put_verified_public_key(certificates, verified_public_key)
+        return verified_public_key
+
+    async def _check_ocsp_statuses_async(self, trusted_chain: List[crypto.X509]):
+        ocsp_checks = _ChainVerifier._get_ocsp_checks(trusted_chain)
+        if not self.parallel_async_ocsp_checks:
+            for cert, issuer, root in ocsp_checks:
+                await self.check_ocsp_status_async(cert, issuer, root)
+            return
+        tasks = [asyncio.ensure_future(self.check_ocsp_status_async(cert, issuer, root)) for cert, issuer, root in ocsp_checks]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            # Fail fast, the remaining check is abandoned
+            for task in tasks:
+                task.cancel()
+        for task in tasks:
+            if task in done and task.exception() is not None:
+                raise task.exception()
+
+    async def check_ocsp_status_async(self, cert: crypto.X509, issuer: crypto.X509, root: crypto.X509):
+        import httpx
+        req, cache_key = self._build_ocsp_request(cert, issuer)
+        if await self.run(self._has_cached_ocsp_response, cert, issuer, root, cache_key):
+            return
+        for url in self._get_ocsp_urls(cert):
             try:
-                r = requests.post(
-                    o.access_location.value,
+                r = await self.http_client.post(
+                    url,
                     headers={"Content-Type": "application/ocsp-request"},
-                    data=req.public_bytes(serialization.Encoding.DER),
-                    timeout=30,
+                    content=req.public_bytes(serialization.Encoding.DER),
+                    timeout=self._get_httpx_timeout(),
                 )
-            except (requests.exceptions.RequestException, OSError) as e:
+            except (httpx.HTTPError, OSError) as e:
                 raise VerificationException(VerificationStatus.RETRYABLE_VERIFICATION_FAILURE) from e
-            if r.status_code != 200:
-                raise VerificationException(VerificationStatus.RETRYABLE_VERIFICATION_FAILURE)
+            if await self.run(self._accept_ocsp_response, cert, issuer, root, cache_key, r.status_code, r.content):
+                return
+
+        raise VerificationException(VerificationStatus.VERIFICATION_FAILURE)
+
+    def _get_httpx_timeout(self) -> 'httpx.Timeout':
+        import httpx
+        if isinstance(self.ocsp_timeout, tuple):
+            connect_timeout, read_timeout = self.ocsp_timeout
+            return httpx.Timeout(read_timeout, connect=connect_timeout)
+        return httpx.Timeout(self.ocsp_timeout)
+
+    def _refresh_in_background(self, certificates: List[str]):
+        key = tuple(certificates)
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await self._async_in_flight_verifications.do(key, lambda: self._verify_chain_online_async(certificates, time.time()))
+            except Exception:
+                # The cached key stays in use until it expires, after which a failure is raised to the caller
+                pass
+            finally:
+                self._refreshing.discard(key)
+
+        # A reference is kept so the task is not garbage collected before it completes
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+class OCSPResponseCache(ABC):
+    """
+    A store for validated OCSP responses, which can be implemented to share responses between processes.
+
+    Responses are keyed by the issuer key hash and serial number of the certificate they cover. Responses read from
+    the cache are validated again before being trusted.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        :param key: The issuer key hash and serial number of the certificate
+        :return: The DER encoded OCSP response, or None if no unexpired response is stored
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key: str, ocsp_response: bytes, expiration: float):
+        """
+        :param key: The issuer key hash and serial number of the certificate
+        :param ocsp_response: The DER encoded OCSP response
+        :param expiration: The time, in seconds since the epoch, after which the response must no longer be returned
+        """
+        raise NotImplementedError
+
+class InMemoryOCSPResponseCache(OCSPResponseCache):
+    """
+    An OCSPResponseCache holding responses in the memory of the current process.
+    """
+    def __init__(self, maximum_size: int = 64):
+        self._cache = _LRUCache(maximum_size)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def put(self, key: str, ocsp_response: bytes, expiration: float):
+        self._cache.put(key, ocsp_response, expiration)
+
+class _SingleFlight:
+    """
+    Deduplicates concurrent calls sharing a key, so only one is executed while the other callers wait for its outcome.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, concurrent.futures.Future] = {}
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                is_leader = False
             else:
-                ocsp_resp = ocsp.load_der_ocsp_response(r.content)
-                if ocsp_resp.response_status == ocsp.OCSPResponseStatus.SUCCESSFUL:
-                    certs = [issuer]
-                    for ocsp_cert in ocsp_resp.certificates:
-                        certs.append(crypto.X509.from_cryptography(ocsp_cert))
-                    # Find signing cert
-                    signing_cert = None
-                    for potential_signing_cert in certs:
-                        if ocsp_resp.responder_key_hash:
-                            subject_public_key_info = (
-                                potential_signing_cert.get_pubkey()
-                                .to_cryptography_key()
-                                .public_bytes(
-                                    encoding=serialization.Encoding.DER,
-                                    format=serialization.PublicFormat.SubjectPublicKeyInfo,
-                                )
-                            )
-                            decoder = asn1.Decoder()
-                            decoder.start(subject_public_key_info)
-                            decoder.enter()
-                            decoder.read()
-                            _, value = decoder.read()
-                            digest = hashes.Hash(SHA1())
-                            digest.update(value)
-                            if digest.finalize() == ocsp_resp.responder_key_hash:
-                                signing_cert = potential_signing_cert
-                                break
-
-                        elif ocsp_resp.responder_name:
-                            if ocsp_resp.responder_name == potential_signing_cert.subject.rfc4514_string():
-                                signing_cert = potential_signing_cert
-                                break
-                    if signing_cert is None:
-                        raise VerificationException(VerificationStatus.VERIFICATION_FAILURE)
-
-                    if signing_cert.to_cryptography().public_bytes(
-                        encoding=serialization.Encoding.DER
-                    ) == issuer.to_cryptography().public_bytes(encoding=serialization.Encoding.DER):
-                        # We trust this because it is the issuer
-                        pass
-                    else:
-                        trusted_store = crypto.X509Store()
-                        trusted_store.add_cert(issuer)
-                        trusted_store.add_cert(root)  # Apparently a full chain is always needed
-                        verification_context = crypto.X509StoreContext(trusted_store, signing_cert, [])
-                        verification_context.verify_certificate()
-                        if (
-                            oid.ExtendedKeyUsageOID.OCSP_SIGNING
-                            not in signing_cert.to_cryptography()
-                            .extensions.get_extension_for_class(x509.ExtendedKeyUsage)
-                            .value._usages
-                        ):
-                            raise VerificationException(VerificationStatus.VERIFICATION_FAILURE)
-
-                    # Confirm response is signed by signing_certificate
-                    signing_cert.to_cryptography().public_key().verify(
-                        ocsp_resp.signature, ocsp_resp.tbs_response_bytes, ECDSA(ocsp_resp.signature_hash_algorithm)
-                    )
+                is_leader = True
+                call = concurrent.futures.Future()
+                self._calls[key] = call
+        if not is_leader:
+            return call.result()
+        try:
+            result = function()
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
 
-                    # Get the CertId
-                    for single_response in ocsp_resp.responses:
-                        # Get the cert ID with the provided hashing algorithm (using the request builder wrapper)
-                        builder = ocsp.OCSPRequestBuilder()
-                        builder = builder.add_certificate(
-                            cert.to_cryptography(), issuer.to_cryptography(), single_response.hash_algorithm
-                        )
-                        req = builder.build()
-                        if (
-                            single_response.certificate_status == ocsp.OCSPCertStatus.GOOD
-                            and single_response.serial_number == req.serial_number
-                            and single_response.issuer_key_hash == req.issuer_key_hash
-                            and single_response.issuer_name_hash == req.issuer_name_hash
-                        ):
-                            # Success
-                            return
+class _AsyncSingleFlight:
+    """
+    Runs a coroutine once for all concurrent tasks requesting the same key, sharing its result or exception
+    """
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
 
-        raise VerificationException(VerificationStatus.VERIFICATION_FAILURE)
-    
-    def get_cached_public_key(self, certificates: List[str]) -> Optional[str]:
-        verified_public_key = self.verified_certificates_cache.get(tuple(certificates))
-        if verified_public_key is None:
-            return None
-        if verified_public_key[1] <= time.time():
-            return None
-        return verified_public_key[0]
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(function())
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(functools.partial(self._complete, key))
+        # Shielded, so a cancelled caller does not cancel the work other callers are waiting for
+        return await asyncio.shield(in_flight)
 
-    def put_verified_public_key(self, certificates: List[str], verified_public_key: str):
-        cache_expiration = time.time() + _ChainVerifier.CACHE_TIME_LIMIT
-        self.verified_certificates_cache[tuple(certificates)] = (verified_public_key, cache_expiration)
-        if len(self.verified_certificates_cache) > _ChainVerifier.MAXIMUM_CACHE_SIZE:
-            for k, v in list(self.verified_certificates_cache.items()):
-                if v[1] <= time.time():
-                    del self.verified_certificates_cache[k]
+    def _complete(self, key: Hashable, in_flight: asyncio.Future):
+        if self._in_flight.get(key) is in_flight:
+            del self._in_flight[key]
+        if not in_flight.cancelled():
+            # Marks the exception as retrieved when every caller was cancelled
+            in_flight.exception()
 
-class VerificationStatus(IntEnum):
-    OK = 0
-    VERIFICATION_FAILURE = 1
-    INVALID_APP_IDENTIFIER = 2
-    INVALID_CERTIFICATE = 3
-    INVALID_CHAIN_LENGTH = 4
-    INVALID_CHAIN = 5
-    INVALID_ENVIRONMENT = 6
-    RETRYABLE_VERIFICATION_FAILURE = 7
+class _LRUCache:
+    """
+    A thread-safe, size-bounded cache evicting the least recently used entry, with an optional expiration time per entry.
+    """
+    def __init__(self, maximum_size: int):
+        if maximum_size < 1:
+            raise ValueError("maximum_size must be at least 1")
+        self._maximum_size = maximum_size
+        self._entries: OrderedDict[Hashable, Tuple[Any, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
 
+    def get(self, key: Hashable, is_usable: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        return self.get_with_expiration(key, is_usable)[0]
 
-class VerificationException(Exception):
-    def __init__(self, status: VerificationStatus):
-        super().__init__("Verification failed with status " + status.name)
-        self.status = status
+    def get_with_expiration(self, key: Hashable, is_usable: Optional[Callable[[Any], bool]] = None) -> Tuple[Optional[Any], Optional[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None or (is_usable is not None and not is_usable(entry[0])):
+                self._misses += 1
+                return None, None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: Hashable, value: Any, expiration: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (value, expiration)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maximum_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_statistics(self) -> CacheStatistics:
+        with self._lock:
+            return CacheStatistics(hits=self._hits, misses=self._misses, evictions=self._evictions, size=len(self._entries), maximum_size=self._maximum_size)
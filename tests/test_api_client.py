@@ -1,10 +1,17 @@
 # Copyright (c) 2023 Apple Inc. Licensed under MIT License.
 
-from typing import Any, Dict, List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+import json as json_module
+import threading
+import time
 import unittest
+from unittest.mock import MagicMock, patch
 
+import requests
 from requests import Response
-from appstoreserverlibrary.api_client import APIError, APIException, AppStoreServerAPIClient, GetTransactionHistoryVersion
+from requests.adapters import HTTPAdapter
+from appstoreserverlibrary.api_client import APIError, APIException, AppStoreServerAPIClient, EndpointFamily, GetTransactionHistoryVersion, RateLimiter, RetryPolicy
 from appstoreserverlibrary.models.AccountTenure import AccountTenure
 from appstoreserverlibrary.models.AutoRenewStatus import AutoRenewStatus
 from appstoreserverlibrary.models.ConsumptionRequest import ConsumptionRequest
@@ -51,7 +58,8 @@ from appstoreserverlibrary.models.UploadMessageImage import UploadMessageImage
 from appstoreserverlibrary.models.UploadMessageRequestBody import UploadMessageRequestBody
 from uuid import UUID
 
-from tests.util import decode_json_from_signed_date, read_data_from_binary_file, read_data_from_file
+from appstoreserverlibrary.signed_data_verifier import VerificationException
+from tests.util import decode_json_from_signed_date, get_async_signed_data_verifier, get_signed_data_verifier, read_data_from_binary_file, read_data_from_file
 
 from io import BytesIO
 
@@ -866,6 +874,337 @@ class DecodedPayloads(unittest.TestCase):
                                            None)
         client.finish_transaction('1234')
 
+    def test_injected_session_is_reused_and_left_open(self):
+        session = MagicMock()
+        def request(*args, **kwargs):
+            response = Response()
+            response.status_code = 200
+            response.raw = BytesIO(read_data_from_binary_file('tests/resources/models/transactionInfoResponse.json'))
+            response.headers['Content-Type'] = 'application/json'
+            return response
+        session.request.side_effect = request
+        with AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, session=session) as client:
+            client.get_transaction_info('1234')
+            client.get_transaction_info('1234')
+        self.assertEqual(2, session.request.call_count)
+        self.assertEqual('https://local-testing-base-url/inApps/v1/transactions/1234', session.request.call_args.args[1])
+        session.close.assert_not_called()
+
+    def test_owned_session_is_configured_and_closed(self):
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, pool_maxsize=20, max_retries=2)
+        adapter = client.session.get_adapter('https://local-testing-base-url/')
+        self.assertEqual(20, adapter._pool_maxsize)
+        self.assertEqual(2, adapter.max_retries.total)
+        client.session.close = MagicMock()
+        with client:
+            pass
+        client.session.close.assert_called_once()
+
+    def test_http_adapter_is_mounted(self):
+        adapter = HTTPAdapter()
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, http_adapter=adapter)
+        self.assertIs(adapter, client.session.get_adapter('https://local-testing-base-url/'))
+        client.close()
+
+    def test_bearer_token_is_reused(self):
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        first_token = client._get_headers()['Authorization']
+        self.assertEqual(first_token, client._get_headers()['Authorization'])
+        decoded_jwt = decode_json_from_signed_date(first_token[7:])
+        self.assertEqual(client._token_cache.expiration, decoded_jwt['payload']['exp'])
+
+    def test_bearer_token_is_regenerated_within_refresh_margin(self):
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, token_refresh_margin=30)
+        client._get_token()
+        client._token_cache.expiration = int(time.time()) + 20
+        client._token_cache.token = 'expiring'
+        self.assertNotEqual('expiring', client._get_token())
+        self.assertGreater(client._token_cache.expiration, time.time() + 30)
+
+    def test_rate_limited_call_is_retried_after_retry_after(self):
+        client = self.get_client_with_responses([
+            (429, 'tests/resources/models/apiTooManyRequestsException.json', {'Retry-After': '2'}),
+            (200, 'tests/resources/models/transactionInfoResponse.json', {}),
+        ], retry_policy=RetryPolicy())
+        with patch('time.sleep') as sleep:
+            transaction_info_response = client.get_transaction_info('1234')
+        self.assertIsNotNone(transaction_info_response.signedTransactionInfo)
+        sleep.assert_called_once_with(2.0)
+
+    def test_rate_limited_call_without_error_code_is_retried(self):
+        client = self.get_client_with_responses([
+            (429, 'tests/resources/models/apiTooManyRequestsException.json', {'Content-Type': 'application/json; charset=utf-8'}),
+            (503, 'tests/resources/models/transactionInfoResponse.json', {'Content-Type': 'text/html'}),
+            (200, 'tests/resources/models/transactionInfoResponse.json', {}),
+        ], retry_policy=RetryPolicy(jitter=False))
+        with patch('time.sleep') as sleep:
+            transaction_info_response = client.get_transaction_info('1234')
+        self.assertIsNotNone(transaction_info_response.signedTransactionInfo)
+        self.assertEqual([((1.0,),), ((2.0,),)], sleep.call_args_list)
+
+    def test_retries_are_bounded(self):
+        client = self.get_client_with_responses([(429, 'tests/resources/models/apiTooManyRequestsException.json', {})] * 3, retry_policy=RetryPolicy(max_retries=2, jitter=False))
+        with patch('time.sleep') as sleep:
+            with self.assertRaises(APIException) as context:
+                client.get_transaction_info('1234')
+        self.assertEqual(APIError.RATE_LIMIT_EXCEEDED, context.exception.api_error)
+        self.assertEqual([((1.0,),), ((2.0,),)], sleep.call_args_list)
+
+    def test_non_retryable_error_is_not_retried(self):
+        client = self.get_client_with_responses([(500, 'tests/resources/models/apiException.json', {})], retry_policy=RetryPolicy())
+        with patch('time.sleep') as sleep:
+            with self.assertRaises(APIException) as context:
+                client.get_transaction_info('1234')
+        self.assertEqual(APIError.GENERAL_INTERNAL, context.exception.api_error)
+        sleep.assert_not_called()
+
+    def test_retry_policy_per_call_override(self):
+        responses = [
+            (429, 'tests/resources/models/apiTooManyRequestsException.json', {}),
+            (429, 'tests/resources/models/apiTooManyRequestsException.json', {}),
+            (200, 'tests/resources/models/transactionInfoResponse.json', {}),
+        ]
+        client = self.get_client_with_responses(responses)
+        with self.assertRaises(APIException):
+            client.get_transaction_info('1234')
+        with patch('time.sleep'):
+            transaction_info_response = client.with_retry_policy(RetryPolicy()).get_transaction_info('1234')
+        self.assertIsNotNone(transaction_info_response.signedTransactionInfo)
+        self.assertIsNone(client._retry_policy)
+
+    def test_retry_policy_delays(self):
+        policy = RetryPolicy(max_retries=5, initial_backoff=1, max_backoff=5, jitter=False)
+        rate_limited = APIException(429, APIError.RATE_LIMIT_EXCEEDED.value)
+        self.assertEqual([1, 2, 4, 5, 5, None], [policy.get_delay(attempt, rate_limited) for attempt in range(6)])
+        self.assertEqual(3, policy.get_delay(0, rate_limited, '3'))
+        self.assertIsNone(policy.get_delay(0, rate_limited, '60'))
+        self.assertEqual(0, policy.get_delay(0, rate_limited, 'Wed, 21 Oct 2015 07:28:00 GMT'))
+        self.assertIsNone(policy.get_delay(0, APIException(500, APIError.GENERAL_INTERNAL.value)))
+        self.assertEqual(1, policy.get_delay(0, APIException(429)))
+        self.assertEqual(1, policy.get_delay(0, APIException(503)))
+        self.assertIsNone(policy.get_delay(0, APIException(500)))
+        self.assertIsNone(RetryPolicy(retryable_status_codes=frozenset()).get_delay(0, APIException(429)))
+        jittered = RetryPolicy(initial_backoff=4).get_delay(1, rate_limited)
+        self.assertTrue(0 <= jittered <= 8)
+
+    def test_endpoint_families(self):
+        self.assertEqual(EndpointFamily.TRANSACTION_HISTORY, EndpointFamily.from_path('/inApps/v2/history/1234'))
+        self.assertEqual(EndpointFamily.TRANSACTION_INFO, EndpointFamily.from_path('/inApps/v1/transactions/1234'))
+        self.assertEqual(EndpointFamily.SUBSCRIPTION_STATUS, EndpointFamily.from_path('/inApps/v1/subscriptions/1234'))
+        self.assertEqual(EndpointFamily.NOTIFICATION_HISTORY, EndpointFamily.from_path('/inApps/v1/notifications/history'))
+        self.assertEqual(EndpointFamily.MASS_EXTEND, EndpointFamily.from_path('/inApps/v1/subscriptions/extend/mass'))
+        self.assertEqual(EndpointFamily.MASS_EXTEND, EndpointFamily.from_path('/inApps/v1/subscriptions/extend/mass/com.example.product/1234'))
+        self.assertEqual(EndpointFamily.OTHER, EndpointFamily.from_path('/inApps/v1/subscriptions/extend/1234'))
+        self.assertEqual(EndpointFamily.OTHER, EndpointFamily.from_path('/inApps/v1/transactions/1234/finish'))
+
+    def test_rate_limiter_paces_calls_per_endpoint_family(self):
+        with patch('time.monotonic', return_value=100.0) as monotonic, patch('time.sleep') as sleep:
+            rate_limiter = RateLimiter({EndpointFamily.TRANSACTION_INFO: 20})
+            for _ in range(5):
+                rate_limiter.acquire(EndpointFamily.TRANSACTION_INFO)
+            self.assertEqual([0.05, 0.1, 0.15, 0.2], [round(call.args[0], 6) for call in sleep.call_args_list])
+            sleep.reset_mock()
+            for _ in range(5):
+                rate_limiter.acquire(EndpointFamily.SUBSCRIPTION_STATUS)
+            sleep.assert_not_called()
+            # Tokens taken ahead of time are refilled before new calls are allowed
+            monotonic.return_value = 100.2
+            rate_limiter.acquire(EndpointFamily.TRANSACTION_INFO)
+            self.assertEqual(0.05, round(sleep.call_args.args[0], 6))
+
+    def test_rate_limiter_is_shared_between_threads(self):
+        with patch('time.monotonic', return_value=100.0), patch('time.sleep') as sleep:
+            rate_limiter = RateLimiter({EndpointFamily.SUBSCRIPTION_STATUS: 50}, burst={EndpointFamily.SUBSCRIPTION_STATUS: 2})
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: rate_limiter.acquire(EndpointFamily.SUBSCRIPTION_STATUS), range(12)))
+        # Two calls are allowed at once, and each of the others waits for its own token
+        self.assertEqual([i / 50 for i in range(1, 11)], sorted(round(call.args[0], 6) for call in sleep.call_args_list))
+
+    def test_rate_limiter_rejects_invalid_rates(self):
+        with self.assertRaises(ValueError):
+            RateLimiter({EndpointFamily.TRANSACTION_INFO: 0})
+        with self.assertRaises(ValueError):
+            RateLimiter({EndpointFamily.TRANSACTION_INFO: -1})
+        with self.assertRaises(ValueError):
+            RateLimiter({EndpointFamily.TRANSACTION_INFO: 1}, burst={EndpointFamily.TRANSACTION_INFO: 0})
+
+    def test_rate_limiter_paces_each_attempt(self):
+        rate_limiter = MagicMock()
+        client = self.get_client_with_responses([
+            (429, 'tests/resources/models/apiTooManyRequestsException.json', {}),
+            (200, 'tests/resources/models/transactionInfoResponse.json', {}),
+        ], retry_policy=RetryPolicy(initial_backoff=0))
+        client._rate_limiter = rate_limiter
+        client.get_transaction_info('1234')
+        self.assertEqual([((EndpointFamily.TRANSACTION_INFO,),)] * 2, rate_limiter.acquire.call_args_list)
+
+    def test_iter_transaction_history(self):
+        for prefetch in [True, False]:
+            client, requested_revisions = self.get_client_with_history_pages()
+            signed_transactions = list(client.iter_transaction_history('1234', TransactionHistoryRequest(sort=Order.ASCENDING), prefetch=prefetch))
+            self.assertEqual(['t1', 't2', 't3', 't4', 't5'], signed_transactions)
+            self.assertEqual([None, 'revision_1', 'revision_2'], requested_revisions)
+
+    def test_iter_transaction_history_pages_prefetches_next_page(self):
+        client, requested_revisions = self.get_client_with_history_pages()
+        pages = client.iter_transaction_history_pages('1234', TransactionHistoryRequest())
+        self.assertEqual(['t1', 't2'], next(pages).signedTransactions)
+        deadline = time.monotonic() + 5
+        while len(requested_revisions) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([None, 'revision_1'], requested_revisions)
+        pages.close()
+
+    def test_iter_transaction_history_with_verifier(self):
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        client, _ = self.get_client_with_history_pages([[transaction_info, transaction_info], [transaction_info]])
+        verifier = get_signed_data_verifier(Environment.SANDBOX, 'com.example')
+        decoded_transactions = list(client.iter_transaction_history('1234', TransactionHistoryRequest(), signed_data_verifier=verifier))
+        self.assertEqual([Environment.SANDBOX] * 3, [decoded_transaction.environment for decoded_transaction in decoded_transactions])
+
+    def test_iter_transaction_history_raises_verification_failure(self):
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        client, _ = self.get_client_with_history_pages([[transaction_info, 'a.b.c']])
+        verifier = get_signed_data_verifier(Environment.SANDBOX, 'com.example')
+        decoded_transactions = client.iter_transaction_history('1234', TransactionHistoryRequest(), signed_data_verifier=verifier)
+        self.assertEqual(Environment.SANDBOX, next(decoded_transactions).environment)
+        with self.assertRaises(VerificationException):
+            next(decoded_transactions)
+
+    def test_iter_transaction_history_rejects_async_verifier(self):
+        client, requested_revisions = self.get_client_with_history_pages()
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, 'com.example', http_client=MagicMock())
+        with self.assertRaises(TypeError):
+            client.iter_transaction_history('1234', TransactionHistoryRequest(), signed_data_verifier=verifier)
+        self.assertEqual([], requested_revisions)
+
+    def test_iter_notification_history(self):
+        test_notification = read_data_from_file('tests/resources/mock_signed_data/testNotification')
+        client, requested_tokens = self.get_client_with_notification_history_pages([['n1', 'n2'], ['n3']])
+        signed_payloads = [item.signedPayload for item in client.iter_notification_history(NotificationHistoryRequest(startDate=1698148900000, endDate=1698148950000))]
+        self.assertEqual(['n1', 'n2', 'n3'], signed_payloads)
+        self.assertEqual([None, 'token_1'], requested_tokens)
+
+        client, _ = self.get_client_with_notification_history_pages([[test_notification], [test_notification]])
+        verifier = get_signed_data_verifier(Environment.SANDBOX, 'com.example')
+        decoded_items = list(client.iter_notification_history(NotificationHistoryRequest(startDate=1698148900000, endDate=1698148950000), signed_data_verifier=verifier, prefetch=False))
+        self.assertEqual([test_notification, test_notification], [item.signedPayload for item, _ in decoded_items])
+        self.assertEqual([NotificationTypeV2.TEST, NotificationTypeV2.TEST], [decoded_payload.notificationType for _, decoded_payload in decoded_items])
+
+    def test_iter_notification_history_rejects_async_verifier(self):
+        client, requested_tokens = self.get_client_with_notification_history_pages([['n1']])
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, 'com.example', http_client=MagicMock())
+        with self.assertRaises(TypeError):
+            client.iter_notification_history(NotificationHistoryRequest(startDate=1698148900000, endDate=1698148950000), signed_data_verifier=verifier)
+        self.assertEqual([], requested_tokens)
+
+    def test_iter_all_subscription_statuses(self):
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        lock = threading.Lock()
+        in_flight = [0, 0]
+        consumed_ids = []
+        def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            response = Response()
+            if url.endswith('/missing'):
+                response.status_code = 404
+                response.raw = BytesIO(read_data_from_binary_file('tests/resources/models/transactionIdNotFoundError.json'))
+            else:
+                response.status_code = 200
+                response.raw = BytesIO(read_data_from_binary_file('tests/resources/models/getAllSubscriptionStatusesResponse.json'))
+            response.headers['Content-Type'] = 'application/json'
+            return response
+        client._execute_request = fake_execute
+        def transaction_ids():
+            for i in range(20):
+                consumed_ids.append(i)
+                yield 'missing' if i == 7 else str(i)
+        results = client.iter_all_subscription_statuses(transaction_ids(), concurrency=4)
+        first_result = next(results)
+        self.assertLessEqual(len(consumed_ids), 5)
+        results = dict([first_result] + list(results))
+        self.assertEqual(20, len(results))
+        self.assertLessEqual(in_flight[1], 4)
+        self.assertEqual(APIError.TRANSACTION_ID_NOT_FOUND, results['missing'].api_error)
+        self.assertEqual('com.example', results['19'].bundleId)
+
+    def test_iter_all_subscription_statuses_rejects_invalid_concurrency(self):
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        client._execute_request = MagicMock()
+        for concurrency in [0, -1]:
+            with self.assertRaises(ValueError):
+                client.iter_all_subscription_statuses(['1', '2'], concurrency=concurrency)
+        client._execute_request.assert_not_called()
+
+    def test_iter_all_subscription_statuses_with_transport_error(self):
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            if url.endswith('/unreachable'):
+                raise requests.exceptions.ConnectionError("Connection refused")
+            response = Response()
+            response.status_code = 200
+            response.raw = BytesIO(read_data_from_binary_file('tests/resources/models/getAllSubscriptionStatusesResponse.json'))
+            response.headers['Content-Type'] = 'application/json'
+            return response
+        client._execute_request = fake_execute
+        transaction_ids = ['unreachable' if i == 2 else str(i) for i in range(6)]
+        results = dict(client.iter_all_subscription_statuses(transaction_ids, concurrency=3))
+        self.assertEqual(set(transaction_ids), set(results))
+        self.assertIsInstance(results['unreachable'], requests.exceptions.ConnectionError)
+        self.assertEqual('com.example', results['5'].bundleId)
+
+    def get_client_with_notification_history_pages(self, pages: List[List[str]]) -> Tuple[AppStoreServerAPIClient, List[Optional[str]]]:
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        requested_tokens = []
+        def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            self.assertEqual('https://local-testing-base-url/inApps/v1/notifications/history', url)
+            self.assertEqual(1698148900000, json['startDate'])
+            token = params['paginationToken'][0] if 'paginationToken' in params else None
+            requested_tokens.append(token)
+            index = 0 if token is None else int(token.split('_')[1])
+            response = Response()
+            response.status_code = 200
+            response.raw = BytesIO(json_module.dumps({'paginationToken': f'token_{index + 1}', 'hasMore': index + 1 < len(pages), 'notificationHistory': [{'signedPayload': signed_payload} for signed_payload in pages[index]]}).encode())
+            response.headers['Content-Type'] = 'application/json'
+            return response
+        client._execute_request = fake_execute
+        return client, requested_tokens
+
+    def get_client_with_history_pages(self, pages: Optional[List[List[str]]] = None) -> Tuple[AppStoreServerAPIClient, List[Optional[str]]]:
+        pages = pages if pages is not None else [['t1', 't2'], ['t3', 't4'], ['t5']]
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        requested_revisions = []
+        def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            self.assertEqual('https://local-testing-base-url/inApps/v2/history/1234', url)
+            revision = params['revision'][0] if 'revision' in params else None
+            requested_revisions.append(revision)
+            index = 0 if revision is None else int(revision.split('_')[1])
+            response = Response()
+            response.status_code = 200
+            response.raw = BytesIO(json_module.dumps({'revision': f'revision_{index + 1}', 'hasMore': index + 1 < len(pages), 'signedTransactions': pages[index]}).encode())
+            response.headers['Content-Type'] = 'application/json'
+            return response
+        client._execute_request = fake_execute
+        return client, requested_revisions
+
+    def get_client_with_responses(self, responses: List[Tuple[int, str, Dict[str, str]]], retry_policy: Optional[RetryPolicy] = None) -> AppStoreServerAPIClient:
+        client = AppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, retry_policy=retry_policy)
+        remaining_responses = list(responses)
+        def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            status_code, path, response_headers = remaining_responses.pop(0)
+            response = Response()
+            response.status_code = status_code
+            response.raw = BytesIO(read_data_from_binary_file(path))
+            response.headers['Content-Type'] = 'application/json'
+            response.headers.update(response_headers)
+            return response
+        client._execute_request = fake_execute
+        return client
 
     def get_signing_key(self):
         return read_data_from_binary_file('tests/resources/certs/testSigningKey.p8')
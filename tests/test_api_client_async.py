@@ -1,11 +1,14 @@
 # Copyright (c) 2023 Apple Inc. Licensed under MIT License.
 
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
+import asyncio
 import unittest
+from unittest.mock import MagicMock, patch
 
+import httpx
 from httpx import Response
 
-from appstoreserverlibrary.api_client import APIError, APIException, AsyncAppStoreServerAPIClient, GetTransactionHistoryVersion
+from appstoreserverlibrary.api_client import APIError, APIException, AsyncAppStoreServerAPIClient, EndpointFamily, GetTransactionHistoryVersion, RateLimiter, RetryPolicy
 from appstoreserverlibrary.models.AccountTenure import AccountTenure
 from appstoreserverlibrary.models.AppTransactionInfoResponse import AppTransactionInfoResponse
 from appstoreserverlibrary.models.AutoRenewStatus import AutoRenewStatus
@@ -57,7 +60,7 @@ from appstoreserverlibrary.models.UploadMessageImage import UploadMessageImage
 from appstoreserverlibrary.models.UploadMessageRequestBody import UploadMessageRequestBody
 from uuid import UUID
 
-from tests.util import decode_json_from_signed_date, read_data_from_binary_file, read_data_from_file
+from tests.util import decode_json_from_signed_date, get_async_signed_data_verifier, get_signed_data_verifier, read_data_from_binary_file, read_data_from_file
 
 from io import BytesIO
 
@@ -874,6 +877,158 @@ class DecodedPayloads(unittest.IsolatedAsyncioTestCase):
     def get_signing_key(self):
         return read_data_from_binary_file('tests/resources/certs/testSigningKey.p8')
 
+    async def test_injected_http_client_is_used_and_left_open(self):
+        timeouts = []
+        def handler(request: httpx.Request) -> Response:
+            timeouts.append(request.extensions['timeout'])
+            return Response(200, headers={'Content-Type': 'application/json'}, content=read_data_from_binary_file('tests/resources/models/transactionInfoResponse.json'))
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=httpx.Timeout(10, connect=2))
+        self.addAsyncCleanup(http_client.aclose)
+        async with AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, http_client=http_client) as client:
+            await client.get_transaction_info('1234')
+        self.assertFalse(http_client.is_closed)
+        self.assertEqual([{'connect': 2, 'read': 10, 'write': 10, 'pool': 10}], timeouts)
+
+    async def test_per_phase_timeout(self):
+        timeouts = []
+        def handler(request: httpx.Request) -> Response:
+            timeouts.append(request.extensions['timeout'])
+            return Response(200, headers={'Content-Type': 'application/json'}, content=read_data_from_binary_file('tests/resources/models/transactionInfoResponse.json'))
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.addAsyncCleanup(http_client.aclose)
+        client = AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, http_client=http_client, timeout=httpx.Timeout(20, connect=1, pool=5))
+        await client.get_transaction_info('1234')
+        self.assertEqual([{'connect': 1, 'read': 20, 'write': 20, 'pool': 5}], timeouts)
+
+    async def test_owned_http_client_is_configured_and_closed(self):
+        async with AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, max_connections=8, max_keepalive_connections=4) as client:
+            pool = client.http_client._transport._pool
+            self.assertEqual(8, pool._max_connections)
+            self.assertEqual(4, pool._max_keepalive_connections)
+        self.assertTrue(client.http_client.is_closed)
+
+    async def test_rate_limited_call_is_retried(self):
+        responses = [
+            Response(429, headers={'Content-Type': 'application/json', 'Retry-After': '1'}, content=read_data_from_binary_file('tests/resources/models/apiTooManyRequestsException.json')),
+            Response(200, headers={'Content-Type': 'application/json'}, content=read_data_from_binary_file('tests/resources/models/transactionInfoResponse.json')),
+        ]
+        client = AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING, retry_policy=RetryPolicy())
+        self.addAsyncCleanup(client.async_close)
+        async def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            return responses.pop(0)
+        client._execute_request = fake_execute
+        with patch('asyncio.sleep') as sleep:
+            transaction_info_response = await client.get_transaction_info('1234')
+        self.assertIsNotNone(transaction_info_response.signedTransactionInfo)
+        sleep.assert_awaited_once_with(1.0)
+
+    async def test_rate_limiter_is_shared_between_tasks(self):
+        with patch('time.monotonic', return_value=100.0), patch('asyncio.sleep') as sleep:
+            rate_limiter = RateLimiter({EndpointFamily.TRANSACTION_HISTORY: 50})
+            await asyncio.gather(*[rate_limiter.acquire_async(EndpointFamily.TRANSACTION_HISTORY) for _ in range(6)])
+        self.assertEqual([i / 50 for i in range(1, 6)], sorted(round(call.args[0], 6) for call in sleep.await_args_list))
+
+    async def test_iter_transaction_history(self):
+        for prefetch in [True, False]:
+            client, requested_revisions = self.get_client_with_history_pages()
+            signed_transactions = [signed_transaction async for signed_transaction in client.iter_transaction_history('1234', TransactionHistoryRequest(), prefetch=prefetch)]
+            self.assertEqual(['t1', 't2', 't3', 't4', 't5'], signed_transactions)
+            self.assertEqual([None, 'revision_1', 'revision_2'], requested_revisions)
+
+    async def test_iter_transaction_history_pages_prefetches_next_page(self):
+        client, requested_revisions = self.get_client_with_history_pages()
+        pages = client.iter_transaction_history_pages('1234', TransactionHistoryRequest())
+        self.assertEqual(['t1', 't2'], (await pages.__anext__()).signedTransactions)
+        await asyncio.sleep(0)
+        self.assertEqual([None, 'revision_1'], requested_revisions)
+        await pages.aclose()
+
+    async def test_iter_transaction_history_with_verifiers(self):
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        async_verifier = get_async_signed_data_verifier(Environment.SANDBOX, 'com.example')
+        self.addAsyncCleanup(async_verifier.async_close)
+        for verifier in [get_signed_data_verifier(Environment.SANDBOX, 'com.example'), async_verifier]:
+            client, _ = self.get_client_with_history_pages([[transaction_info, transaction_info], [transaction_info]])
+            decoded_transactions = [decoded_transaction async for decoded_transaction in client.iter_transaction_history('1234', TransactionHistoryRequest(), signed_data_verifier=verifier)]
+            self.assertEqual([Environment.SANDBOX] * 3, [decoded_transaction.environment for decoded_transaction in decoded_transactions])
+
+    async def test_iter_notification_history(self):
+        test_notification = read_data_from_file('tests/resources/mock_signed_data/testNotification')
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, 'com.example')
+        self.addAsyncCleanup(verifier.async_close)
+        client, requested_tokens = self.get_client_with_notification_history_pages([[test_notification, test_notification], [test_notification]])
+        decoded_items = [decoded_item async for decoded_item in client.iter_notification_history(NotificationHistoryRequest(startDate=1698148900000, endDate=1698148950000), signed_data_verifier=verifier)]
+        self.assertEqual([NotificationTypeV2.TEST] * 3, [decoded_payload.notificationType for _, decoded_payload in decoded_items])
+        self.assertEqual([None, 'token_1'], requested_tokens)
+
+    async def test_iter_all_subscription_statuses(self):
+        client = AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        self.addAsyncCleanup(client.async_close)
+        in_flight = [0, 0]
+        async def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+            await asyncio.sleep(0.01 if url.endswith('/0') else 0)
+            in_flight[0] -= 1
+            if url.endswith('/missing'):
+                return Response(404, headers={'Content-Type': 'application/json'}, content=read_data_from_binary_file('tests/resources/models/transactionIdNotFoundError.json'))
+            return Response(200, headers={'Content-Type': 'application/json'}, content=read_data_from_binary_file('tests/resources/models/getAllSubscriptionStatusesResponse.json'))
+        client._execute_request = fake_execute
+        transaction_ids = ['missing' if i == 3 else str(i) for i in range(10)]
+        results = [result async for result in client.iter_all_subscription_statuses(transaction_ids, concurrency=3)]
+        self.assertEqual(set(transaction_ids), {any_transaction_id for any_transaction_id, _ in results})
+        self.assertNotEqual('0', results[0][0])
+        self.assertLessEqual(in_flight[1], 3)
+        self.assertEqual(APIError.TRANSACTION_ID_NOT_FOUND, dict(results)['missing'].api_error)
+
+    async def test_iter_all_subscription_statuses_rejects_invalid_concurrency(self):
+        client = AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        self.addAsyncCleanup(client.async_close)
+        client._execute_request = MagicMock()
+        for concurrency in [0, -1]:
+            with self.assertRaises(ValueError):
+                client.iter_all_subscription_statuses(['1', '2'], concurrency=concurrency)
+        client._execute_request.assert_not_called()
+
+    async def test_iter_all_subscription_statuses_with_transport_error(self):
+        client = AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        self.addAsyncCleanup(client.async_close)
+        async def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            if url.endswith('/slow'):
+                raise httpx.ReadTimeout("Timed out")
+            return Response(200, headers={'Content-Type': 'application/json'}, content=read_data_from_binary_file('tests/resources/models/getAllSubscriptionStatusesResponse.json'))
+        client._execute_request = fake_execute
+        transaction_ids = ['slow' if i == 2 else str(i) for i in range(6)]
+        results = dict([result async for result in client.iter_all_subscription_statuses(transaction_ids, concurrency=3)])
+        self.assertEqual(set(transaction_ids), set(results))
+        self.assertIsInstance(results['slow'], httpx.ReadTimeout)
+        self.assertEqual('com.example', results['5'].bundleId)
+
+    def get_client_with_notification_history_pages(self, pages: List[List[str]]) -> Tuple[AsyncAppStoreServerAPIClient, List[Optional[str]]]:
+        client = AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        requested_tokens = []
+        async def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            self.assertEqual('https://local-testing-base-url/inApps/v1/notifications/history', url)
+            token = params['paginationToken'][0] if 'paginationToken' in params else None
+            requested_tokens.append(token)
+            index = 0 if token is None else int(token.split('_')[1])
+            return Response(200, headers={'Content-Type': 'application/json'}, json={'paginationToken': f'token_{index + 1}', 'hasMore': index + 1 < len(pages), 'notificationHistory': [{'signedPayload': signed_payload} for signed_payload in pages[index]]})
+        client._execute_request = fake_execute
+        return client, requested_tokens
+
+    def get_client_with_history_pages(self, pages: Optional[List[List[str]]] = None) -> Tuple[AsyncAppStoreServerAPIClient, List[Optional[str]]]:
+        pages = pages if pages is not None else [['t1', 't2'], ['t3', 't4'], ['t5']]
+        client = AsyncAppStoreServerAPIClient(self.get_signing_key(), 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
+        requested_revisions = []
+        async def fake_execute(method: bytes, url: str, params: Dict[str, Union[str, List[str]]], headers: Dict[str, str], json: Dict[str, Any], data: bytes):
+            self.assertEqual('https://local-testing-base-url/inApps/v2/history/1234', url)
+            revision = params['revision'][0] if 'revision' in params else None
+            requested_revisions.append(revision)
+            index = 0 if revision is None else int(revision.split('_')[1])
+            return Response(200, headers={'Content-Type': 'application/json'}, json={'revision': f'revision_{index + 1}', 'hasMore': index + 1 < len(pages), 'signedTransactions': pages[index]})
+        client._execute_request = fake_execute
+        return client, requested_revisions
+
     def get_client_with_body(self, body: str, expected_method: str, expected_url: str, expected_params: Dict[str, Union[str, List[str]]], expected_json: Dict[str, Any], status_code: int = 200, expected_data: bytes = None, expected_content_type: str = None):
         signing_key = self.get_signing_key()
         client = AsyncAppStoreServerAPIClient(signing_key, 'keyId', 'issuerId', 'com.example', Environment.LOCAL_TESTING)
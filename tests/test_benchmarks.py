@@ -0,0 +1,93 @@
+# Copyright (c) 2025 Apple Inc. Licensed under MIT License.
+
+import logging
+import os
+import time
+import timeit
+import unittest
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+
+from appstoreserverlibrary.models.Environment import Environment
+from appstoreserverlibrary.parallel_signed_data_verifier import ParallelSignedDataVerifier
+from appstoreserverlibrary.signed_data_verifier import _ES256, _ChainVerifier, _parse_signed_object
+
+from tests.util import GeneratedCertificateChain, get_signed_data_verifier, read_data_from_binary_file, read_data_from_file
+
+ITERATIONS = int(os.environ.get("BENCHMARK_ITERATIONS", "2000"))
+
+logger = logging.getLogger(__name__)
+
+@unittest.skipUnless(os.environ.get("RUN_BENCHMARKS"), "Set RUN_BENCHMARKS=1 to run benchmarks, and --log-cli-level=INFO to see the results")
+class Benchmarks(unittest.TestCase):
+    def report(self, name: str, seconds: float, iterations: int = ITERATIONS):
+        logger.info("%s: %s ops/sec (%.1f us/op)", name, f"{iterations / seconds:,.0f}", seconds * 1e6 / iterations)
+
+    def test_single_pass_jws_decoding(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        signed_transaction = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        x5c = jwt.get_unverified_header(signed_transaction)["x5c"]
+        signing_key = verifier._chain_verifier.verify_chain(x5c, False, 1672956154)
+        signing_key_pem = signing_key.public_bytes(encoding=serialization.Encoding.PEM, format=serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+
+        def three_pass():
+            # Previous implementation, parsing the token three times and the key from PEM
+            jwt.decode(signed_transaction, options={"verify_signature": False})
+            jwt.get_unverified_header(signed_transaction)
+            return jwt.decode(signed_transaction, signing_key_pem, algorithms=["ES256"])
+
+        def single_pass():
+            signing_input, _, payload, signature = _parse_signed_object(signed_transaction)
+            self.assertTrue(_ES256.verify(signing_input, signing_key, signature))
+            return payload
+
+        self.assertEqual(three_pass(), single_pass())
+        self.report("JWS decoding (three passes)", timeit.timeit(three_pass, number=ITERATIONS))
+        self.report("JWS decoding (single pass)", timeit.timeit(single_pass, number=ITERATIONS))
+
+    def test_claims_only_decoding(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        signed_transaction = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        fields = ['transactionId', 'productId', 'expiresDate', 'revocationDate']
+
+        def full_model():
+            return verifier.verify_and_decode_signed_transaction(signed_transaction)
+
+        def claims_only():
+            return verifier.verify_and_decode_signed_transaction_claims(signed_transaction, fields)
+
+        self.report("Transaction decoding (full model)", timeit.timeit(full_model, number=ITERATIONS))
+        self.report("Transaction decoding (claims only)", timeit.timeit(claims_only, number=ITERATIONS))
+
+    def test_chain_verification_with_prebuilt_trust_store(self):
+        root_certificates = [read_data_from_binary_file('tests/resources/certs/testCA.der')]
+        signed_transaction = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        x5c = jwt.get_unverified_header(signed_transaction)["x5c"]
+        chain_verifier = _ChainVerifier(root_certificates, False)
+
+        def verify_reparsing_roots():
+            # Equivalent to parsing every root certificate on each verification
+            return _ChainVerifier(root_certificates, False)._verify_chain_without_caching(x5c, False, 1672956154)
+
+        def verify_with_prebuilt_roots():
+            return chain_verifier._verify_chain_without_caching(x5c, False, 1672956154)
+
+        self.report("Chain verification (roots parsed per call)", timeit.timeit(verify_reparsing_roots, number=ITERATIONS))
+        self.report("Chain verification (prebuilt roots)", timeit.timeit(verify_with_prebuilt_roots, number=ITERATIONS))
+
+    def test_parallel_verification_throughput(self):
+        chain = GeneratedCertificateChain()
+        signed_transactions = [chain.sign({'transactionId': str(i), 'bundleId': 'com.example', 'environment': 'Sandbox', 'signedDate': int(time.time() * 1000)}) for i in range(ITERATIONS * 10)]
+        for workers in [1, 4, 16]:
+            with ParallelSignedDataVerifier([chain.root_der], False, Environment.SANDBOX, "com.example", workers=workers, chunk_size=500) as verifier:
+                # Start the worker processes before measuring
+                list(verifier.verify_and_decode_signed_transactions(signed_transactions[:workers]))
+                start = time.perf_counter()
+                for _ in verifier.verify_and_decode_signed_transactions(signed_transactions):
+                    pass
+                self.report(f"Parallel verification ({workers} workers)", time.perf_counter() - start, len(signed_transactions))
+
+
+if __name__ == '__main__':
+    unittest.main()
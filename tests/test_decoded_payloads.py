@@ -25,6 +25,9 @@ from appstoreserverlibrary.models.AdvancedCommercePeriod import AdvancedCommerce
 from appstoreserverlibrary.models.AdvancedCommercePriceIncreaseInfoStatus import AdvancedCommercePriceIncreaseInfoStatus
 from appstoreserverlibrary.models.AdvancedCommerceRefundReason import AdvancedCommerceRefundReason
 from appstoreserverlibrary.models.AdvancedCommerceRefundType import AdvancedCommerceRefundType
+from appstoreserverlibrary.models.JWSTransactionDecodedPayload import JWSTransactionDecodedPayload
+from appstoreserverlibrary.models.LibraryUtility import _get_cattrs_converter, warmup
+from appstoreserverlibrary.models.ResponseBodyV2DecodedPayload import ResponseBodyV2DecodedPayload
 
 from tests.util import create_signed_data_from_json, get_default_signed_data_verifier, get_signed_data_verifier
 
@@ -428,3 +431,15 @@ class DecodedPayloads(unittest.TestCase):
         self.assertEqual(41234, notification.appData.appAppleId)
         self.assertEqual("com.example", notification.appData.bundleId)
         self.assertEqual("signed_app_transaction_info_value", notification.appData.signedAppTransactionInfo)
+
+    def test_decoding_after_converter_warmup(self):
+        warmup()
+        self.assertIs(_get_cattrs_converter(JWSTransactionDecodedPayload), _get_cattrs_converter(ResponseBodyV2DecodedPayload))
+
+        signed_notification = create_signed_data_from_json('tests/resources/models/signedNotification.json')
+        notification = get_default_signed_data_verifier().verify_and_decode_notification(signed_notification)
+
+        self.assertEqual(NotificationTypeV2.SUBSCRIBED, notification.notificationType)
+        self.assertEqual("SUBSCRIBED", notification.rawNotificationType)
+        self.assertEqual(Environment.LOCAL_TESTING, notification.data.environment)
+        self.assertEqual("LocalTesting", notification.data.rawEnvironment)
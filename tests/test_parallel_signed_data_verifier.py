@@ -0,0 +1,69 @@
+# Copyright (c) 2025 Apple Inc. Licensed under MIT License.
+
+import pickle
+import time
+import unittest
+
+from appstoreserverlibrary.models.Environment import Environment
+from appstoreserverlibrary.parallel_signed_data_verifier import ParallelSignedDataVerifier
+from appstoreserverlibrary.signed_data_verifier import VerificationException, VerificationStatus
+
+from tests.util import GeneratedCertificateChain
+
+class ParallelSignedDataVerification(unittest.TestCase):
+    def setUp(self):
+        self.chain = GeneratedCertificateChain()
+
+    def sign_transaction(self, transaction_id: str, bundle_id: str = 'com.example') -> str:
+        return self.chain.sign({'transactionId': transaction_id, 'bundleId': bundle_id, 'environment': 'Sandbox', 'signedDate': int(time.time() * 1000)})
+
+    def test_signed_transactions_are_decoded_in_order(self):
+        signed_transactions = [self.sign_transaction(str(i)) for i in range(10)]
+        signed_transactions[4] = "a.b.c"
+        signed_transactions[7] = self.sign_transaction("7", "com.examplex")
+        with ParallelSignedDataVerifier([self.chain.root_der], False, Environment.SANDBOX, "com.example", workers=2, chunk_size=3) as verifier:
+            results = list(verifier.verify_and_decode_signed_transactions(signed_transactions))
+        self.assertEqual(10, len(results))
+        for i, result in enumerate(results):
+            if i == 4:
+                self.assertEqual(VerificationStatus.VERIFICATION_FAILURE, result.status)
+            elif i == 7:
+                self.assertEqual(VerificationStatus.INVALID_APP_IDENTIFIER, result.status)
+            else:
+                self.assertEqual(str(i), result.transactionId)
+                self.assertEqual(Environment.SANDBOX, result.environment)
+
+    def test_renewal_infos_are_decoded(self):
+        signed_renewal_info = self.chain.sign({'originalTransactionId': '1', 'environment': 'Sandbox', 'signedDate': int(time.time() * 1000)})
+        with ParallelSignedDataVerifier([self.chain.root_der], False, Environment.SANDBOX, "com.example", workers=1) as verifier:
+            results = list(verifier.verify_and_decode_renewal_infos([signed_renewal_info]))
+        self.assertEqual('1', results[0].originalTransactionId)
+
+    def test_input_is_consumed_lazily(self):
+        consumed = []
+        def signed_transactions():
+            for i in range(100):
+                consumed.append(i)
+                yield self.sign_transaction(str(i))
+        with ParallelSignedDataVerifier([self.chain.root_der], False, Environment.SANDBOX, "com.example", workers=1, chunk_size=5, max_pending_chunks=2) as verifier:
+            results = verifier.verify_and_decode_signed_transactions(signed_transactions())
+            self.assertEqual('0', next(results).transactionId)
+            self.assertLessEqual(len(consumed), 10)
+            self.assertEqual([str(i) for i in range(1, 100)], [result.transactionId for result in results])
+
+    def test_verification_exception_is_picklable(self):
+        exception = pickle.loads(pickle.dumps(VerificationException(VerificationStatus.INVALID_ENVIRONMENT)))
+        self.assertEqual(VerificationStatus.INVALID_ENVIRONMENT, exception.status)
+
+    def test_production_requires_app_apple_id(self):
+        with self.assertRaises(ValueError):
+            ParallelSignedDataVerifier([self.chain.root_der], False, Environment.PRODUCTION, "com.example")
+
+    def test_invalid_sizes_are_rejected(self):
+        for options in [{'chunk_size': 0}, {'workers': 0}, {'max_pending_chunks': 0}, {'max_pending_chunks': -1}]:
+            with self.assertRaises(ValueError):
+                ParallelSignedDataVerifier([self.chain.root_der], False, Environment.SANDBOX, "com.example", **options)
+
+
+if __name__ == '__main__':
+    unittest.main()
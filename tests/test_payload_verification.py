@@ -1,13 +1,21 @@
 # Copyright (c) 2023 Apple Inc. Licensed under MIT License.
 
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import unittest
+from unittest.mock import MagicMock
 from base64 import b64decode
 from appstoreserverlibrary.models.Environment import Environment
+from appstoreserverlibrary.models.LastTransactionsItem import LastTransactionsItem
 from appstoreserverlibrary.models.NotificationHistoryRequest import NotificationTypeV2
+from appstoreserverlibrary.models.Status import Status
+from appstoreserverlibrary.models.StatusResponse import StatusResponse
+from appstoreserverlibrary.models.SubscriptionGroupIdentifierItem import SubscriptionGroupIdentifierItem
 
-from appstoreserverlibrary.signed_data_verifier import VerificationException, VerificationStatus, SignedDataVerifier
+from appstoreserverlibrary.signed_data_verifier import LazySignedData, VerificationException, VerificationStatus, SignedDataVerifier
 
-from tests.util import get_signed_data_verifier, read_data_from_file
+from tests.util import GeneratedCertificateChain, LocalOCSPResponder, get_signed_data_verifier, read_data_from_binary_file, read_data_from_file
 
 class PayloadVerification(unittest.TestCase):
     def test_app_store_server_notification_decoding(self):
@@ -56,6 +64,193 @@ class PayloadVerification(unittest.TestCase):
         notification = verifier.verify_and_decode_signed_transaction(transaction_info)
         self.assertEqual(notification.environment, Environment.SANDBOX)
 
+    def test_transaction_info_with_invalid_signature(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        header, payload, signature = transaction_info.split('.')
+        tampered_signature = ('A' if signature[0] != 'A' else 'B') + signature[1:]
+        with self.assertRaises(VerificationException) as context:
+            verifier.verify_and_decode_signed_transaction('.'.join([header, payload, tampered_signature]))
+        self.assertEqual(context.exception.status, VerificationStatus.VERIFICATION_FAILURE)
+
+    def test_chain_cache_statistics(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        verifier.verify_and_decode_signed_transaction(transaction_info)
+        verifier.verify_and_decode_signed_transaction(transaction_info)
+        statistics = verifier.get_chain_cache_statistics()
+        self.assertEqual(1, statistics.hits)
+        self.assertEqual(1, statistics.misses)
+        self.assertEqual(1, statistics.size)
+
+    def test_chain_cache_size_is_configurable(self):
+        verifier = SignedDataVerifier([read_data_from_binary_file('tests/resources/certs/testCA.der')], False, Environment.SANDBOX, "com.example", chain_cache_size=8)
+        self.assertEqual(8, verifier.get_chain_cache_statistics().maximum_size)
+
+    def test_registered_claims_are_validated(self):
+        chain = GeneratedCertificateChain()
+        verifier = SignedDataVerifier([chain.root_der], False, Environment.SANDBOX, "com.example")
+        now = int(time.time())
+        claims = {'bundleId': 'com.example', 'environment': 'Sandbox', 'signedDate': now * 1000}
+        self.assertEqual("1", verifier.verify_and_decode_signed_transaction(chain.sign({**claims, 'transactionId': '1', 'exp': now + 60, 'iat': now})).transactionId)
+        invalid_claims = [{'exp': now - 60}, {'nbf': now + 60}, {'iat': now + 60}, {'iat': 'yesterday'}, {'aud': 'com.example'}]
+        for invalid_claim in invalid_claims:
+            signed_transaction = chain.sign({**claims, **invalid_claim})
+            with self.assertRaises(VerificationException) as context:
+                verifier.verify_and_decode_signed_transaction(signed_transaction)
+            self.assertEqual(context.exception.status, VerificationStatus.VERIFICATION_FAILURE)
+            self.assertEqual(VerificationStatus.VERIFICATION_FAILURE, verifier.verify_and_decode_signed_transactions([signed_transaction])[0].status)
+
+    def test_transaction_infos_batch_decoding(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        verify_chain = MagicMock(wraps=verifier._chain_verifier.verify_chain)
+        verifier._chain_verifier.verify_chain = verify_chain
+        results = verifier.verify_and_decode_signed_transactions([transaction_info, "a.b.c", transaction_info])
+        self.assertEqual(3, len(results))
+        self.assertEqual(Environment.SANDBOX, results[0].environment)
+        self.assertIsInstance(results[1], VerificationException)
+        self.assertEqual(VerificationStatus.VERIFICATION_FAILURE, results[1].status)
+        self.assertEqual(Environment.SANDBOX, results[2].environment)
+        self.assertEqual(1, verify_chain.call_count)
+
+    def test_transaction_infos_batch_decoding_with_wrong_bundle_id(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.examplex")
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        results = verifier.verify_and_decode_signed_transactions([transaction_info])
+        self.assertEqual(VerificationStatus.INVALID_APP_IDENTIFIER, results[0].status)
+
+    def test_renewal_infos_batch_decoding(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        renewal_info = read_data_from_file('tests/resources/mock_signed_data/renewalInfo')
+        results = verifier.verify_and_decode_renewal_infos([renewal_info, renewal_info])
+        self.assertEqual([Environment.SANDBOX, Environment.SANDBOX], [result.environment for result in results])
+
+    def test_renewal_infos_batch_decoding_with_wrong_environment(self):
+        verifier = get_signed_data_verifier(Environment.PRODUCTION, "com.example")
+        renewal_info = read_data_from_file('tests/resources/mock_signed_data/renewalInfo')
+        results = verifier.verify_and_decode_renewal_infos([renewal_info])
+        self.assertEqual(VerificationStatus.INVALID_ENVIRONMENT, results[0].status)
+
+    def test_transaction_infos_batch_decoding_with_online_checks(self):
+        responder = LocalOCSPResponder()
+        self.addCleanup(responder.close)
+        verifier = SignedDataVerifier([responder.chain.root_der], True, Environment.SANDBOX, "com.example")
+        verifier._chain_verifier.enable_strict_checks = False
+        signed_transactions = [responder.chain.sign({'transactionId': str(i), 'bundleId': 'com.example', 'environment': 'Sandbox', 'signedDate': 1698148900000}) for i in range(20)]
+        results = verifier.verify_and_decode_signed_transactions(signed_transactions)
+        self.assertEqual([str(i) for i in range(20)], [result.transactionId for result in results])
+        self.assertEqual(2, responder.request_count)
+
+    def test_status_response_decoding(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        renewal_info = read_data_from_file('tests/resources/mock_signed_data/renewalInfo')
+        status_response = StatusResponse(data=[
+            SubscriptionGroupIdentifierItem(subscriptionGroupIdentifier='group_1', lastTransactions=[
+                LastTransactionsItem(status=Status.ACTIVE, originalTransactionId='1', signedTransactionInfo=transaction_info, signedRenewalInfo=renewal_info),
+                LastTransactionsItem(status=Status.EXPIRED, originalTransactionId='2', signedTransactionInfo=transaction_info),
+            ]),
+            SubscriptionGroupIdentifierItem(subscriptionGroupIdentifier='group_2', lastTransactions=[
+                LastTransactionsItem(status=Status.ACTIVE, originalTransactionId='3', signedTransactionInfo=transaction_info, signedRenewalInfo=renewal_info),
+            ]),
+        ])
+        verify_chain = MagicMock(wraps=verifier._chain_verifier.verify_chain)
+        verifier._chain_verifier.verify_chain = verify_chain
+        entitlements = verifier.verify_and_decode_status_response(status_response)
+        self.assertEqual(['group_1', 'group_1', 'group_2'], [entitlement.subscription_group_identifier for entitlement in entitlements])
+        self.assertEqual(['1', '2', '3'], [entitlement.original_transaction_id for entitlement in entitlements])
+        self.assertEqual([Status.ACTIVE, Status.EXPIRED, Status.ACTIVE], [entitlement.status for entitlement in entitlements])
+        self.assertEqual(Environment.SANDBOX, entitlements[0].transaction.environment)
+        self.assertEqual(Environment.SANDBOX, entitlements[0].renewal_info.environment)
+        self.assertIsNone(entitlements[1].renewal_info)
+        self.assertIsNone(entitlements[1].product_id)
+        # The transactions and the renewal infos are each signed with one chain
+        self.assertEqual(2, verify_chain.call_count)
+
+    def test_status_response_decoding_with_wrong_bundle_id(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.examplex")
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        status_response = StatusResponse(data=[SubscriptionGroupIdentifierItem(lastTransactions=[LastTransactionsItem(signedTransactionInfo=transaction_info)])])
+        with self.assertRaises(VerificationException) as context:
+            verifier.verify_and_decode_status_response(status_response)
+        self.assertEqual(context.exception.status, VerificationStatus.INVALID_APP_IDENTIFIER)
+
+    def test_lazy_signed_transactions(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        decode_signed_object = MagicMock(wraps=verifier._decode_signed_object)
+        verifier._decode_signed_object = decode_signed_object
+        transactions = verifier.lazy_verify_and_decode_signed_transactions([transaction_info, "a.b.c", transaction_info])
+        self.assertEqual(3, len(transactions))
+        self.assertEqual(0, decode_signed_object.call_count)
+        self.assertEqual(Environment.SANDBOX, transactions[0].environment)
+        self.assertIs(transactions[0], transactions[0])
+        self.assertEqual(1, decode_signed_object.call_count)
+        self.assertEqual([Environment.SANDBOX], [transaction.environment for transaction in transactions[-1:]])
+        self.assertEqual(2, decode_signed_object.call_count)
+        for _ in range(2):
+            with self.assertRaises(VerificationException):
+                transactions[1]
+        self.assertEqual(4, decode_signed_object.call_count)
+        self.assertEqual(transaction_info, transactions.signed_data[0])
+
+    def test_lazy_renewal_info(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        renewal_info = verifier.lazy_verify_and_decode_renewal_info(read_data_from_file('tests/resources/mock_signed_data/renewalInfo'))
+        self.assertEqual(Environment.SANDBOX, renewal_info.get().environment)
+        self.assertIs(renewal_info.get(), renewal_info.get())
+        renewal_infos = verifier.lazy_verify_and_decode_renewal_infos([renewal_info.signed_data])
+        self.assertEqual([Environment.SANDBOX], [decoded_renewal_info.environment for decoded_renewal_info in renewal_infos])
+
+    def test_lazy_signed_transaction_is_verified_once_by_concurrent_threads(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        started = threading.Event()
+        release = threading.Event()
+        def verify_and_decode(signed_transaction):
+            started.set()
+            release.wait(5)
+            return verifier.verify_and_decode_signed_transaction(signed_transaction)
+        verify_and_decode = MagicMock(side_effect=verify_and_decode)
+        transaction = LazySignedData(read_data_from_file('tests/resources/mock_signed_data/transactionInfo'), verify_and_decode)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            first = executor.submit(transaction.get)
+            started.wait(5)
+            others = [executor.submit(transaction.get) for _ in range(3)]
+            release.set()
+            decoded_transactions = [future.result() for future in [first] + others]
+        self.assertEqual(1, verify_and_decode.call_count)
+        self.assertTrue(all(decoded_transaction is decoded_transactions[0] for decoded_transaction in decoded_transactions))
+        self.assertIsNone(verifier.lazy_verify_and_decode_signed_transaction(None).get())
+
+    def test_transaction_info_claims(self):
+        verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        claims = verifier.verify_and_decode_signed_transaction_claims(transaction_info, ['bundleId', 'signedDate', 'expiresDate'])
+        self.assertEqual({'bundleId': 'com.example', 'signedDate': 1672956154000, 'expiresDate': None}, claims)
+
+    def test_transaction_info_claims_with_invalid_data(self):
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        with self.assertRaises(VerificationException) as context:
+            get_signed_data_verifier(Environment.SANDBOX, "com.examplex").verify_and_decode_signed_transaction_claims(transaction_info, ['transactionId'])
+        self.assertEqual(context.exception.status, VerificationStatus.INVALID_APP_IDENTIFIER)
+        with self.assertRaises(VerificationException) as context:
+            get_signed_data_verifier(Environment.PRODUCTION, "com.example").verify_and_decode_signed_transaction_claims(transaction_info, ['transactionId'])
+        self.assertEqual(context.exception.status, VerificationStatus.INVALID_ENVIRONMENT)
+        header, payload, signature = transaction_info.split('.')
+        tampered_signature = ('A' if signature[0] != 'A' else 'B') + signature[1:]
+        with self.assertRaises(VerificationException) as context:
+            get_signed_data_verifier(Environment.SANDBOX, "com.example").verify_and_decode_signed_transaction_claims('.'.join([header, payload, tampered_signature]), ['transactionId'])
+        self.assertEqual(context.exception.status, VerificationStatus.VERIFICATION_FAILURE)
+
+    def test_renewal_info_claims(self):
+        renewal_info = read_data_from_file('tests/resources/mock_signed_data/renewalInfo')
+        claims = get_signed_data_verifier(Environment.SANDBOX, "com.example").verify_and_decode_renewal_info_claims(renewal_info, ['signedDate'])
+        self.assertEqual({'signedDate': 1672956154000}, claims)
+        with self.assertRaises(VerificationException) as context:
+            get_signed_data_verifier(Environment.PRODUCTION, "com.example").verify_and_decode_renewal_info_claims(renewal_info, ['signedDate'])
+        self.assertEqual(context.exception.status, VerificationStatus.INVALID_ENVIRONMENT)
+
     def test_malformed_jwt_with_too_many_parts(self):
         verifier = get_signed_data_verifier(Environment.SANDBOX, "com.example")
         with self.assertRaises(VerificationException) as context:
@@ -0,0 +1,206 @@
+# Copyright (c) 2023 Apple Inc. Licensed under MIT License.
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+from appstoreserverlibrary.models.Environment import Environment
+from appstoreserverlibrary.models.LastTransactionsItem import LastTransactionsItem
+from appstoreserverlibrary.models.NotificationTypeV2 import NotificationTypeV2
+from appstoreserverlibrary.models.Status import Status
+from appstoreserverlibrary.models.StatusResponse import StatusResponse
+from appstoreserverlibrary.models.SubscriptionGroupIdentifierItem import SubscriptionGroupIdentifierItem
+from appstoreserverlibrary.signed_data_verifier import AsyncSignedDataVerifier, VerificationException, VerificationStatus
+
+from tests.util import GeneratedCertificateChain, LocalOCSPResponder, get_async_signed_data_verifier, read_data_from_file
+
+class AsyncPayloadVerification(unittest.IsolatedAsyncioTestCase):
+    async def test_app_store_server_notification_decoding(self):
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, "com.example")
+        self.addAsyncCleanup(verifier.async_close)
+        test_notification = read_data_from_file('tests/resources/mock_signed_data/testNotification')
+        notification = await verifier.verify_and_decode_notification(test_notification)
+        self.assertEqual(notification.notificationType, NotificationTypeV2.TEST)
+
+    async def test_app_store_server_notification_decoding_production(self):
+        verifier = get_async_signed_data_verifier(Environment.PRODUCTION, "com.example")
+        self.addAsyncCleanup(verifier.async_close)
+        test_notification = read_data_from_file('tests/resources/mock_signed_data/testNotification')
+        with self.assertRaises(VerificationException) as context:
+            await verifier.verify_and_decode_notification(test_notification)
+        self.assertEqual(context.exception.status, VerificationStatus.INVALID_ENVIRONMENT)
+
+    async def test_transaction_info_decoding(self):
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, "com.example")
+        self.addAsyncCleanup(verifier.async_close)
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        transaction = await verifier.verify_and_decode_signed_transaction(transaction_info)
+        self.assertEqual(transaction.environment, Environment.SANDBOX)
+
+    async def test_transaction_info_decoding_in_executor(self):
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, "com.example", executor=executor)
+        self.addAsyncCleanup(verifier.async_close)
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        header, payload, signature = transaction_info.split('.')
+        tampered_signature = ('A' if signature[0] != 'A' else 'B') + signature[1:]
+        transaction = await verifier.verify_and_decode_signed_transaction(transaction_info)
+        self.assertEqual(transaction.environment, Environment.SANDBOX)
+        with self.assertRaises(VerificationException) as context:
+            await verifier.verify_and_decode_signed_transaction('.'.join([header, payload, tampered_signature]))
+        self.assertEqual(context.exception.status, VerificationStatus.VERIFICATION_FAILURE)
+
+    async def test_lazy_signed_transactions(self):
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, "com.example")
+        self.addAsyncCleanup(verifier.async_close)
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        original_decode_signed_object = verifier._decode_signed_object
+        async def suspending_decode_signed_object(signed_obj: str):
+            # Lets the other tasks run while the first access is verifying
+            await asyncio.sleep(0)
+            return await original_decode_signed_object(signed_obj)
+        decode_signed_object = MagicMock(side_effect=suspending_decode_signed_object)
+        verifier._decode_signed_object = decode_signed_object
+        transactions = verifier.lazy_verify_and_decode_signed_transactions([transaction_info, "a.b.c"])
+        self.assertEqual(2, len(transactions))
+        self.assertEqual(0, decode_signed_object.call_count)
+        # Concurrent first accesses wait for a single verification
+        decoded_transactions = await asyncio.gather(*[transactions[0].get() for _ in range(3)])
+        self.assertEqual(1, decode_signed_object.call_count)
+        self.assertTrue(all(decoded_transaction is decoded_transactions[0] for decoded_transaction in decoded_transactions))
+        self.assertEqual(Environment.SANDBOX, decoded_transactions[0].environment)
+        with self.assertRaises(VerificationException):
+            await transactions[1].get()
+        self.assertEqual([transaction_info, "a.b.c"], transactions.signed_data)
+        self.assertIsNone(await verifier.lazy_verify_and_decode_renewal_info(None).get())
+        renewal_infos = verifier.lazy_verify_and_decode_renewal_infos([read_data_from_file('tests/resources/mock_signed_data/renewalInfo')])
+        self.assertEqual(Environment.SANDBOX, (await renewal_infos[0].get()).environment)
+
+    async def test_transaction_info_claims(self):
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, "com.example")
+        self.addAsyncCleanup(verifier.async_close)
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        claims = await verifier.verify_and_decode_signed_transaction_claims(transaction_info, ['bundleId', 'environment'])
+        self.assertEqual({'bundleId': 'com.example', 'environment': 'Sandbox'}, claims)
+
+    async def test_renewal_infos_batch_decoding(self):
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, "com.example")
+        self.addAsyncCleanup(verifier.async_close)
+        renewal_info = read_data_from_file('tests/resources/mock_signed_data/renewalInfo')
+        results = await verifier.verify_and_decode_renewal_infos([renewal_info, "a.b.c", renewal_info])
+        self.assertEqual(Environment.SANDBOX, results[0].environment)
+        self.assertEqual(VerificationStatus.VERIFICATION_FAILURE, results[1].status)
+        self.assertEqual(Environment.SANDBOX, results[2].environment)
+
+    async def test_status_response_decoding(self):
+        verifier = get_async_signed_data_verifier(Environment.SANDBOX, "com.example")
+        self.addAsyncCleanup(verifier.async_close)
+        transaction_info = read_data_from_file('tests/resources/mock_signed_data/transactionInfo')
+        renewal_info = read_data_from_file('tests/resources/mock_signed_data/renewalInfo')
+        status_response = StatusResponse(data=[SubscriptionGroupIdentifierItem(subscriptionGroupIdentifier='group_1', lastTransactions=[
+            LastTransactionsItem(status=Status.ACTIVE, originalTransactionId='1', signedTransactionInfo=transaction_info, signedRenewalInfo=renewal_info),
+        ])])
+        entitlements = await verifier.verify_and_decode_status_response(status_response)
+        self.assertEqual(1, len(entitlements))
+        self.assertEqual(Environment.SANDBOX, entitlements[0].transaction.environment)
+        self.assertEqual(Environment.SANDBOX, entitlements[0].renewal_info.environment)
+
+    async def test_concurrent_online_verifications_share_ocsp_requests(self):
+        responder = LocalOCSPResponder()
+        self.addCleanup(responder.close)
+        responder.delay = 0.1
+        verifier = AsyncSignedDataVerifier([responder.chain.root_der], True, Environment.SANDBOX, "com.example", parallel_ocsp_checks=True)
+        self.addAsyncCleanup(verifier.async_close)
+        signed_transactions = [responder.chain.sign({'transactionId': str(i), 'bundleId': 'com.example', 'environment': 'Sandbox', 'signedDate': 1698148900000}) for i in range(10)]
+        results = await asyncio.gather(*[verifier.verify_and_decode_signed_transaction(signed_transaction) for signed_transaction in signed_transactions])
+        self.assertEqual([str(i) for i in range(10)], [result.transactionId for result in results])
+        self.assertEqual(2, responder.request_count)
+        # OCSP requests are made with httpx, so no requests.Session is created
+        self.assertIsNone(verifier._chain_verifier.ocsp_session)
+
+    async def test_revoked_leaf_fails_verification(self):
+        responder = LocalOCSPResponder()
+        self.addCleanup(responder.close)
+        responder.revoked_serial_numbers.add(responder.chain.leaf.serial_number)
+        verifier = AsyncSignedDataVerifier([responder.chain.root_der], True, Environment.SANDBOX, "com.example", parallel_ocsp_checks=True)
+        self.addAsyncCleanup(verifier.async_close)
+        with self.assertRaises(VerificationException) as context:
+            await verifier.verify_and_decode_signed_transaction(responder.chain.sign({'bundleId': 'com.example', 'environment': 'Sandbox'}))
+        self.assertEqual(context.exception.status, VerificationStatus.VERIFICATION_FAILURE)
+
+    async def test_chain_cache_refresh_ahead(self):
+        chain = GeneratedCertificateChain()
+        verifier = AsyncSignedDataVerifier([chain.root_der], True, Environment.SANDBOX, "com.example", chain_cache_refresh_ahead=60, http_client=MagicMock())
+        chain_verifier = verifier._chain_verifier
+        verify_chain_online = self.mock_online_verifications(chain_verifier, ["first", "refreshed"])
+        now = time.time()
+        with patch('time.time', MagicMock(return_value=now)):
+            self.assertEqual("first", await chain_verifier.verify_chain_async(chain.x5c, True, now))
+        with patch('time.time', MagicMock(return_value=now + 839)): # Before the refresh window
+            self.assertEqual("first", await chain_verifier.verify_chain_async(chain.x5c, True, now))
+            self.assertEqual(1, verify_chain_online.call_count)
+        with patch('time.time', MagicMock(return_value=now + 840)):
+            # The cached key is served while the chain is verified again in a background task, started only once
+            self.assertEqual("first", await chain_verifier.verify_chain_async(chain.x5c, True, now))
+            self.assertEqual("first", await chain_verifier.verify_chain_async(chain.x5c, True, now))
+            await self.wait_for_refresh(chain_verifier)
+        self.assertEqual(2, verify_chain_online.call_count)
+        with patch('time.time', MagicMock(return_value=now + 1000)): # After the original expiration
+            self.assertEqual("refreshed", await chain_verifier.verify_chain_async(chain.x5c, True, now))
+        self.assertEqual(2, verify_chain_online.call_count)
+
+    async def test_chain_cache_refresh_ahead_failure_keeps_cached_key(self):
+        chain = GeneratedCertificateChain()
+        verifier = AsyncSignedDataVerifier([chain.root_der], True, Environment.SANDBOX, "com.example", chain_cache_refresh_ahead=60, http_client=MagicMock())
+        chain_verifier = verifier._chain_verifier
+        self.mock_online_verifications(chain_verifier, ["first", VerificationException(VerificationStatus.RETRYABLE_VERIFICATION_FAILURE)])
+        now = time.time()
+        with patch('time.time', MagicMock(return_value=now)):
+            await chain_verifier.verify_chain_async(chain.x5c, True, now)
+        with patch('time.time', MagicMock(return_value=now + 850)):
+            self.assertEqual("first", await chain_verifier.verify_chain_async(chain.x5c, True, now))
+            await self.wait_for_refresh(chain_verifier)
+            self.assertEqual("first", await chain_verifier.verify_chain_async(chain.x5c, True, now))
+
+    def mock_online_verifications(self, chain_verifier, results) -> MagicMock:
+        remaining_results = list(results)
+        async def verify_chain_online(certificates, effective_date):
+            result = remaining_results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            chain_verifier.put_verified_public_key(certificates, result)
+            return result
+        chain_verifier._verify_chain_online_async = MagicMock(side_effect=verify_chain_online)
+        return chain_verifier._verify_chain_online_async
+
+    async def wait_for_refresh(self, chain_verifier):
+        await asyncio.wait_for(asyncio.gather(*chain_verifier._refresh_tasks), 5)
+        self.assertEqual(set(), chain_verifier._refreshing)
+
+    async def test_unreachable_responder_is_retryable(self):
+        responder = LocalOCSPResponder()
+        responder.close()
+        verifier = AsyncSignedDataVerifier([responder.chain.root_der], True, Environment.SANDBOX, "com.example", ocsp_timeout=1)
+        self.addAsyncCleanup(verifier.async_close)
+        with self.assertRaises(VerificationException) as context:
+            await verifier.verify_and_decode_signed_transaction(responder.chain.sign({'bundleId': 'com.example', 'environment': 'Sandbox'}))
+        self.assertEqual(context.exception.status, VerificationStatus.RETRYABLE_VERIFICATION_FAILURE)
+
+    async def test_shared_http_client_is_not_closed(self):
+        responder = LocalOCSPResponder()
+        self.addCleanup(responder.close)
+        http_client = httpx.AsyncClient()
+        self.addAsyncCleanup(http_client.aclose)
+        verifier = AsyncSignedDataVerifier([responder.chain.root_der], True, Environment.SANDBOX, "com.example", http_client=http_client)
+        transaction = await verifier.verify_and_decode_signed_transaction(responder.chain.sign({'bundleId': 'com.example', 'environment': 'Sandbox'}))
+        self.assertEqual('com.example', transaction.bundleId)
+        await verifier.async_close()
+        self.assertFalse(http_client.is_closed)
+
+if __name__ == '__main__':
+    unittest.main()
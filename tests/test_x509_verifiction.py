@@ -1,11 +1,19 @@
 # Copyright (c) 2023 Apple Inc. Licensed under MIT License.
 
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import unittest
 from unittest import mock
 from unittest.mock import MagicMock, patch
 
-from appstoreserverlibrary.signed_data_verifier import _ChainVerifier, VerificationException, VerificationStatus
+from appstoreserverlibrary.signed_data_verifier import _ChainVerifier, InMemoryOCSPResponseCache, OCSPResponseCache, VerificationException, VerificationStatus
 from base64 import b64decode, b64encode
+from cryptography.hazmat.primitives import serialization
+from OpenSSL import crypto
+import requests
+
+from tests.util import LocalOCSPResponder
 
 ROOT_CA_BASE64_ENCODED = "MIIBgjCCASmgAwIBAgIJALUc5ALiH5pbMAoGCCqGSM49BAMDMDYxCzAJBgNVBAYTAlVTMRMwEQYDVQQIDApDYWxpZm9ybmlhMRIwEAYDVQQHDAlDdXBlcnRpbm8wHhcNMjMwMTA1MjEzMDIyWhcNMzMwMTAyMjEzMDIyWjA2MQswCQYDVQQGEwJVUzETMBEGA1UECAwKQ2FsaWZvcm5pYTESMBAGA1UEBwwJQ3VwZXJ0aW5vMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEc+/Bl+gospo6tf9Z7io5tdKdrlN1YdVnqEhEDXDShzdAJPQijamXIMHf8xWWTa1zgoYTxOKpbuJtDplz1XriTaMgMB4wDAYDVR0TBAUwAwEB/zAOBgNVHQ8BAf8EBAMCAQYwCgYIKoZIzj0EAwMDRwAwRAIgemWQXnMAdTad2JDJWng9U4uBBL5mA7WI05H7oH7c6iQCIHiRqMjNfzUAyiu9h6rOU/K+iTR0I/3Y/NSWsXHX+acc"
 INTERMEDIATE_CA_BASE64_ENCODED = "MIIBnzCCAUWgAwIBAgIBCzAKBggqhkjOPQQDAzA2MQswCQYDVQQGEwJVUzETMBEGA1UECAwKQ2FsaWZvcm5pYTESMBAGA1UEBwwJQ3VwZXJ0aW5vMB4XDTIzMDEwNTIxMzEwNVoXDTMzMDEwMTIxMzEwNVowRTELMAkGA1UEBhMCVVMxCzAJBgNVBAgMAkNBMRIwEAYDVQQHDAlDdXBlcnRpbm8xFTATBgNVBAoMDEludGVybWVkaWF0ZTBZMBMGByqGSM49AgEGCCqGSM49AwEHA0IABBUN5V9rKjfRiMAIojEA0Av5Mp0oF+O0cL4gzrTF178inUHugj7Et46NrkQ7hKgMVnjogq45Q1rMs+cMHVNILWqjNTAzMA8GA1UdEwQIMAYBAf8CAQAwDgYDVR0PAQH/BAQDAgEGMBAGCiqGSIb3Y2QGAgEEAgUAMAoGCCqGSM49BAMDA0gAMEUCIQCmsIKYs41ullssHX4rVveUT0Z7Is5/hLK1lFPTtun3hAIgc2+2RG5+gNcFVcs+XJeEl4GZ+ojl3ROOmll+ye7dynQ="
@@ -24,6 +32,9 @@ REAL_APPLE_SIGNING_CERTIFICATE_BASE64_ENCODED = "MIIEMTCCA7agAwIBAgIQR8KHzdn554Z
 EFFECTIVE_DATE = 1761962975
 CLOCK_DATE = 41231
 
+def to_pem(public_key) -> str:
+    return public_key.public_bytes(encoding=serialization.Encoding.PEM, format=serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+
 class X509Verification(unittest.TestCase):
     def test_valid_chain_without_ocsp(self):
         verifier = _ChainVerifier([b64decode(ROOT_CA_BASE64_ENCODED)], False)
@@ -32,7 +43,7 @@ class X509Verification(unittest.TestCase):
             INTERMEDIATE_CA_BASE64_ENCODED,
             ROOT_CA_BASE64_ENCODED
         ], False, EFFECTIVE_DATE)
-        self.assertEqual(LEAF_CERT_PUBLIC_KEY, public_key)
+        self.assertEqual(LEAF_CERT_PUBLIC_KEY, to_pem(public_key))
 
     def test_valid_chain_invalid_intermediate_OID_without_OCSP(self):
         verifier = _ChainVerifier([b64decode(ROOT_CA_BASE64_ENCODED)], False)
@@ -89,6 +100,27 @@ class X509Verification(unittest.TestCase):
             ], False, EFFECTIVE_DATE)
         self.assertEqual(VerificationStatus.INVALID_CERTIFICATE, context.exception.status)
 
+    def test_root_certificates_are_parsed_once(self):
+        verifier = _ChainVerifier([b64decode(ROOT_CA_BASE64_ENCODED)], False)
+        with patch('OpenSSL.crypto.load_certificate', wraps=crypto.load_certificate) as load_certificate:
+            for _ in range(2):
+                verifier._verify_chain_without_caching([
+                    LEAF_CERT_BASE64_ENCODED,
+                    INTERMEDIATE_CA_BASE64_ENCODED,
+                    ROOT_CA_BASE64_ENCODED
+                ], False, EFFECTIVE_DATE)
+        # Only the leaf and intermediate are loaded per verification
+        self.assertEqual(4, load_certificate.call_count)
+
+    def test_cached_public_key_is_reused(self):
+        verifier = _ChainVerifier([b64decode(ROOT_CA_BASE64_ENCODED)], False)
+        chain = [
+            LEAF_CERT_BASE64_ENCODED,
+            INTERMEDIATE_CA_BASE64_ENCODED,
+            ROOT_CA_BASE64_ENCODED
+        ]
+        self.assertIs(verifier.verify_chain(chain, False, EFFECTIVE_DATE), verifier.verify_chain(chain, False, EFFECTIVE_DATE))
+
     def test_chain_different_than_root_certificate(self):
         verifier = _ChainVerifier([b64decode(REAL_APPLE_ROOT_BASE64_ENCODED)], False)
 
@@ -194,6 +226,324 @@ class X509Verification(unittest.TestCase):
             ], True, EFFECTIVE_DATE)
         self.assertEqual(2, magic_mock.call_count)
 
+    def test_offline_chain_verification_caching(self):
+        verifier = _ChainVerifier([b64decode(ROOT_CA_BASE64_ENCODED)], False)
+        chain = [
+            LEAF_CERT_BASE64_ENCODED,
+            INTERMEDIATE_CA_BASE64_ENCODED,
+            ROOT_CA_BASE64_ENCODED
+        ]
+        magic_mock = MagicMock(wraps=verifier._verify_chain_and_validity_window)
+        verifier._verify_chain_and_validity_window = magic_mock
+        self.assertEqual(LEAF_CERT_PUBLIC_KEY, to_pem(verifier.verify_chain(chain, False, EFFECTIVE_DATE)))
+        self.assertEqual(1, magic_mock.call_count)
+        # Any other date within the validity window of the chain is served from the cache
+        self.assertEqual(LEAF_CERT_PUBLIC_KEY, to_pem(verifier.verify_chain(chain, False, EFFECTIVE_DATE - 86400 * 365)))
+        self.assertEqual(1, magic_mock.call_count)
+
+    def test_offline_chain_verification_caching_outside_validity_window(self):
+        verifier = _ChainVerifier([b64decode(ROOT_CA_BASE64_ENCODED)], False)
+        chain = [
+            LEAF_CERT_BASE64_ENCODED,
+            INTERMEDIATE_CA_BASE64_ENCODED,
+            ROOT_CA_BASE64_ENCODED
+        ]
+        magic_mock = MagicMock(wraps=verifier._verify_chain_and_validity_window)
+        verifier._verify_chain_and_validity_window = magic_mock
+        verifier.verify_chain(chain, False, EFFECTIVE_DATE)
+        with self.assertRaises(VerificationException) as context:
+            verifier.verify_chain(chain, False, 2280946846)
+        self.assertEqual(VerificationStatus.VERIFICATION_FAILURE, context.exception.status)
+        self.assertEqual(2, magic_mock.call_count)
+
+    def test_chain_cache_is_bounded_and_evicts_least_recently_used(self):
+        verifier = _ChainVerifier([b64decode(REAL_APPLE_ROOT_BASE64_ENCODED)], cache_size=2)
+        magic_mock = MagicMock(return_value=LEAF_CERT_BASE64_ENCODED)
+        verifier._verify_chain_without_caching = magic_mock
+        first_chain = [LEAF_CERT_BASE64_ENCODED, INTERMEDIATE_CA_BASE64_ENCODED, ROOT_CA_BASE64_ENCODED]
+        second_chain = [REAL_APPLE_SIGNING_CERTIFICATE_BASE64_ENCODED, REAL_APPLE_INTERMEDIATE_BASE64_ENCODED, REAL_APPLE_ROOT_BASE64_ENCODED]
+        third_chain = [LEAF_CERT_BASE64_ENCODED, INTERMEDIATE_CA_BASE64_ENCODED, REAL_APPLE_ROOT_BASE64_ENCODED]
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE)):
+            verifier.verify_chain(first_chain, True, EFFECTIVE_DATE)
+            verifier.verify_chain(second_chain, True, EFFECTIVE_DATE)
+            verifier.verify_chain(first_chain, True, EFFECTIVE_DATE) # Marks the first chain as recently used
+            verifier.verify_chain(third_chain, True, EFFECTIVE_DATE) # Evicts the second chain
+            self.assertEqual(3, magic_mock.call_count)
+            verifier.verify_chain(first_chain, True, EFFECTIVE_DATE)
+            self.assertEqual(3, magic_mock.call_count)
+            verifier.verify_chain(second_chain, True, EFFECTIVE_DATE)
+            self.assertEqual(4, magic_mock.call_count)
+        statistics = verifier.verified_certificates_cache.get_statistics()
+        self.assertEqual(2, statistics.hits)
+        self.assertEqual(4, statistics.misses)
+        self.assertEqual(2, statistics.evictions)
+        self.assertEqual(2, statistics.size)
+        self.assertEqual(2, statistics.maximum_size)
+
+    def test_chain_cache_time_limit_is_configurable(self):
+        verifier = _ChainVerifier([b64decode(REAL_APPLE_ROOT_BASE64_ENCODED)], cache_time_limit=60)
+        magic_mock = MagicMock(return_value=LEAF_CERT_BASE64_ENCODED)
+        verifier._verify_chain_without_caching = magic_mock
+        chain = [REAL_APPLE_SIGNING_CERTIFICATE_BASE64_ENCODED, REAL_APPLE_INTERMEDIATE_BASE64_ENCODED, REAL_APPLE_ROOT_BASE64_ENCODED]
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE)):
+            verifier.verify_chain(chain, True, EFFECTIVE_DATE)
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE + 59)):
+            verifier.verify_chain(chain, True, EFFECTIVE_DATE)
+        self.assertEqual(1, magic_mock.call_count)
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE + 60)):
+            verifier.verify_chain(chain, True, EFFECTIVE_DATE)
+        self.assertEqual(2, magic_mock.call_count)
+
+    def test_chain_cache_concurrent_access(self):
+        verifier = _ChainVerifier([b64decode(REAL_APPLE_ROOT_BASE64_ENCODED)], cache_size=4)
+        verifier._verify_chain_without_caching = MagicMock(return_value=LEAF_CERT_BASE64_ENCODED)
+        chains = [[str(i), INTERMEDIATE_CA_BASE64_ENCODED, ROOT_CA_BASE64_ENCODED] for i in range(8)]
+        def verify_all():
+            for _ in range(50):
+                for chain in chains:
+                    self.assertEqual(LEAF_CERT_BASE64_ENCODED, verifier.verify_chain(chain, True, EFFECTIVE_DATE))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for future in [executor.submit(verify_all) for _ in range(8)]:
+                future.result()
+        statistics = verifier.verified_certificates_cache.get_statistics()
+        self.assertEqual(8 * 50 * 8, statistics.hits + statistics.misses)
+        self.assertEqual(4, statistics.size)
+
+    def test_chain_cache_refresh_ahead(self):
+        verifier = _ChainVerifier([b64decode(REAL_APPLE_ROOT_BASE64_ENCODED)], cache_refresh_ahead=60)
+        magic_mock = MagicMock(side_effect=["first", "refreshed"])
+        verifier._verify_chain_without_caching = magic_mock
+        chain = [REAL_APPLE_SIGNING_CERTIFICATE_BASE64_ENCODED, REAL_APPLE_INTERMEDIATE_BASE64_ENCODED, REAL_APPLE_ROOT_BASE64_ENCODED]
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE)):
+            self.assertEqual("first", verifier.verify_chain(chain, True, EFFECTIVE_DATE))
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE + 839)): # Before the refresh window
+            self.assertEqual("first", verifier.verify_chain(chain, True, EFFECTIVE_DATE))
+            self.assertEqual(1, magic_mock.call_count)
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE + 840)):
+            # The cached key is served while the chain is verified again in the background
+            self.assertEqual("first", verifier.verify_chain(chain, True, EFFECTIVE_DATE))
+            self.wait_for_refresh(verifier)
+        self.assertEqual(2, magic_mock.call_count)
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE + 1000)): # After the original expiration
+            self.assertEqual("refreshed", verifier.verify_chain(chain, True, EFFECTIVE_DATE))
+        self.assertEqual(2, magic_mock.call_count)
+
+    def test_chain_cache_refresh_ahead_failure_keeps_cached_key(self):
+        verifier = _ChainVerifier([b64decode(REAL_APPLE_ROOT_BASE64_ENCODED)], cache_refresh_ahead=60)
+        magic_mock = MagicMock(side_effect=["first", VerificationException(VerificationStatus.RETRYABLE_VERIFICATION_FAILURE)])
+        verifier._verify_chain_without_caching = magic_mock
+        chain = [REAL_APPLE_SIGNING_CERTIFICATE_BASE64_ENCODED, REAL_APPLE_INTERMEDIATE_BASE64_ENCODED, REAL_APPLE_ROOT_BASE64_ENCODED]
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE)):
+            verifier.verify_chain(chain, True, EFFECTIVE_DATE)
+        with patch('time.time', mock.MagicMock(return_value=CLOCK_DATE + 850)):
+            self.assertEqual("first", verifier.verify_chain(chain, True, EFFECTIVE_DATE))
+            self.wait_for_refresh(verifier)
+            self.assertEqual("first", verifier.verify_chain(chain, True, EFFECTIVE_DATE))
+
+    def wait_for_refresh(self, verifier: _ChainVerifier):
+        for _ in range(100):
+            if not verifier._refreshing:
+                return
+            time.sleep(0.01)
+        self.fail("Background refresh did not complete")
+
+class OCSPResponseCaching(unittest.TestCase):
+    def setUp(self):
+        self.responder = LocalOCSPResponder()
+        self.chain = self.responder.chain
+
+    def tearDown(self):
+        self.responder.close()
+
+    def get_verifier(self, ocsp_response_cache=None, **kwargs) -> _ChainVerifier:
+        return _ChainVerifier([self.chain.root_der], False, ocsp_response_cache=ocsp_response_cache if ocsp_response_cache is not None else InMemoryOCSPResponseCache(), **kwargs)
+
+    def test_ocsp_responses_are_cached_until_next_update(self):
+        verifier = self.get_verifier()
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(2, self.responder.request_count)
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(2, self.responder.request_count)
+        with patch('time.time', mock.MagicMock(return_value=time.time() + 3601)):
+            verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(4, self.responder.request_count)
+
+    def test_ocsp_response_caching_is_capped(self):
+        verifier = self.get_verifier(ocsp_cache_time_limit=60)
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        with patch('time.time', mock.MagicMock(return_value=time.time() + 61)):
+            verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(4, self.responder.request_count)
+
+    def test_ocsp_response_caching_is_capped_on_read(self):
+        cache = InMemoryOCSPResponseCache()
+        self.get_verifier(cache)._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        # A verifier with a shorter limit sharing the cache does not use the older responses
+        verifier = self.get_verifier(cache, ocsp_cache_time_limit=60)
+        with patch('time.time', mock.MagicMock(return_value=time.time() + 61)):
+            verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(4, self.responder.request_count)
+
+    def test_cached_ocsp_response_of_wrong_type_is_not_ignored(self):
+        cache = MagicMock(spec=OCSPResponseCache)
+        cache.get.return_value = "not bytes"
+        verifier = self.get_verifier(cache)
+        with self.assertRaises(TypeError):
+            verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+
+    def test_ocsp_responses_are_not_cached_without_cache(self):
+        verifier = _ChainVerifier([self.chain.root_der], False)
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(4, self.responder.request_count)
+
+    def test_revoked_ocsp_response_is_not_cached(self):
+        self.responder.revoked_serial_numbers.add(self.chain.leaf.serial_number)
+        cache = MagicMock(wraps=InMemoryOCSPResponseCache())
+        verifier = self.get_verifier(cache)
+        with self.assertRaises(VerificationException) as context:
+            verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(VerificationStatus.VERIFICATION_FAILURE, context.exception.status)
+        # Only the intermediate's response is cached
+        self.assertEqual(1, cache.put.call_count)
+
+    def test_invalid_cached_ocsp_response_is_ignored(self):
+        cache = MagicMock(spec=OCSPResponseCache)
+        cache.get.return_value = b"invalid"
+        verifier = self.get_verifier(cache)
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(2, self.responder.request_count)
+        self.assertEqual(2, cache.put.call_count)
+
+
+class ParallelOCSPChecks(unittest.TestCase):
+    def setUp(self):
+        self.responder = LocalOCSPResponder()
+        self.chain = self.responder.chain
+
+    def tearDown(self):
+        self.responder.close()
+
+    def test_ocsp_checks_run_concurrently(self):
+        # Neither request is answered until both are in flight
+        self.responder.barrier = threading.Barrier(2, timeout=5)
+        verifier = _ChainVerifier([self.chain.root_der], False, parallel_ocsp_checks=True)
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(2, self.responder.request_count)
+
+    def test_ocsp_checks_run_sequentially_by_default(self):
+        # The leaf is only checked once the intermediate's request has been answered
+        self.responder.held_serial_numbers[self.chain.intermediate.serial_number] = threading.Event()
+        verifier = _ChainVerifier([self.chain.root_der], False)
+        thread = threading.Thread(target=verifier._verify_chain_without_caching, args=(self.chain.x5c, True, time.time()))
+        thread.start()
+        self.wait_for_request_count(1)
+        self.assertEqual(1, self.responder.request_count)
+        self.responder.held_serial_numbers[self.chain.intermediate.serial_number].set()
+        thread.join()
+        self.assertEqual(2, self.responder.request_count)
+
+    def test_parallel_ocsp_checks_fail_fast(self):
+        self.responder.held_serial_numbers[self.chain.intermediate.serial_number] = threading.Event()
+        self.responder.revoked_serial_numbers.add(self.chain.leaf.serial_number)
+        verifier = _ChainVerifier([self.chain.root_der], False, parallel_ocsp_checks=True)
+        with self.assertRaises(VerificationException) as context:
+            verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(VerificationStatus.VERIFICATION_FAILURE, context.exception.status)
+        # The revoked leaf is reported while the intermediate's request is still unanswered
+        self.assertNotIn(self.chain.intermediate.serial_number, self.responder.answered_serial_numbers)
+
+    def test_parallel_ocsp_checks_share_a_thread_pool(self):
+        first_verifier = _ChainVerifier([self.chain.root_der], False, parallel_ocsp_checks=True)
+        second_verifier = _ChainVerifier([self.chain.root_der], False, parallel_ocsp_checks=True)
+        first_verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        second_verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        ocsp_threads = [thread for thread in threading.enumerate() if thread.name.startswith("ocsp")]
+        self.assertLessEqual(len(ocsp_threads), _ChainVerifier.OCSP_WORKERS)
+
+    def wait_for_request_count(self, request_count: int):
+        for _ in range(500):
+            if self.responder.request_count >= request_count:
+                return
+            time.sleep(0.01)
+        self.fail("OCSP request was not received")
+
+
+class OCSPTransport(unittest.TestCase):
+    def setUp(self):
+        self.responder = LocalOCSPResponder()
+        self.chain = self.responder.chain
+
+    def tearDown(self):
+        self.responder.close()
+
+    def test_injected_ocsp_session_and_timeout_are_used(self):
+        session = MagicMock(wraps=requests.Session())
+        verifier = _ChainVerifier([self.chain.root_der], False, ocsp_session=session, ocsp_timeout=(2, 10))
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(2, session.post.call_count)
+        for call in session.post.call_args_list:
+            self.assertEqual(self.responder.url, call.args[0])
+            self.assertEqual((2, 10), call.kwargs['timeout'])
+
+    def test_callable_ocsp_transport_is_used(self):
+        transport = MagicMock(side_effect=requests.post, spec=[])
+        verifier = _ChainVerifier([self.chain.root_der], False, ocsp_session=transport, ocsp_timeout=5)
+        verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(2, transport.call_count)
+        for call in transport.call_args_list:
+            self.assertEqual(self.responder.url, call.args[0])
+            self.assertEqual(5, call.kwargs['timeout'])
+
+    def test_ocsp_read_timeout(self):
+        self.responder.delay = 1
+        verifier = _ChainVerifier([self.chain.root_der], False, ocsp_timeout=(2, 0.1))
+        start = time.monotonic()
+        with self.assertRaises(VerificationException) as context:
+            verifier._verify_chain_without_caching(self.chain.x5c, True, time.time())
+        self.assertEqual(VerificationStatus.RETRYABLE_VERIFICATION_FAILURE, context.exception.status)
+        self.assertLess(time.monotonic() - start, 0.9)
+
+
+class ChainVerificationCoalescing(unittest.TestCase):
+    def setUp(self):
+        self.responder = LocalOCSPResponder()
+        self.chain = self.responder.chain
+
+    def tearDown(self):
+        self.responder.close()
+
+    def test_concurrent_verifications_of_the_same_chain_are_coalesced(self):
+        self.responder.delay = 0.3
+        verifier = _ChainVerifier([self.chain.root_der], False)
+        magic_mock = MagicMock(wraps=verifier._verify_chain_without_caching)
+        verifier._verify_chain_without_caching = magic_mock
+        barrier = threading.Barrier(8)
+        def verify():
+            barrier.wait()
+            return verifier.verify_chain(self.chain.x5c, True, time.time())
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            public_keys = [future.result() for future in [executor.submit(verify) for _ in range(8)]]
+        self.assertEqual(1, magic_mock.call_count)
+        self.assertEqual(2, self.responder.request_count)
+        for public_key in public_keys:
+            self.assertIs(public_keys[0], public_key)
+
+    def test_coalesced_verification_failure_is_raised_to_all_callers(self):
+        self.responder.delay = 0.3
+        self.responder.revoked_serial_numbers.add(self.chain.leaf.serial_number)
+        verifier = _ChainVerifier([self.chain.root_der], False)
+        barrier = threading.Barrier(4)
+        def verify():
+            barrier.wait()
+            with self.assertRaises(VerificationException) as context:
+                verifier.verify_chain(self.chain.x5c, True, time.time())
+            return context.exception.status
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            statuses = [future.result() for future in [executor.submit(verify) for _ in range(4)]]
+        self.assertEqual([VerificationStatus.VERIFICATION_FAILURE] * 4, statuses)
+        self.assertEqual(2, self.responder.request_count)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,16 +1,24 @@
 # Copyright (c) 2023 Apple Inc. Licensed under MIT License.
 
-from typing import Any, Dict
+from base64 import b64encode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+import datetime
 import jwt
 from jwt.api_jwt import decode_complete
 import json
 import os
+import threading
+import time
 
+from cryptography import x509
 from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import AuthorityInformationAccessOID, NameOID
 from appstoreserverlibrary.models.Environment import Environment
 
-from appstoreserverlibrary.signed_data_verifier import SignedDataVerifier
+from appstoreserverlibrary.signed_data_verifier import AsyncSignedDataVerifier, SignedDataVerifier
 
 def create_signed_data_from_json(path: str) -> str:
     data = read_data_from_file(path)
@@ -37,5 +45,129 @@ def get_signed_data_verifier(env: Environment, bundle_id: str, app_apple_id: int
     verifier._chain_verifier.enable_strict_checks = False # We don't have authority identifiers on test certs
     return verifier
 
+def get_async_signed_data_verifier(env: Environment, bundle_id: str, app_apple_id: int = 1234, **kwargs) -> AsyncSignedDataVerifier:
+    verifier = AsyncSignedDataVerifier([read_data_from_binary_file('tests/resources/certs/testCA.der')], False, env, bundle_id, app_apple_id, **kwargs)
+    verifier._chain_verifier.enable_strict_checks = False # We don't have authority identifiers on test certs
+    return verifier
+
 def get_default_signed_data_verifier():
-    return get_signed_data_verifier(Environment.LOCAL_TESTING, "com.example")
\ No newline at end of file
+    return get_signed_data_verifier(Environment.LOCAL_TESTING, "com.example")
+
+class GeneratedCertificateChain:
+    """
+    A root, intermediate and leaf certificate generated for tests, carrying the Apple OIDs and pointing to an OCSP responder.
+    """
+    def __init__(self, ocsp_url: Optional[str] = None):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.root_key = ec.generate_private_key(ec.SECP256R1())
+        self.intermediate_key = ec.generate_private_key(ec.SECP256R1())
+        self.leaf_key = ec.generate_private_key(ec.SECP256R1())
+        self.root = self._create_certificate("Test Root", self.root_key, "Test Root", self.root_key, now, None, None)
+        self.intermediate = self._create_certificate("Test Intermediate", self.intermediate_key, "Test Root", self.root_key, now, ocsp_url, "1.2.840.113635.100.6.2.1")
+        self.leaf = self._create_certificate("Test Leaf", self.leaf_key, "Test Intermediate", self.intermediate_key, now, ocsp_url, "1.2.840.113635.100.6.11.1")
+
+    @staticmethod
+    def _create_certificate(subject: str, key, issuer: str, issuer_key, now: datetime.datetime, ocsp_url: Optional[str], apple_oid: Optional[str]) -> x509.Certificate:
+        builder = (
+            x509.CertificateBuilder()
+            .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, subject)]))
+            .issuer_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, issuer)]))
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=365))
+            .add_extension(x509.BasicConstraints(ca=apple_oid != "1.2.840.113635.100.6.11.1", path_length=None), critical=True)
+            .add_extension(x509.SubjectKeyIdentifier.from_public_key(key.public_key()), critical=False)
+            .add_extension(x509.AuthorityKeyIdentifier.from_issuer_public_key(issuer_key.public_key()), critical=False)
+        )
+        if apple_oid != "1.2.840.113635.100.6.11.1":
+            builder = builder.add_extension(x509.KeyUsage(digital_signature=True, content_commitment=False, key_encipherment=False, data_encipherment=False, key_agreement=False, key_cert_sign=True, crl_sign=True, encipher_only=False, decipher_only=False), critical=True)
+        if ocsp_url is not None:
+            builder = builder.add_extension(x509.AuthorityInformationAccess([x509.AccessDescription(AuthorityInformationAccessOID.OCSP, x509.UniformResourceIdentifier(ocsp_url))]), critical=False)
+        if apple_oid is not None:
+            builder = builder.add_extension(x509.UnrecognizedExtension(x509.ObjectIdentifier(apple_oid), b"\x05\x00"), critical=False)
+        return builder.sign(issuer_key, hashes.SHA256())
+
+    @property
+    def root_der(self) -> bytes:
+        return self.root.public_bytes(serialization.Encoding.DER)
+
+    @property
+    def x5c(self) -> List[str]:
+        return [b64encode(cert.public_bytes(serialization.Encoding.DER)).decode() for cert in [self.leaf, self.intermediate, self.root]]
+
+    def sign(self, payload: Dict[str, Any]) -> str:
+        return jwt.encode(payload=payload, key=self.leaf_key, algorithm='ES256', headers={'x5c': self.x5c})
+
+
+class LocalOCSPResponder:
+    """
+    A stand-in OCSP responder on a local port, answering for the certificates of a GeneratedCertificateChain.
+    """
+    def __init__(self, next_update: datetime.timedelta = datetime.timedelta(hours=1)):
+        self.next_update = next_update
+        self.revoked_serial_numbers = set()
+        self.delay = 0
+        self.delays: Dict[int, float] = {}
+        # When set, each request waits at the barrier, so requests only succeed if enough of them are in flight at once
+        self.barrier: Optional[threading.Barrier] = None
+        # Requests for these serial numbers are not answered until the event is set
+        self.held_serial_numbers: Dict[int, threading.Event] = {}
+        self.answered_serial_numbers = set()
+        self.request_count = 0
+        self._lock = threading.Lock()
+        responder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = ocsp.load_der_ocsp_request(self.rfile.read(int(self.headers['Content-Length'])))
+                with responder._lock:
+                    responder.request_count += 1
+                if responder.barrier is not None:
+                    responder.barrier.wait()
+                if request.serial_number in responder.held_serial_numbers:
+                    responder.held_serial_numbers[request.serial_number].wait(5)
+                time.sleep(responder.delays.get(request.serial_number, responder.delay))
+                body = responder._build_response(request)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/ocsp-response')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with responder._lock:
+                    responder.answered_serial_numbers.add(request.serial_number)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}/'
+        self.chain = GeneratedCertificateChain(self.url)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def _build_response(self, request: ocsp.OCSPRequest) -> bytes:
+        if request.serial_number == self.chain.leaf.serial_number:
+            cert, issuer, issuer_key = self.chain.leaf, self.chain.intermediate, self.chain.intermediate_key
+        else:
+            cert, issuer, issuer_key = self.chain.intermediate, self.chain.root, self.chain.root_key
+        now = datetime.datetime.now(datetime.timezone.utc)
+        revoked = request.serial_number in self.revoked_serial_numbers
+        builder = ocsp.OCSPResponseBuilder().add_response(
+            cert=cert,
+            issuer=issuer,
+            algorithm=hashes.SHA256(),
+            cert_status=ocsp.OCSPCertStatus.REVOKED if revoked else ocsp.OCSPCertStatus.GOOD,
+            this_update=now,
+            next_update=now + self.next_update,
+            revocation_time=now if revoked else None,
+            revocation_reason=None,
+        ).responder_id(ocsp.OCSPResponderEncoding.HASH, issuer)
+        return builder.sign(issuer_key, hashes.SHA256()).public_bytes(serialization.Encoding.DER)
+
+    def close(self):
+        for held in self.held_serial_numbers.values():
+            held.set()
+        if self.barrier is not None:
+            self.barrier.abort()
+        self._server.shutdown()
+        self._server.server_close()